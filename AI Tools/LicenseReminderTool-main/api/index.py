@@ -16,9 +16,13 @@ import json
 import sys
 from pathlib import Path
 
-# Add utils directory to path for auth middleware
+# Add utils directory to path for auth middleware, the shared Oracle pool,
+# reminder engine and import jobs
+# (license_import_jobs pulls in pandas, so the import routes load it on demand)
 sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
 from auth_middleware import require_auth
+from reminder_engine import run_reminder_check
+import oracle_pool
 
 # Load environment variables
 load_dotenv()
@@ -69,22 +73,9 @@ COMPANY_INFO = {
 
 
 def get_oracle_connection():
-    """Create and return an Oracle database connection"""
+    """Acquire a pooled Oracle connection (close() returns it to the pool)"""
     try:
-        dsn = oracledb.makedsn(
-            ORACLE_CONFIG['host'],
-            ORACLE_CONFIG['port'],
-            service_name=ORACLE_CONFIG['service']
-        )
-        
-        connection = oracledb.connect(
-            user=ORACLE_CONFIG['user'],
-            password=ORACLE_CONFIG['password'],
-            dsn=dsn,
-            mode=oracledb.AUTH_MODE_SYSDBA
-        )
-        
-        return connection
+        return oracle_pool.get_connection()
     except oracledb.Error as e:
         logger.error(f"Oracle connection error: {e}")
         raise
@@ -92,6 +83,8 @@ def get_oracle_connection():
 
 def query_oracle(query, params=None):
     """Execute a query and return results as list of dictionaries"""
+    connection = None
+    cursor = None
     try:
         connection = get_oracle_connection()
         cursor = connection.cursor()
@@ -119,23 +112,32 @@ def query_oracle(query, params=None):
                     result_dict[col] = value
                 results.append(result_dict)
             
-            cursor.close()
-            connection.close()
             return results
         else:
             # For INSERT, UPDATE, DELETE
             connection.commit()
-            affected_rows = cursor.rowcount
-            cursor.close()
-            connection.close()
-            return affected_rows
+            return cursor.rowcount
         
     except Exception as e:
         logger.error(f"Query error: {e}")
-        if 'connection' in locals():
-            connection.rollback()
-            connection.close()
+        if connection is not None:
+            try:
+                connection.rollback()
+            except Exception as rollback_error:
+                logger.error(f"Rollback error: {rollback_error}")
         raise
+    finally:
+        # Always hand the connection back, or the pool runs dry
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as close_error:
+                logger.error(f"Error releasing connection: {close_error}")
 
 
 @app.route('/health')
@@ -1004,6 +1006,67 @@ def api_toggle_emails(license_id):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/import', methods=['POST'])
+@require_auth
+def api_start_import():
+    """Store an uploaded Excel workbook and start a background import job"""
+    from license_import_jobs import create_import_job, get_import_job
+    
+    try:
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({'error': 'No file uploaded'}), 400
+        if not upload.filename.lower().endswith('.xlsx'):
+            return jsonify({'error': 'Only .xlsx workbooks can be imported'}), 400
+        
+        schema = ORACLE_CONFIG['schema']
+        connection = get_oracle_connection()
+        try:
+            job_id = create_import_job(
+                connection, schema, upload.filename, upload.read(),
+                created_by=request.user['username']
+            )
+            job = get_import_job(connection, schema, job_id)
+        finally:
+            connection.close()
+        
+        return jsonify({'success': True, 'job': job}), 202
+        
+    except Exception as e:
+        logger.error(f"API start import error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/import/<job_id>')
+@require_auth
+def api_import_status(job_id):
+    """
+    Report import job progress, processing the next chunks first
+    
+    Each poll advances the job by as much work as fits in the time budget,
+    so the import finishes across invocations while the page keeps polling.
+    """
+    from license_import_jobs import get_import_job, process_import_job
+    
+    try:
+        schema = ORACLE_CONFIG['schema']
+        connection = get_oracle_connection()
+        try:
+            job = get_import_job(connection, schema, job_id)
+            if not job:
+                return jsonify({'error': 'Import job not found'}), 404
+            if job['status'] in ('pending', 'running'):
+                job = process_import_job(connection, schema, job_id)
+        finally:
+            connection.close()
+        
+        return jsonify({'success': True, 'job': job})
+        
+    except Exception as e:
+        logger.error(f"API import status error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/cron/check-reminders')
 def cron_check_reminders():
     """
@@ -1018,194 +1081,7 @@ def cron_check_reminders():
             if request_secret != f"Bearer {cron_secret}":
                 return jsonify({'error': 'Unauthorized'}), 401
         
-        logger.info("Starting automatic reminder check...")
-        schema = ORACLE_CONFIG['schema']
-        
-        # Get licenses that need reminders today
-        licenses = query_oracle(f"""
-            SELECT 
-                l.LIC_ID as id,
-                l.LIC_NAME as lic_name,
-                l.LIC_TYPE as lic_type,
-                l.LIC_STATE as lic_state,
-                l.LIC_NO as lic_no,
-                l.EXPIRATION_DATE as expiration_date,
-                l.LIC_NOTIFY_NAMES as lic_notify_names,
-                TRUNC(l.EXPIRATION_DATE) - TRUNC(SYSDATE) as days_until_expiration
-            FROM "{schema}".LICENSES l
-            WHERE l.EXPIRATION_DATE IS NOT NULL
-            AND l.LIC_NOTIFY_NAMES IS NOT NULL
-            AND NVL(l.EMAIL_ENABLED, 1) = 1
-            AND (
-                -- 30-day reminder
-                (TRUNC(l.EXPIRATION_DATE) - TRUNC(SYSDATE) = 30 AND NOT EXISTS (
-                    SELECT 1 FROM "{schema}".EMAIL_REMINDERS er
-                    WHERE er.LICENSE_ID = l.LIC_ID
-                    AND er.REMINDER_TYPE = '30_days'
-                    AND TRUNC(er.SENT_DATE) >= TRUNC(SYSDATE) - 7
-                ))
-                -- 15-day reminder
-                OR (TRUNC(l.EXPIRATION_DATE) - TRUNC(SYSDATE) = 15 AND NOT EXISTS (
-                    SELECT 1 FROM "{schema}".EMAIL_REMINDERS er
-                    WHERE er.LICENSE_ID = l.LIC_ID
-                    AND er.REMINDER_TYPE = '15_days'
-                    AND TRUNC(er.SENT_DATE) >= TRUNC(SYSDATE) - 7
-                ))
-                -- 10-day reminder
-                OR (TRUNC(l.EXPIRATION_DATE) - TRUNC(SYSDATE) = 10 AND NOT EXISTS (
-                    SELECT 1 FROM "{schema}".EMAIL_REMINDERS er
-                    WHERE er.LICENSE_ID = l.LIC_ID
-                    AND er.REMINDER_TYPE = '10_days'
-                    AND TRUNC(er.SENT_DATE) >= TRUNC(SYSDATE) - 7
-                ))
-                -- 7-day critical reminder
-                OR (TRUNC(l.EXPIRATION_DATE) - TRUNC(SYSDATE) = 7 AND NOT EXISTS (
-                    SELECT 1 FROM "{schema}".EMAIL_REMINDERS er
-                    WHERE er.LICENSE_ID = l.LIC_ID
-                    AND er.REMINDER_TYPE = '7_days'
-                    AND TRUNC(er.SENT_DATE) >= TRUNC(SYSDATE) - 1
-                ))
-                -- 1-day urgent reminder
-                OR (TRUNC(l.EXPIRATION_DATE) - TRUNC(SYSDATE) = 1 AND NOT EXISTS (
-                    SELECT 1 FROM "{schema}".EMAIL_REMINDERS er
-                    WHERE er.LICENSE_ID = l.LIC_ID
-                    AND er.REMINDER_TYPE = '1_day'
-                    AND TRUNC(er.SENT_DATE) >= TRUNC(SYSDATE) - 1
-                ))
-            )
-        """)
-        
-        if not licenses:
-            logger.info("No licenses need reminders today")
-            return jsonify({
-                'success': True,
-                'message': 'No licenses need reminders',
-                'checked_at': datetime.now().isoformat(),
-                'licenses_checked': 0,
-                'emails_sent': 0,
-                'emails_failed': 0
-            })
-        
-        sent_count = 0
-        failed_count = 0
-        
-        # Process each license
-        for license in licenses:
-            # Use same email sending logic as manual send
-            days_left = license.get('days_until_expiration', 0)
-            
-            # Determine reminder type
-            if days_left == 1:
-                reminder_type = '1_day'
-            elif days_left == 7:
-                reminder_type = '7_days'
-            elif days_left == 10:
-                reminder_type = '10_days'
-            elif days_left == 15:
-                reminder_type = '15_days'
-            elif days_left == 30:
-                reminder_type = '30_days'
-            else:
-                reminder_type = 'custom'
-            
-            # Send email using existing logic
-            email_to = license.get('lic_notify_names') or ''
-            email_to = email_to.strip() if email_to else ''
-            if not email_to:
-                email_to = COMPANY_INFO['support_email']
-            
-            email_subject = f"License Renewal Reminder: {license['lic_name']} - {days_left} days remaining"
-            email_body = f"""
-Dear License Administrator,
-
-This is an automated daily reminder that the following license is expiring soon:
-
-License Name: {license['lic_name']}
-License Type: {license.get('lic_type', 'N/A')}
-License State: {license.get('lic_state', 'N/A')}
-License Number: {license.get('lic_no', 'N/A')}
-Expiration Date: {license.get('expiration_date', 'N/A')}
-Days Until Expiration: {days_left}
-
-Please take appropriate action to renew this license before it expires.
-
-Best regards,
-{COMPANY_INFO['name']}
-{COMPANY_INFO['website']}
-            """
-            
-            # Try to send email
-            email_status = 'failed'
-            smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-            smtp_port = int(os.getenv('SMTP_PORT', 587))
-            smtp_username = os.getenv('SMTP_USERNAME')
-            smtp_password = os.getenv('SMTP_PASSWORD')
-            sender_email = os.getenv('SENDER_EMAIL', smtp_username)
-            
-            try:
-                if smtp_username and smtp_password:
-                    msg = MIMEMultipart()
-                    msg['From'] = sender_email
-                    msg['To'] = email_to
-                    msg['Subject'] = email_subject
-                    msg.attach(MIMEText(email_body, 'plain'))
-                    
-                    with smtplib.SMTP(smtp_server, smtp_port) as server:
-                        server.starttls()
-                        server.login(smtp_username, smtp_password)
-                        server.send_message(msg)
-                    
-                    email_status = 'sent'
-                    sent_count += 1
-                    logger.info(f"Cron: Email sent for license {license['id']}")
-                else:
-                    failed_count += 1
-                    logger.warning(f"Cron: SMTP not configured for license {license['id']}")
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"Cron: Failed to send email for license {license['id']}: {e}")
-            
-            # Log to EMAIL_REMINDERS table
-            try:
-                query_oracle(f"""
-                    INSERT INTO "{schema}".EMAIL_REMINDERS (
-                        LICENSE_ID,
-                        REMINDER_TYPE,
-                        EMAIL_TO,
-                        EMAIL_SUBJECT,
-                        EMAIL_BODY,
-                        STATUS,
-                        SENT_DATE
-                    ) VALUES (
-                        :license_id,
-                        :reminder_type,
-                        :email_to,
-                        :email_subject,
-                        :email_body,
-                        :status,
-                        SYSDATE
-                    )
-                """, {
-                    'license_id': license['id'],
-                    'reminder_type': reminder_type,
-                    'email_to': email_to,
-                    'email_subject': email_subject,
-                    'email_body': email_body,
-                    'status': email_status
-                })
-            except Exception as e:
-                logger.error(f"Cron: Failed to log email history: {e}")
-        
-        logger.info(f"Cron job complete: {sent_count} sent, {failed_count} failed")
-        
-        return jsonify({
-            'success': True,
-            'message': f'Processed {len(licenses)} licenses',
-            'checked_at': datetime.now().isoformat(),
-            'licenses_checked': len(licenses),
-            'emails_sent': sent_count,
-            'emails_failed': failed_count
-        })
+        return jsonify(run_reminder_check(get_oracle_connection, ORACLE_CONFIG['schema'], company_info=COMPANY_INFO))
         
     except Exception as e:
         logger.error(f"Cron job error: {e}")
@@ -1367,6 +1243,15 @@ Best regards,
         return jsonify({'error': str(e)}), 500
 
 
+@app.errorhandler(oracle_pool.PoolExhausted)
+def pool_exhausted(e):
+    """Every pooled connection is busy; the client should retry shortly"""
+    logger.warning(f"Oracle pool exhausted: {e}")
+    response = jsonify({'error': 'Service busy', 'message': 'Please try again in a moment'})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+
 @app.errorhandler(Exception)
 def handle_exception(e):
     """Handle all uncaught exceptions"""
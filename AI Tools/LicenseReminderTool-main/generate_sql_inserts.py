@@ -1,99 +1,250 @@
 #!/usr/bin/env python3
 """
-Generate SQL INSERT statements from Excel data
+Generate SQL bulk-load files from Excel data
+
+Modes:
+  single      one INSERT per license (Supabase SQL editor, the original format)
+  insert-all  Oracle multi-row INSERT ALL blocks of --batch-size rows
+  sqlldr      SQL*Loader control file plus CSV data file for direct-path loads
+
+The workbook is read in streamed chunks and output is written straight to
+disk, so generation works on workbooks larger than memory.
 """
 
+import os
+import sys
+import csv
+import argparse
 import pandas as pd
-import json
 from datetime import datetime
+from pathlib import Path
+
+# Add utils directory to path for shared import helpers
+sys.path.insert(0, str(Path(__file__).parent / 'utils'))
+from license_validation import LICENSE_COLUMNS, DATE_COLUMNS, validate_licenses, frame_to_records, duplicate_keys
+from license_sync import compute_row_hash
+
+ORACLE_TABLE = '"MSMM DASHBOARD".LICENSES'
+# Oracle rejects a multitable insert with more than 999 columns in total
+# (ORA-24335), so an INSERT ALL block holds at most 999 // columns rows
+ORACLE_INSERT_ALL_MAX_COLUMNS = 999
+SUPABASE_TABLE = 'licenses'
+
+
+def iter_workbook_chunks(path, chunk_rows):
+    """Yield raw DataFrames of at most chunk_rows rows without loading the whole file"""
+    if str(path).lower().endswith('.csv'):
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            yield chunk
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        start = 0
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=header, index=range(start, start + len(buffer)))
+                start += len(buffer)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header, index=range(start, start + len(buffer)))
+    finally:
+        workbook.close()
+
+
+def sql_literals(frame):
+    """Render every cell of a validated frame as a SQL literal, one column at a time"""
+    literals = pd.DataFrame(index=frame.index)
+    for column in frame.columns:
+        values = frame[column]
+        if column in DATE_COLUMNS:
+            rendered = "DATE '" + values.dt.strftime('%Y-%m-%d') + "'"
+        elif pd.api.types.is_numeric_dtype(values):
+            numbers = values.astype('Float64')
+            rendered = numbers.round().astype('Int64').astype('string').where(numbers % 1 == 0, numbers.astype('string'))
+        else:
+            rendered = "'" + values.astype('string').str.replace("'", "''", regex=False) + "'"
+        literals[column] = rendered.astype('string').fillna('NULL')
+    return literals
+
+
+def add_row_hashes(clean):
+    """Attach ROW_HASH so later incremental syncs see freshly loaded rows as unchanged"""
+    clean = clean.copy()
+    clean['ROW_HASH'] = [compute_row_hash(record) for record in frame_to_records(clean, lowercase=False)]
+    return clean
+
+
+def write_single_inserts(out, literals, table):
+    """Write one INSERT statement per row"""
+    column_list = ', '.join(column.lower() for column in literals.columns)
+    values = literals.apply(lambda row: ', '.join(row), axis=1)
+    for row_values in values:
+        out.write(f"INSERT INTO {table} ({column_list})\nVALUES ({row_values});\n\n")
+
+
+def max_insert_all_rows(column_count):
+    """Most rows an INSERT ALL block of column_count columns can hold"""
+    return max(1, ORACLE_INSERT_ALL_MAX_COLUMNS // column_count)
+
+
+def write_insert_all(out, literals, table, batch_size):
+    """Write Oracle INSERT ALL blocks of batch_size rows (capped at Oracle's column limit)"""
+    batch_size = min(batch_size, max_insert_all_rows(len(literals.columns)))
+    column_list = ', '.join(literals.columns)
+    values = literals.apply(lambda row: ', '.join(row), axis=1).tolist()
+    for start in range(0, len(values), batch_size):
+        out.write("INSERT ALL\n")
+        for row_values in values[start:start + batch_size]:
+            out.write(f"  INTO {table} ({column_list}) VALUES ({row_values})\n")
+        out.write("SELECT 1 FROM DUAL;\n\n")
+
+
+# License columns plus ROW_HASH: 99 rows per block
+DEFAULT_BATCH_SIZE = max_insert_all_rows(len(LICENSE_COLUMNS) + 1)
+
+
+def write_sqlldr_control(path, data_file, table, columns):
+    """Write a SQL*Loader control file for a direct-path load of the CSV data file"""
+    fields = []
+    for column in columns:
+        if column in DATE_COLUMNS:
+            fields.append(f'  {column} DATE "YYYY-MM-DD"')
+        elif column in ('LIC_ID', 'ASCEM_NO'):
+            fields.append(f'  {column} INTEGER EXTERNAL')
+        else:
+            fields.append(f'  {column} CHAR(4000)')
+
+    with open(path, 'w', encoding='utf-8') as ctl:
+        ctl.write("-- SQL*Loader control file for licenses table\n")
+        ctl.write(f"-- Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        ctl.write(f"-- Run: sqlldr userid=<user>/<password>@<service> control={os.path.basename(path)}\n")
+        ctl.write("OPTIONS (SKIP=1, DIRECT=TRUE)\n")
+        ctl.write("LOAD DATA\n")
+        ctl.write("CHARACTERSET UTF8\n")
+        ctl.write(f"INFILE '{os.path.basename(data_file)}'\n")
+        ctl.write("APPEND\n")
+        ctl.write(f"INTO TABLE {table}\n")
+        ctl.write("FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"'\n")
+        ctl.write("TRAILING NULLCOLS\n")
+        ctl.write("(\n" + ",\n".join(fields) + "\n)\n")
+
+
+def generate_sql_inserts(input_path='licenses.xlsx', output=None, mode='single',
+                         batch_size=DEFAULT_BATCH_SIZE, chunk_rows=5000, table=None):
+    """Stream validated workbook rows into the selected bulk-load format"""
+    oracle_mode = mode in ('insert-all', 'sqlldr')
+    table = table or (ORACLE_TABLE if oracle_mode else SUPABASE_TABLE)
+    # Oracle loads keep LIC_ID as the key; the Supabase format uses auto-generated ids
+    columns = LICENSE_COLUMNS if oracle_mode else [c for c in LICENSE_COLUMNS if c != 'LIC_ID']
+
+    if mode == 'sqlldr':
+        base = os.path.splitext(output or 'license_data')[0]
+        output = base + '.csv'
+        control_path = base + '.ctl'
+    else:
+        output = output or 'license_data_inserts.sql'
+
+    total = 0
+    skipped = 0
+    seen_ids = set()
+    seen_nos = set()
+
+    if mode == 'insert-all':
+        limit = max_insert_all_rows(len(columns) + 1)  # + ROW_HASH
+        if batch_size > limit:
+            print(f"⚠️  --batch-size {batch_size} exceeds Oracle's 999-column INSERT ALL limit; using {limit}")
+            batch_size = limit
+
+    with open(output, 'w', encoding='utf-8', newline='') as out:
+        if mode == 'sqlldr':
+            writer = csv.writer(out)
+            writer.writerow(columns + ['ROW_HASH'])
+        else:
+            comment = 'INSERT ALL blocks' if mode == 'insert-all' else 'INSERT statements'
+            out.write(f"-- SQL {comment} for licenses table\n")
+            out.write(f"-- Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+        for chunk in iter_workbook_chunks(input_path, chunk_rows):
+            clean, rejected = validate_licenses(chunk)
+
+            # Duplicates within a chunk are caught by validation; catch the ones
+            # across chunks, first occurrence wins as in validation
+            lic_ids, lic_nos = duplicate_keys(clean)
+            repeated_id = lic_ids.isin(seen_ids).fillna(False).astype(bool)
+            repeated_no = lic_nos.isin(seen_nos).fillna(False).astype(bool)
+            repeated = repeated_id | repeated_no
+            seen_ids.update(lic_ids[~repeated].dropna().tolist())
+            seen_nos.update(lic_nos[~repeated].dropna().tolist())
+            clean = clean[~repeated]
+            skipped += len(rejected) + int(repeated.sum())
+
+            if mode != 'sqlldr':
+                for _, row in rejected.iterrows():
+                    out.write(f"-- Skipped row {row['ROW_NUMBER']}: {row['REJECT_REASON']}\n")
+                for index in repeated[repeated].index:
+                    reasons = []
+                    if repeated_id[index]:
+                        reasons.append('duplicate LIC_ID')
+                    if repeated_no[index]:
+                        reasons.append('duplicate LIC_NO for LIC_STATE')
+                    out.write(f"-- Skipped row {index + 2}: {'; '.join(reasons)}\n")
+
+            if clean.empty:
+                continue
+
+            clean = clean[LICENSE_COLUMNS]
+            if oracle_mode:
+                clean = add_row_hashes(clean)
+            clean = clean[columns + (['ROW_HASH'] if oracle_mode else [])]
+
+            if mode == 'sqlldr':
+                frame = clean.copy()
+                for column in DATE_COLUMNS:
+                    frame[column] = frame[column].dt.strftime('%Y-%m-%d')
+                frame.to_csv(out, header=False, index=False)
+            elif mode == 'insert-all':
+                write_insert_all(out, sql_literals(clean), table, batch_size)
+            else:
+                write_single_inserts(out, sql_literals(clean), table)
+
+            total += len(clean)
+
+        if mode != 'sqlldr':
+            out.write(f"-- Total records: {total}\n")
+
+    if mode == 'sqlldr':
+        write_sqlldr_control(control_path, output, table, columns + ['ROW_HASH'])
+        print(f"✅ SQL*Loader files saved to '{control_path}' and '{output}'")
+    else:
+        print(f"✅ SQL statements saved to '{output}'")
+    print(f"✅ {total} records written, {skipped} rows skipped")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate SQL bulk-load files from the licenses workbook')
+    parser.add_argument('input', nargs='?', default='licenses.xlsx', help='Excel (.xlsx) or CSV file')
+    parser.add_argument('--mode', choices=['single', 'insert-all', 'sqlldr'], default='single',
+                        help='Output format (default: single)')
+    parser.add_argument('--output', help='Output file (sqlldr mode writes <output>.ctl and <output>.csv)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'Rows per INSERT ALL block (default: {DEFAULT_BATCH_SIZE}; at most 999 columns per block)')
+    parser.add_argument('--chunk-rows', type=int, default=5000, help='Workbook rows read per chunk')
+    parser.add_argument('--table', help='Target table (defaults depend on the mode)')
+    args = parser.parse_args()
+
+    generate_sql_inserts(args.input, args.output, args.mode, args.batch_size, args.chunk_rows, args.table)
 
-def clean_value_for_sql(value):
-    """Clean and format value for SQL insertion"""
-    if pd.isna(value) or value is None:
-        return 'NULL'
-    
-    if isinstance(value, str):
-        # Escape single quotes and return as string
-        escaped = value.replace("'", "''")
-        return f"'{escaped}'"
-    
-    if isinstance(value, (int, float)):
-        if pd.isna(value):
-            return 'NULL'
-        return str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
-    
-    if isinstance(value, datetime):
-        return f"'{value.strftime('%Y-%m-%d')}'"
-    
-    return f"'{str(value)}'"
-
-def generate_sql_inserts():
-    """Generate SQL INSERT statements from Excel file"""
-    
-    # Read Excel file
-    df = pd.read_excel('licenses.xlsx')
-    
-    print("-- SQL INSERT statements for licenses table")
-    print("-- Generated on:", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-    print()
-    
-    # Create the INSERT statements
-    insert_statements = []
-    
-    for index, row in df.iterrows():
-        # Clean and prepare values
-        # Skip lic_id since we're using auto-generated id instead
-        # lic_id = int(row['LIC_ID']) if not pd.isna(row['LIC_ID']) else None
-        lic_name = clean_value_for_sql(row['LIC_NAME'])
-        lic_state = clean_value_for_sql(row['LIC_STATE'])
-        lic_type = clean_value_for_sql(row['LIC_TYPE'])
-        lic_no = clean_value_for_sql(row['LIC_NO'])
-        ascem_no = row['ASCEM_NO'] if not pd.isna(row['ASCEM_NO']) else 'NULL'
-        
-        # Handle dates
-        first_issue_date = 'NULL'
-        if not pd.isna(row['FIRST_ISSUE_DATE']):
-            try:
-                date_obj = pd.to_datetime(row['FIRST_ISSUE_DATE'])
-                first_issue_date = f"'{date_obj.strftime('%Y-%m-%d')}'"
-            except:
-                first_issue_date = 'NULL'
-        
-        expiration_date = 'NULL'
-        if not pd.isna(row['EXPIRATION_DATE']):
-            try:
-                date_obj = pd.to_datetime(row['EXPIRATION_DATE'])
-                expiration_date = f"'{date_obj.strftime('%Y-%m-%d')}'"
-            except:
-                expiration_date = 'NULL'
-        
-        lic_notify_names = clean_value_for_sql(row['LIC_NOTIFY_NAMES'])
-        
-        # Create INSERT statement
-        sql = f"""INSERT INTO licenses (lic_name, lic_state, lic_type, lic_no, ascem_no, first_issue_date, expiration_date, lic_notify_names)
-VALUES ({lic_name}, {lic_state}, {lic_type}, {lic_no}, {ascem_no}, {first_issue_date}, {expiration_date}, {lic_notify_names});"""
-        
-        insert_statements.append(sql)
-    
-    # Print all statements
-    for statement in insert_statements:
-        print(statement)
-        print()
-    
-    print(f"-- Total records: {len(insert_statements)}")
-    
-    # Also save to file
-    with open('license_data_inserts.sql', 'w') as f:
-        f.write("-- SQL INSERT statements for licenses table\n")
-        f.write(f"-- Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        for statement in insert_statements:
-            f.write(statement + '\n\n')
-        
-        f.write(f"-- Total records: {len(insert_statements)}\n")
-    
-    print(f"\n✅ SQL statements saved to 'license_data_inserts.sql'")
-    print(f"✅ Ready to copy and paste into Supabase SQL editor")
 
 if __name__ == "__main__":
-    generate_sql_inserts() 
\ No newline at end of file
+    main()
@@ -15,8 +15,14 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from supabase import create_client, Client
 from typing import List, Dict, Optional
+from pathlib import Path
 import logging
 
+# Add utils directory to path for shared import helpers
+sys.path.insert(0, str(Path(__file__).parent / 'utils'))
+from license_validation import validate_licenses, frame_to_records, log_rejected_rows, parse_email_addresses
+from supabase_bulk import bulk_insert, bulk_upsert
+
 # Load environment variables
 load_dotenv()
 
@@ -73,29 +79,15 @@ class LicenseReminderSystemEmailJS:
             logger.info(f"Reading Excel file: {self.excel_file_path}")
             df = pd.read_excel(self.excel_file_path)
             
-            # Clean and prepare data
-            df = df.dropna(subset=['LIC_ID'])  # Remove rows without license ID (but we won't store LIC_ID)
-            
-            # Convert dates to string format for Supabase
-            date_columns = ['FIRST_ISSUE_DATE', 'EXPIRATION_DATE']
-            for col in date_columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-                    df[col] = df[col].dt.strftime('%Y-%m-%d')
-                    df[col] = df[col].replace('NaT', None)
-            
-            # Convert column names to lowercase for database
-            df.columns = df.columns.str.lower()
+            # Validate and clean the workbook (dates become ISO strings for Supabase)
+            clean, rejected = validate_licenses(df)
+            log_rejected_rows(rejected, logger)
             
             # Remove lic_id column since we'll use database auto-generated id instead
-            if 'lic_id' in df.columns:
-                df = df.drop('lic_id', axis=1)
-            
-            # Handle NaN values
-            df = df.where(pd.notna(df), None)
+            df = clean.drop(columns=['LIC_ID'])
             
             # Convert DataFrame to list of dictionaries
-            records = df.to_dict('records')
+            records = frame_to_records(df, date_format='%Y-%m-%d')
             
             logger.info(f"Uploading {len(records)} records to Supabase")
             
@@ -116,18 +108,15 @@ class LicenseReminderSystemEmailJS:
                     new_records.append(record)
             
             if new_records:
-                result = self.supabase.table('licenses').insert(new_records).execute()
-                logger.info(f"Successfully uploaded {len(new_records)} new records")
+                written = bulk_insert(self.supabase, 'licenses', new_records)
+                logger.info(f"Successfully uploaded {written} new records")
             else:
                 logger.info("No new records to upload")
                 
-            # Update existing records if needed
-            for record in existing_records:
-                record_id = record.pop('id')  # Remove id from update data
-                self.supabase.table('licenses').update(record).eq('id', record_id).execute()
-            
+            # Existing records already carry their database id, so upsert on it in bulk
             if existing_records:
-                logger.info(f"Updated {len(existing_records)} existing records")
+                written = bulk_upsert(self.supabase, 'licenses', existing_records, on_conflict='id')
+                logger.info(f"Updated {written} existing records")
             
             return True
             
@@ -310,14 +299,8 @@ RECOMMENDED ACTIONS:
             return False
 
     def parse_email_addresses(self, email_string: str) -> List[str]:
-        """Parse email addresses from string (comma-separated)"""
-        if not email_string or pd.isna(email_string):
-            return []
-        
-        emails = [email.strip() for email in str(email_string).split(',')]
-        # Basic email validation
-        valid_emails = [email for email in emails if '@' in email and '.' in email]
-        return valid_emails
+        """Parse email addresses from string (comma or semicolon separated)"""
+        return parse_email_addresses(email_string)
 
     def record_reminder_sent(self, license_id: int, reminder_type: str, 
                            email_addresses: List[str], subject: str, body: str, 
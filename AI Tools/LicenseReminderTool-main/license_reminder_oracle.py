@@ -8,14 +8,17 @@ import sys
 import logging
 import schedule
 import time
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 import oracledb
 import pandas as pd
+from pathlib import Path
+
+# Add utils directory to path for shared import and reminder helpers
+sys.path.insert(0, str(Path(__file__).parent / 'utils'))
+from license_sync import normalize_lic_id, compute_row_hash, diff_license_hashes, format_sync_report
+from license_validation import LICENSE_COLUMNS, validate_licenses, frame_to_records, log_rejected_rows
+from reminder_engine import run_reminder_check
 
 # Load environment variables
 load_dotenv()
@@ -108,8 +111,8 @@ class LicenseReminderOracleSystem:
             logger.error(f"Oracle connection error: {e}")
             raise
     
-    def upload_excel_data(self, excel_path: str = None):
-        """Upload license data from Excel to Oracle database"""
+    def upload_excel_data(self, excel_path: str = None, dry_run: bool = False):
+        """Sync license data from Excel to Oracle, writing only changed rows"""
         if not excel_path:
             excel_path = os.getenv('EXCEL_FILE_PATH', 'licenses.xlsx')
         
@@ -122,6 +125,16 @@ class LicenseReminderOracleSystem:
             df = pd.read_excel(excel_path)
             logger.info(f"Read {len(df)} rows from Excel file")
             
+            # Validate and clean the workbook before touching the database
+            clean, rejected = validate_licenses(df)
+            log_rejected_rows(rejected, logger)
+            
+            # Key bind rows by LIC_ID together with their content hash
+            incoming = {}
+            for record in frame_to_records(clean[LICENSE_COLUMNS]):
+                record['row_hash'] = compute_row_hash(record)
+                incoming[record['lic_id']] = record
+            
             # Connect to Oracle
             connection = self.get_oracle_connection()
             cursor = connection.cursor()
@@ -129,80 +142,60 @@ class LicenseReminderOracleSystem:
             schema = self.oracle_config['schema']
             table = self.oracle_config['table']
             
-            # Process each row
-            inserted = 0
-            updated = 0
-            
-            for _, row in df.iterrows():
-                try:
-                    # Check if license exists
-                    cursor.execute(f"""
-                        SELECT COUNT(*) FROM "{schema}".{table}
-                        WHERE LIC_ID = :lic_id
-                    """, lic_id=row.get('LIC_ID'))
-                    
-                    exists = cursor.fetchone()[0] > 0
-                    
-                    if exists:
-                        # Update existing record
-                        cursor.execute(f"""
-                            UPDATE "{schema}".{table}
-                            SET LIC_NAME = :lic_name,
-                                LIC_STATE = :lic_state,
-                                LIC_TYPE = :lic_type,
-                                LIC_NO = :lic_no,
-                                ASCEM_NO = :ascem_no,
-                                FIRST_ISSUE_DATE = :first_issue_date,
-                                EXPIRATION_DATE = :expiration_date,
-                                LIC_NOTIFY_NAMES = :lic_notify_names,
-                                UPDATED_AT = SYSDATE
-                            WHERE LIC_ID = :lic_id
-                        """, {
-                            'lic_id': row.get('LIC_ID'),
-                            'lic_name': row.get('LIC_NAME'),
-                            'lic_state': row.get('LIC_STATE'),
-                            'lic_type': row.get('LIC_TYPE'),
-                            'lic_no': row.get('LIC_NO'),
-                            'ascem_no': row.get('ASCEM_NO'),
-                            'first_issue_date': pd.to_datetime(row.get('FIRST_ISSUE_DATE')) if pd.notna(row.get('FIRST_ISSUE_DATE')) else None,
-                            'expiration_date': pd.to_datetime(row.get('EXPIRATION_DATE')) if pd.notna(row.get('EXPIRATION_DATE')) else None,
-                            'lic_notify_names': row.get('LIC_NOTIFY_NAMES')
-                        })
-                        updated += 1
-                    else:
-                        # Insert new record
-                        cursor.execute(f"""
-                            INSERT INTO "{schema}".{table} (
-                                LIC_ID, LIC_NAME, LIC_STATE, LIC_TYPE, LIC_NO,
-                                ASCEM_NO, FIRST_ISSUE_DATE, EXPIRATION_DATE,
-                                LIC_NOTIFY_NAMES, CREATED_AT, UPDATED_AT
-                            ) VALUES (
-                                :lic_id, :lic_name, :lic_state, :lic_type, :lic_no,
-                                :ascem_no, :first_issue_date, :expiration_date,
-                                :lic_notify_names, SYSDATE, SYSDATE
-                            )
-                        """, {
-                            'lic_id': row.get('LIC_ID'),
-                            'lic_name': row.get('LIC_NAME'),
-                            'lic_state': row.get('LIC_STATE'),
-                            'lic_type': row.get('LIC_TYPE'),
-                            'lic_no': row.get('LIC_NO'),
-                            'ascem_no': row.get('ASCEM_NO'),
-                            'first_issue_date': pd.to_datetime(row.get('FIRST_ISSUE_DATE')) if pd.notna(row.get('FIRST_ISSUE_DATE')) else None,
-                            'expiration_date': pd.to_datetime(row.get('EXPIRATION_DATE')) if pd.notna(row.get('EXPIRATION_DATE')) else None,
-                            'lic_notify_names': row.get('LIC_NOTIFY_NAMES')
-                        })
-                        inserted += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error processing row {row.get('LIC_ID')}: {e}")
-                    continue
+            # Compare against the hashes already stored in the database
+            cursor.execute(f'SELECT LIC_ID, ROW_HASH FROM "{schema}".{table}')
+            existing = {normalize_lic_id(lic_id): row_hash for lic_id, row_hash in cursor}
+            
+            diff = diff_license_hashes(
+                {lic_id: record['row_hash'] for lic_id, record in incoming.items()},
+                existing
+            )
+            logger.info(format_sync_report(diff, dry_run=dry_run))
+            
+            if dry_run:
+                cursor.close()
+                connection.close()
+                return True
+            
+            if diff['update']:
+                cursor.executemany(f"""
+                    UPDATE "{schema}".{table}
+                    SET LIC_NAME = :lic_name,
+                        LIC_STATE = :lic_state,
+                        LIC_TYPE = :lic_type,
+                        LIC_NO = :lic_no,
+                        ASCEM_NO = :ascem_no,
+                        FIRST_ISSUE_DATE = :first_issue_date,
+                        EXPIRATION_DATE = :expiration_date,
+                        LIC_NOTIFY_NAMES = :lic_notify_names,
+                        ROW_HASH = :row_hash,
+                        UPDATED_AT = SYSDATE
+                    WHERE LIC_ID = :lic_id
+                """, [incoming[lic_id] for lic_id in diff['update']])
+            
+            if diff['insert']:
+                cursor.executemany(f"""
+                    INSERT INTO "{schema}".{table} (
+                        LIC_ID, LIC_NAME, LIC_STATE, LIC_TYPE, LIC_NO,
+                        ASCEM_NO, FIRST_ISSUE_DATE, EXPIRATION_DATE,
+                        LIC_NOTIFY_NAMES, ROW_HASH, CREATED_AT, UPDATED_AT
+                    ) VALUES (
+                        :lic_id, :lic_name, :lic_state, :lic_type, :lic_no,
+                        :ascem_no, :first_issue_date, :expiration_date,
+                        :lic_notify_names, :row_hash, SYSDATE, SYSDATE
+                    )
+                """, [incoming[lic_id] for lic_id in diff['insert']])
             
             connection.commit()
             cursor.close()
             connection.close()
             
-            logger.info(f"Upload complete: {inserted} inserted, {updated} updated")
+            # Licenses missing from the workbook are reported, never deleted automatically
+            if diff['delete']:
+                logger.warning(f"{len(diff['delete'])} licenses exist in Oracle but not in the workbook")
+            
+            logger.info(f"Upload complete: {len(diff['insert'])} inserted, {len(diff['update'])} updated, "
+                        f"{len(diff['unchanged'])} unchanged")
             return True
             
         except Exception as e:
@@ -269,197 +262,21 @@ class LicenseReminderOracleSystem:
             logger.error(f"Error fetching upcoming expirations: {e}")
             return []
     
-    def send_reminder_email(self, license_data: Dict[str, Any]) -> bool:
-        """Send reminder email for a license"""
-        try:
-            # Parse email addresses
-            email_list = []
-            if license_data.get('lic_notify_names'):
-                emails = str(license_data['lic_notify_names']).split(',')
-                email_list = [email.strip() for email in emails if email.strip()]
-            
-            if not email_list:
-                logger.warning(f"No email addresses for license {license_data.get('id')}")
-                return False
-            
-            # Prepare email content
-            subject = self.get_email_subject(license_data)
-            body = self.get_email_body(license_data)
-            
-            # Send email
-            success = self.send_email(email_list, subject, body)
-            
-            if success:
-                # Record the sent reminder in database
-                self.record_email_reminder(license_data, email_list, subject, body)
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"Error sending reminder email: {e}")
-            return False
-    
-    def get_email_subject(self, license_data: Dict[str, Any]) -> str:
-        """Generate email subject based on reminder type"""
-        days = license_data.get('days_until_expiration', 0)
-        lic_name = license_data.get('lic_name', 'License')
-        lic_type = license_data.get('lic_type', 'License')
-        
-        if days < 0:
-            return f"⚠️ OVERDUE: {lic_name} - {lic_type} has expired"
-        elif days == 1:
-            return f"🚨 URGENT: {lic_name} - {lic_type} expires TOMORROW"
-        elif days <= 7:
-            return f"⚠️ ALERT: {lic_name} - {lic_type} expires in {days} days"
-        elif days <= 15:
-            return f"📅 REMINDER: {lic_name} - {lic_type} expires in {days} days"
-        else:
-            return f"📢 Notice: {lic_name} - {lic_type} expires in {days} days"
-    
-    def get_email_body(self, license_data: Dict[str, Any]) -> str:
-        """Generate email body HTML"""
-        days = license_data.get('days_until_expiration', 0)
-        expiration_date = license_data.get('expiration_date')
-        
-        if isinstance(expiration_date, datetime):
-            exp_date_str = expiration_date.strftime('%B %d, %Y')
-        else:
-            exp_date_str = str(expiration_date)
-        
-        urgency_color = '#dc3545' if days <= 7 else '#ffc107' if days <= 15 else '#17a2b8'
-        
-        html_body = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: {urgency_color}; color: white; padding: 20px; text-align: center; }}
-                .content {{ background-color: #f9f9f9; padding: 20px; margin-top: 20px; }}
-                .license-info {{ background-color: white; padding: 15px; border-left: 4px solid {urgency_color}; margin: 15px 0; }}
-                .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-                .button {{ background-color: {urgency_color}; color: white; padding: 10px 20px; text-decoration: none; display: inline-block; margin: 10px 0; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>License Expiration {"OVERDUE" if days < 0 else "Reminder"}</h1>
-                </div>
-                
-                <div class="content">
-                    <p>Dear License Holder,</p>
-                    
-                    {"<p><strong>⚠️ This license has EXPIRED and requires immediate attention!</strong></p>" if days < 0 else f"<p>This is a reminder that the following license will expire in <strong>{days} day{'s' if days != 1 else ''}</strong>:</p>"}
-                    
-                    <div class="license-info">
-                        <strong>License Holder:</strong> {license_data.get('lic_name', 'N/A')}<br>
-                        <strong>License Type:</strong> {license_data.get('lic_type', 'N/A')}<br>
-                        <strong>State:</strong> {license_data.get('lic_state', 'N/A')}<br>
-                        <strong>License Number:</strong> {license_data.get('lic_no', 'N/A')}<br>
-                        <strong>Expiration Date:</strong> <span style="color: {urgency_color}; font-weight: bold;">{exp_date_str}</span>
-                    </div>
-                    
-                    <p><strong>Action Required:</strong></p>
-                    <ul>
-                        <li>Review the license details above</li>
-                        <li>{"Renew this license IMMEDIATELY" if days < 0 else "Begin the renewal process if not already started"}</li>
-                        <li>Contact the appropriate licensing authority</li>
-                        <li>Update our records once renewed</li>
-                    </ul>
-                    
-                    <p>If you have already renewed this license, please update our records or contact support.</p>
-                </div>
-                
-                <div class="footer">
-                    <p>This is an automated reminder from {self.company_info['name']}<br>
-                    For assistance, contact: {self.company_info['support_email']}<br>
-                    <a href="{self.company_info['website']}">{self.company_info['website']}</a></p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-        
-        return html_body
-    
-    def send_email(self, recipients: List[str], subject: str, body: str) -> bool:
-        """Send email using SMTP"""
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['From'] = f"{self.email_config['from_name']} <{self.email_config['from_email']}>"
-            msg['To'] = ', '.join(recipients)
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(body, 'html'))
-            
-            with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.email_config['username'], self.email_config['password'])
-                server.send_message(msg)
-            
-            logger.info(f"Email sent successfully to {', '.join(recipients)}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to send email: {e}")
-            return False
-    
-    def record_email_reminder(self, license_data: Dict[str, Any], recipients: List[str], 
-                             subject: str, body: str):
-        """Record sent email reminder in Oracle database"""
-        try:
-            connection = self.get_oracle_connection()
-            cursor = connection.cursor()
-            schema = self.oracle_config['schema']
-            
-            cursor.execute(f"""
-                INSERT INTO "{schema}".EMAIL_REMINDERS (
-                    LICENSE_ID, REMINDER_TYPE, EMAIL_TO, 
-                    EMAIL_SUBJECT, EMAIL_BODY, STATUS
-                ) VALUES (
-                    :license_id, :reminder_type, :email_to,
-                    :email_subject, :email_body, :status
-                )
-            """, {
-                'license_id': license_data.get('id'),
-                'reminder_type': license_data.get('reminder_type'),
-                'email_to': ', '.join(recipients),
-                'email_subject': subject,
-                'email_body': body,
-                'status': 'sent'
-            })
-            
-            connection.commit()
-            cursor.close()
-            connection.close()
-            
-            logger.info(f"Reminder recorded for license {license_data.get('id')}")
-            
-        except Exception as e:
-            logger.error(f"Error recording email reminder: {e}")
-    
     def check_and_send_reminders(self):
         """Check for licenses needing reminders and send emails"""
-        logger.info("Starting reminder check...")
-        
         licenses = self.get_licenses_needing_reminders()
         
         if not licenses:
             logger.info("No licenses need reminders today")
             return
         
-        sent_count = 0
-        failed_count = 0
-        
-        for license_data in licenses:
-            if self.send_reminder_email(license_data):
-                sent_count += 1
-            else:
-                failed_count += 1
-        
-        logger.info(f"Reminder check complete: {sent_count} sent, {failed_count} failed")
+        run_reminder_check(
+            self.get_oracle_connection,
+            self.oracle_config['schema'],
+            smtp_config=self.email_config,
+            company_info=self.company_info,
+            licenses=licenses
+        )
     
     def run_scheduler(self):
         """Run the scheduler for daily checks"""
@@ -529,7 +346,7 @@ class LicenseReminderOracleSystem:
 def main():
     """Main entry point"""
     if len(sys.argv) < 2:
-        print("Usage: python license_reminder_oracle.py [upload|check|schedule|stats]")
+        print("Usage: python license_reminder_oracle.py [upload [--dry-run]|check|schedule|stats]")
         sys.exit(1)
     
     command = sys.argv[1].lower()
@@ -538,8 +355,9 @@ def main():
         system = LicenseReminderOracleSystem()
         
         if command == 'upload':
-            print("Uploading Excel data to Oracle...")
-            if system.upload_excel_data():
+            dry_run = '--dry-run' in sys.argv[2:]
+            print("Comparing Excel data with Oracle (dry run)..." if dry_run else "Uploading Excel data to Oracle...")
+            if system.upload_excel_data(dry_run=dry_run):
                 print("✅ Upload successful!")
             else:
                 print("❌ Upload failed. Check logs for details.")
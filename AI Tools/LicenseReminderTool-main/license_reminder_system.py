@@ -17,8 +17,15 @@ from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 from supabase import create_client, Client
 from typing import List, Dict, Optional
+from pathlib import Path
 import logging
 
+# Add utils directory to path for shared import helpers
+sys.path.insert(0, str(Path(__file__).parent / 'utils'))
+from license_sync import normalize_lic_id, compute_row_hash, diff_license_hashes, format_sync_report
+from license_validation import validate_licenses, frame_to_records, log_rejected_rows, parse_email_addresses
+from supabase_bulk import bulk_upsert
+
 # Load environment variables
 load_dotenv()
 
@@ -58,79 +65,47 @@ class LicenseReminderSystem:
         self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
         logger.info("License Reminder System initialized successfully")
 
-    def upload_excel_to_supabase(self) -> bool:
-        """Upload Excel data to Supabase"""
+    def upload_excel_to_supabase(self, dry_run: bool = False) -> bool:
+        """Sync Excel data to Supabase, writing only changed rows"""
         try:
             logger.info(f"Reading Excel file: {self.excel_file_path}")
             df = pd.read_excel(self.excel_file_path)
             
-            # Clean and prepare data
-            df = df.dropna(subset=['LIC_ID'])  # Remove rows without license ID (LIC_ID used for data validation only)
-            
-            # Convert dates to string format for Supabase
-            date_columns = ['FIRST_ISSUE_DATE', 'EXPIRATION_DATE']
-            for col in date_columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-                    df[col] = df[col].dt.strftime('%Y-%m-%d')
-                    df[col] = df[col].replace('NaT', None)
-            
-            # Convert column names to lowercase for database
-            df.columns = df.columns.str.lower()
-            
-            # Handle NaN values more thoroughly
-            # Replace all NaN, inf, -inf with None
-            df = df.replace([float('inf'), float('-inf')], None)
-            df = df.where(pd.notna(df), None)
+            # Validate and clean the workbook (dates become ISO strings for Supabase)
+            clean, rejected = validate_licenses(df)
+            log_rejected_rows(rejected, logger)
+            cleaned_records = frame_to_records(clean, date_format='%Y-%m-%d')
             
-            # Convert DataFrame to list of dictionaries
-            records = df.to_dict('records')
+            # Hash each record so only changed rows are written
+            incoming = {}
+            for record in cleaned_records:
+                record['row_hash'] = compute_row_hash(record)
+                incoming[record['lic_id']] = record
             
-            # Additional cleaning for each record
-            cleaned_records = []
-            for record in records:
-                cleaned_record = {}
-                for key, value in record.items():
-                    # Handle different types of invalid values
-                    if pd.isna(value) or value == 'nan' or str(value).lower() == 'nan':
-                        cleaned_record[key] = None
-                    elif isinstance(value, float) and (value != value):  # Check for NaN
-                        cleaned_record[key] = None
-                    else:
-                        # Special handling for numeric columns
-                        if key in ['lic_id', 'ascem_no'] and value is not None:
-                            try:
-                                # Convert to int if it's a valid number
-                                cleaned_record[key] = int(float(value))
-                            except (ValueError, TypeError):
-                                cleaned_record[key] = None
-                        else:
-                            cleaned_record[key] = value
-                cleaned_records.append(cleaned_record)
+            # Compare against the hashes already stored in Supabase
+            existing_result = self.supabase.table('licenses').select('lic_id, row_hash').execute()
+            existing_hashes = {normalize_lic_id(row['lic_id']): row.get('row_hash') for row in existing_result.data}
             
-            logger.info(f"Uploading {len(cleaned_records)} records to Supabase")
+            diff = diff_license_hashes(
+                {lic_id: record['row_hash'] for lic_id, record in incoming.items()},
+                existing_hashes
+            )
+            logger.info(format_sync_report(diff, dry_run=dry_run))
             
-            # Clear existing data and insert new data
-            # First, get existing records to avoid duplicates
-            existing_result = self.supabase.table('licenses').select('lic_id').execute()
-            existing_lic_ids = {row['lic_id'] for row in existing_result.data}
+            if dry_run:
+                return True
             
-            # Filter out existing records
-            new_records = [record for record in cleaned_records if record['lic_id'] not in existing_lic_ids]
-            
-            if new_records:
-                result = self.supabase.table('licenses').insert(new_records).execute()
-                logger.info(f"Successfully uploaded {len(new_records)} new records")
+            # New and changed rows go out as chunked, concurrent upserts on lic_id
+            changed_records = [incoming[lic_id] for lic_id in diff['insert'] + diff['update']]
+            if changed_records:
+                written = bulk_upsert(self.supabase, 'licenses', changed_records, on_conflict='lic_id')
+                logger.info(f"Upserted {written} records ({len(diff['insert'])} new, {len(diff['update'])} changed)")
             else:
-                logger.info("No new records to upload")
-                
-            # Update existing records if needed
-            existing_records = [record for record in cleaned_records if record['lic_id'] in existing_lic_ids]
-            for record in existing_records:
-                self.supabase.table('licenses').update(record).eq('lic_id', record['lic_id']).execute()
+                logger.info("No new or changed records to upload")
             
-            if existing_records:
-                logger.info(f"Updated {len(existing_records)} existing records")
+            # Licenses missing from the workbook are reported, never deleted automatically
+            if diff['delete']:
+                logger.warning(f"{len(diff['delete'])} licenses exist in Supabase but not in the workbook")
             
             return True
             
@@ -287,14 +262,8 @@ RECOMMENDED ACTIONS:
             return False
 
     def parse_email_addresses(self, email_string: str) -> List[str]:
-        """Parse email addresses from string (comma-separated)"""
-        if not email_string or pd.isna(email_string):
-            return []
-        
-        emails = [email.strip() for email in str(email_string).split(',')]
-        # Basic email validation
-        valid_emails = [email for email in emails if '@' in email and '.' in email]
-        return valid_emails
+        """Parse email addresses from string (comma or semicolon separated)"""
+        return parse_email_addresses(email_string)
 
     def record_reminder_sent(self, license_id: int, reminder_type: str, 
                            email_addresses: List[str], subject: str, body: str, 
@@ -392,6 +361,7 @@ def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python license_reminder_system.py upload    - Upload Excel data to Supabase")
+        print("  python license_reminder_system.py upload --dry-run - Show what an upload would change")
         print("  python license_reminder_system.py check     - Run reminder check once")
         print("  python license_reminder_system.py schedule  - Start daily scheduler")
         return
@@ -402,8 +372,9 @@ def main():
         system = LicenseReminderSystem()
         
         if command == 'upload':
-            logger.info("Uploading Excel data to Supabase...")
-            success = system.upload_excel_to_supabase()
+            dry_run = '--dry-run' in sys.argv[2:]
+            logger.info("Comparing Excel data with Supabase (dry run)..." if dry_run else "Uploading Excel data to Supabase...")
+            success = system.upload_excel_to_supabase(dry_run=dry_run)
             if success:
                 logger.info("Excel data uploaded successfully!")
             else:
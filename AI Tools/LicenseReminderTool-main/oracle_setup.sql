@@ -18,6 +18,33 @@ CREATE TABLE "MSMM DASHBOARD".EMAIL_REMINDERS (
 -- (Uncomment if needed)
 -- ALTER TABLE "MSMM DASHBOARD".LICENSES ADD EMAIL_ENABLED NUMBER(1) DEFAULT 1;
 
+-- Add ROW_HASH column used by the incremental Excel sync to skip unchanged rows
+-- (Uncomment if needed)
+-- ALTER TABLE "MSMM DASHBOARD".LICENSES ADD ROW_HASH VARCHAR2(64);
+
+-- Create license_import_jobs table for background Excel imports from the dashboard
+CREATE TABLE "MSMM DASHBOARD".LICENSE_IMPORT_JOBS (
+    JOB_ID VARCHAR2(32) PRIMARY KEY,
+    FILE_NAME VARCHAR2(255),
+    WORKBOOK BLOB,
+    STATUS VARCHAR2(20) DEFAULT 'pending',
+    TOTAL_ROWS NUMBER DEFAULT 0,
+    PROCESSED_ROWS NUMBER DEFAULT 0,
+    REJECTED_ROWS NUMBER DEFAULT 0,
+    INSERTED_ROWS NUMBER DEFAULT 0,
+    UPDATED_ROWS NUMBER DEFAULT 0,
+    UNCHANGED_ROWS NUMBER DEFAULT 0,
+    ERRORS CLOB,
+    SEEN_KEYS CLOB,
+    CREATED_BY VARCHAR2(100),
+    CREATED_AT DATE DEFAULT SYSDATE,
+    UPDATED_AT DATE DEFAULT SYSDATE
+);
+
+-- Add SEEN_KEYS to an existing LICENSE_IMPORT_JOBS table
+-- (Uncomment if needed)
+-- ALTER TABLE "MSMM DASHBOARD".LICENSE_IMPORT_JOBS ADD SEEN_KEYS CLOB;
+
 -- Create index for better query performance
 CREATE INDEX IDX_EMAIL_REMINDERS_LICENSE_ID ON "MSMM DASHBOARD".EMAIL_REMINDERS(LICENSE_ID);
 CREATE INDEX IDX_EMAIL_REMINDERS_SENT_DATE ON "MSMM DASHBOARD".EMAIL_REMINDERS(SENT_DATE);
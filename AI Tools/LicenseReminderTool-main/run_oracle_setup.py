@@ -94,6 +94,75 @@ def setup_oracle_database():
         else:
             print("✓ EMAIL_ENABLED column already exists")
         
+        # Check if ROW_HASH column exists (content hash used by incremental Excel sync)
+        cursor.execute("""
+            SELECT COUNT(*) FROM ALL_TAB_COLUMNS 
+            WHERE OWNER = 'MSMM DASHBOARD' 
+            AND TABLE_NAME = 'LICENSES' 
+            AND COLUMN_NAME = 'ROW_HASH'
+        """)
+        col_exists = cursor.fetchone()[0]
+        
+        if not col_exists:
+            print("\nAdding ROW_HASH column to LICENSES table...")
+            cursor.execute(f"""
+                ALTER TABLE "{schema}".LICENSES 
+                ADD ROW_HASH VARCHAR2(64)
+            """)
+            connection.commit()
+            print("✓ ROW_HASH column added")
+        else:
+            print("✓ ROW_HASH column already exists")
+        
+        # Check if LICENSE_IMPORT_JOBS table exists (dashboard Excel imports)
+        cursor.execute("""
+            SELECT COUNT(*) FROM ALL_TABLES 
+            WHERE OWNER = 'MSMM DASHBOARD' AND TABLE_NAME = 'LICENSE_IMPORT_JOBS'
+        """)
+        table_exists = cursor.fetchone()[0]
+        
+        if not table_exists:
+            print("\nCreating LICENSE_IMPORT_JOBS table...")
+            cursor.execute(f"""
+                CREATE TABLE "{schema}".LICENSE_IMPORT_JOBS (
+                    JOB_ID VARCHAR2(32) PRIMARY KEY,
+                    FILE_NAME VARCHAR2(255),
+                    WORKBOOK BLOB,
+                    STATUS VARCHAR2(20) DEFAULT 'pending',
+                    TOTAL_ROWS NUMBER DEFAULT 0,
+                    PROCESSED_ROWS NUMBER DEFAULT 0,
+                    REJECTED_ROWS NUMBER DEFAULT 0,
+                    INSERTED_ROWS NUMBER DEFAULT 0,
+                    UPDATED_ROWS NUMBER DEFAULT 0,
+                    UNCHANGED_ROWS NUMBER DEFAULT 0,
+                    ERRORS CLOB,
+                    SEEN_KEYS CLOB,
+                    CREATED_BY VARCHAR2(100),
+                    CREATED_AT DATE DEFAULT SYSDATE,
+                    UPDATED_AT DATE DEFAULT SYSDATE
+                )
+            """)
+            connection.commit()
+            print("✓ LICENSE_IMPORT_JOBS table created")
+        else:
+            print("✓ LICENSE_IMPORT_JOBS table already exists")
+            
+            # Check if SEEN_KEYS column exists (keys synced by earlier chunks, for duplicates)
+            cursor.execute("""
+                SELECT COUNT(*) FROM ALL_TAB_COLUMNS 
+                WHERE OWNER = 'MSMM DASHBOARD' 
+                AND TABLE_NAME = 'LICENSE_IMPORT_JOBS' 
+                AND COLUMN_NAME = 'SEEN_KEYS'
+            """)
+            if not cursor.fetchone()[0]:
+                print("\nAdding SEEN_KEYS column to LICENSE_IMPORT_JOBS table...")
+                cursor.execute(f"""
+                    ALTER TABLE "{schema}".LICENSE_IMPORT_JOBS 
+                    ADD SEEN_KEYS CLOB
+                """)
+                connection.commit()
+                print("✓ SEEN_KEYS column added")
+        
         # Create or replace views
         print("\nCreating/updating views...")
         
@@ -0,0 +1,15 @@
+-- Supabase migration for the Excel sync's upserts
+-- Run once in the Supabase SQL editor after supabase_schema.sql
+
+-- Upserts resolve conflicts on lic_id (on_conflict='lic_id'), which
+-- PostgREST only accepts when the column has a unique constraint.
+-- Duplicate LIC_IDs must be removed first; this lists any that exist:
+--   SELECT lic_id, COUNT(*) FROM licenses GROUP BY lic_id HAVING COUNT(*) > 1;
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'licenses_lic_id_key'
+    ) THEN
+        ALTER TABLE licenses ADD CONSTRAINT licenses_lic_id_key UNIQUE (lic_id);
+    END IF;
+END $$;
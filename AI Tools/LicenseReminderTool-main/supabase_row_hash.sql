@@ -0,0 +1,5 @@
+-- Supabase migration for the incremental Excel sync
+-- Run once in the Supabase SQL editor after supabase_schema.sql
+
+-- Content hash of each license row; the sync skips rows whose hash is unchanged
+ALTER TABLE licenses ADD COLUMN IF NOT EXISTS row_hash VARCHAR(64);
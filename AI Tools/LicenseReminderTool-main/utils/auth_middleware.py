@@ -3,45 +3,39 @@ Authentication middleware for Flask License Reminder Tool
 Verifies session tokens from database-backed sessions
 """
 
-import oracledb
 import os
+import atexit
 from datetime import datetime
 from functools import wraps
-from flask import request, jsonify, redirect, url_for
+from flask import request, jsonify, redirect, url_for, after_this_request
 import logging
+from session_cache import session_cache
+import oracle_pool
+from signed_tokens import is_signed_token, verify_signed_token, create_signed_token
+from session_expiry import SESSION_LIFETIME, needs_extension, extension_queue
 
 logger = logging.getLogger(__name__)
 
 def get_db_connection():
-    """Create and return a database connection"""
+    """Acquire a pooled database connection (close() returns it to the pool)"""
     try:
-        dsn = oracledb.makedsn(
-            os.getenv('ORACLE_HOST'),
-            os.getenv('ORACLE_PORT'),
-            service_name=os.getenv('ORACLE_SERVICE_NAME')
-        )
-
-        # When connecting as SYS, we need to specify SYSDBA mode
-        if os.getenv('ORACLE_USER', '').upper() == 'SYS':
-            connection = oracledb.connect(
-                user=os.getenv('ORACLE_USER'),
-                password=os.getenv('ORACLE_PASSWORD'),
-                dsn=dsn,
-                mode=oracledb.SYSDBA
-            )
-        else:
-            connection = oracledb.connect(
-                user=os.getenv('ORACLE_USER'),
-                password=os.getenv('ORACLE_PASSWORD'),
-                dsn=dsn
-            )
-        return connection
+        return oracle_pool.get_connection()
     except Exception as e:
         logger.error(f"Database connection error: {e}")
         raise
 
 def verify_session(session_token):
-    """Verify session token in database"""
+    """Verify session token, using the in-process cache before the database"""
+    if is_signed_token(session_token):
+        # Signed tokens verify without a USER_SESSIONS lookup
+        return verify_signed_token(
+            session_token, get_db_connection, os.getenv('ORACLE_SCHEMA', 'MSMM DASHBOARD')
+        )
+
+    cached = session_cache.get(session_token)
+    if cached:
+        return cached
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -78,15 +72,48 @@ def verify_session(session_token):
         cursor.close()
         conn.close()
 
-        return {
+        session = {
             'user_id': user_id,
             'username': username,
             'expires_at': expires_at
         }
+        session_cache.put(session_token, session)
+        return session
+    except oracle_pool.PoolExhausted:
+        # Busy, not logged out: the app answers 503 instead of sending the user to login
+        raise
     except Exception as e:
         logger.error(f"Session verification error: {e}")
         return None
 
+def extend_session(session_token, session):
+    """
+    Slide the session expiry once enough of its lifetime has passed
+
+    Opaque sessions are updated in the cache right away and written to
+    USER_SESSIONS in batches; signed tokens are re-issued. Returns the token
+    to set as the cookie, or None when no extension is needed.
+    """
+    if not needs_extension(session['expires_at']):
+        return None
+
+    if is_signed_token(session_token):
+        return create_signed_token(session['user_id'], session['username'], SESSION_LIFETIME)
+
+    expires_at = datetime.now() + SESSION_LIFETIME
+    session_cache.put(session_token, dict(session, expires_at=expires_at))
+    schema = os.getenv('ORACLE_SCHEMA', 'MSMM DASHBOARD')
+    if extension_queue.add(session_token, expires_at):
+        extension_queue.flush(get_db_connection, schema)
+    else:
+        # The cache already holds the new expiry, so this session will not
+        # queue again; a timer writes the partial batch
+        extension_queue.flush_later(get_db_connection, schema)
+    return session_token
+
+# Write any queued extensions before the process exits
+atexit.register(lambda: extension_queue.flush(get_db_connection, os.getenv('ORACLE_SCHEMA', 'MSMM DASHBOARD')))
+
 def require_auth(f):
     """
     Decorator to require authentication for Flask routes
@@ -128,6 +155,21 @@ def require_auth(f):
             'username': session['username']
         }
 
+        # Refresh the cookie when the session was extended
+        refreshed_token = extend_session(session_token, session)
+        if refreshed_token:
+            @after_this_request
+            def refresh_session_cookie(response):
+                response.set_cookie(
+                    'session_token',
+                    refreshed_token,
+                    max_age=int(SESSION_LIFETIME.total_seconds()),
+                    httponly=True,
+                    samesite='Lax',
+                    secure=True
+                )
+                return response
+
         logger.info(f"Authenticated user: {session['username']}")
         return f(*args, **kwargs)
 
@@ -0,0 +1,343 @@
+"""
+Background Excel import jobs for the web dashboard
+Uploaded workbooks are stored in LICENSE_IMPORT_JOBS and synced in
+time-bounded chunks, so each request stays inside the serverless time limit
+"""
+
+import io
+import os
+import json
+import itertools
+import time
+import uuid
+import logging
+
+import oracledb
+import pandas as pd
+
+from license_validation import LICENSE_COLUMNS, validate_licenses, frame_to_records, duplicate_keys
+from license_sync import compute_row_hash, normalize_lic_id
+
+logger = logging.getLogger(__name__)
+
+IMPORT_JOBS_TABLE = 'LICENSE_IMPORT_JOBS'
+IMPORT_CHUNK_ROWS = int(os.getenv('IMPORT_CHUNK_ROWS', '500'))
+IMPORT_TIME_BUDGET = float(os.getenv('IMPORT_TIME_BUDGET_SECONDS', '6'))
+
+# Keep the stored rejection list small enough for the status response
+MAX_STORED_REJECTIONS = 200
+
+JOB_COLUMNS = [
+    'JOB_ID', 'FILE_NAME', 'STATUS', 'TOTAL_ROWS', 'PROCESSED_ROWS', 'REJECTED_ROWS',
+    'INSERTED_ROWS', 'UPDATED_ROWS', 'UNCHANGED_ROWS', 'ERRORS', 'CREATED_BY',
+    'CREATED_AT', 'UPDATED_AT'
+]
+
+
+def count_workbook_rows(workbook_bytes):
+    """Count data rows up to the last non-blank row, without loading the sheet into pandas"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(workbook_bytes), read_only=True, data_only=True)
+    try:
+        last_row = 0
+        for number, row in enumerate(workbook.active.iter_rows(values_only=True)):
+            if any(cell is not None for cell in row):
+                last_row = number
+        return last_row  # the header is row 0
+    finally:
+        workbook.close()
+
+
+def create_import_job(connection, schema, file_name, workbook_bytes, created_by=None):
+    """Store an uploaded workbook as a pending import job and return its id"""
+    job_id = uuid.uuid4().hex
+    total_rows = count_workbook_rows(workbook_bytes)
+
+    cursor = connection.cursor()
+    cursor.setinputsizes(workbook=oracledb.DB_TYPE_BLOB)
+    cursor.execute(f"""
+        INSERT INTO "{schema}".{IMPORT_JOBS_TABLE} (
+            JOB_ID, FILE_NAME, WORKBOOK, STATUS, TOTAL_ROWS, PROCESSED_ROWS,
+            REJECTED_ROWS, INSERTED_ROWS, UPDATED_ROWS, UNCHANGED_ROWS,
+            CREATED_BY, CREATED_AT, UPDATED_AT
+        ) VALUES (
+            :job_id, :file_name, :workbook, :status, :total_rows, 0,
+            0, 0, 0, 0,
+            :created_by, SYSDATE, SYSDATE
+        )
+    """, {
+        'job_id': job_id,
+        'file_name': file_name,
+        'workbook': workbook_bytes,
+        'status': 'pending' if total_rows else 'completed',
+        'total_rows': total_rows,
+        'created_by': created_by
+    })
+    connection.commit()
+    cursor.close()
+
+    logger.info(f"Created import job {job_id} for {file_name} ({total_rows} rows)")
+    return job_id
+
+
+def get_import_job(connection, schema, job_id):
+    """Return an import job as a status dict, or None if it does not exist"""
+    cursor = connection.cursor()
+    cursor.execute(f"""
+        SELECT {', '.join(JOB_COLUMNS)}
+        FROM "{schema}".{IMPORT_JOBS_TABLE}
+        WHERE JOB_ID = :job_id
+    """, {'job_id': job_id})
+    row = cursor.fetchone()
+    cursor.close()
+
+    if not row:
+        return None
+
+    job = dict(zip([column.lower() for column in JOB_COLUMNS], row))
+    errors = job.pop('errors')
+    if hasattr(errors, 'read'):
+        errors = errors.read()
+    job['rejections'] = json.loads(errors) if errors else []
+    job['remaining_rows'] = max(job['total_rows'] - job['processed_rows'], 0)
+    for key in ('created_at', 'updated_at'):
+        if job[key]:
+            job[key] = job[key].isoformat()
+    return job
+
+
+def _lock_job(cursor, schema, job_id):
+    """Lock the job row for this chunk; return None if another request holds it"""
+    try:
+        cursor.execute(f"""
+            SELECT STATUS, WORKBOOK, PROCESSED_ROWS, TOTAL_ROWS, ERRORS, SEEN_KEYS
+            FROM "{schema}".{IMPORT_JOBS_TABLE}
+            WHERE JOB_ID = :job_id
+            FOR UPDATE NOWAIT
+        """, {'job_id': job_id})
+    except oracledb.DatabaseError as e:
+        error, = e.args
+        if error.code == 54:  # ORA-00054: resource busy, another poll is processing
+            return None
+        raise
+    return cursor.fetchone()
+
+
+class _WorkbookReader:
+    """
+    One streaming pass over a stored workbook for a whole poll
+
+    The sheet is opened once in openpyxl's read-only mode and chunks are
+    taken from the same row iterator, so each poll walks the rows once
+    instead of reopening the workbook and skipping to the offset per chunk.
+    """
+
+    def __init__(self, workbook_bytes, offset):
+        from openpyxl import load_workbook
+
+        self._workbook = load_workbook(io.BytesIO(workbook_bytes), read_only=True, data_only=True)
+        sheet = self._workbook.active
+        self._rows = sheet.iter_rows(min_row=offset + 2, values_only=True)
+        header = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        self.columns = [str(name) if name is not None else f'Unnamed: {i}' for i, name in enumerate(header)]
+        self.offset = offset
+
+    def read(self, chunk_rows):
+        """The next chunk_rows data rows, indexed by their offset from the first data row"""
+        width = len(self.columns)
+        rows = [row[:width] for row in itertools.islice(self._rows, chunk_rows)]
+        df = pd.DataFrame(rows, columns=self.columns)
+        df.index = range(self.offset, self.offset + len(df))
+        self.offset += len(df)
+        return df
+
+    def close(self):
+        self._workbook.close()
+
+
+def _reject_seen(clean, rejected, seen):
+    """
+    Reject rows whose keys an earlier chunk already synced
+
+    Validation only sees one chunk, so this applies the CLI's first-wins
+    rule across the whole workbook. Adds this chunk's keys to `seen`.
+    """
+    lic_ids, lic_nos = duplicate_keys(clean)
+    seen_ids = set(seen['lic_id'])
+    seen_nos = set(seen['lic_no'])
+    reasons = pd.Series('', index=clean.index, dtype='string')
+    reasons = reasons.mask(lic_ids.isin(seen_ids).fillna(False), 'duplicate LIC_ID')
+    reasons = reasons.mask(lic_nos.isin(seen_nos).fillna(False),
+                           (reasons + '; duplicate LIC_NO for LIC_STATE').str.lstrip('; '))
+    is_duplicate = reasons != ''
+
+    if is_duplicate.any():
+        duplicates = pd.DataFrame({
+            'ROW_NUMBER': clean.index[is_duplicate] + 2,
+            'REJECT_REASON': reasons[is_duplicate].to_numpy()
+        })
+        rejected = pd.concat([rejected, duplicates], ignore_index=True)
+        clean = clean[~is_duplicate]
+        lic_ids, lic_nos = lic_ids[~is_duplicate], lic_nos[~is_duplicate]
+
+    seen['lic_id'].extend(lic_ids.dropna().tolist())
+    seen['lic_no'].extend(lic_nos.dropna().tolist())
+    return clean, rejected
+
+
+def _sync_chunk(cursor, schema, clean):
+    """Insert or update the changed rows of one validated chunk; return the counts"""
+    incoming = {}
+    for record in frame_to_records(clean[LICENSE_COLUMNS]):
+        record['row_hash'] = compute_row_hash(record)
+        incoming[record['lic_id']] = record
+
+    # Only fetch hashes for the IDs in this chunk
+    existing = {}
+    lic_ids = list(incoming)
+    for start in range(0, len(lic_ids), 1000):  # Oracle IN-list limit
+        batch = lic_ids[start:start + 1000]
+        binds = ', '.join(f':id{i}' for i in range(len(batch)))
+        cursor.execute(
+            f'SELECT LIC_ID, ROW_HASH FROM "{schema}".LICENSES WHERE LIC_ID IN ({binds})',
+            {f'id{i}': lic_id for i, lic_id in enumerate(batch)}
+        )
+        existing.update({normalize_lic_id(lic_id): row_hash for lic_id, row_hash in cursor})
+
+    inserts = [record for lic_id, record in incoming.items() if lic_id not in existing]
+    updates = [record for lic_id, record in incoming.items()
+               if lic_id in existing and existing[lic_id] != record['row_hash']]
+
+    if updates:
+        cursor.executemany(f"""
+            UPDATE "{schema}".LICENSES
+            SET LIC_NAME = :lic_name,
+                LIC_STATE = :lic_state,
+                LIC_TYPE = :lic_type,
+                LIC_NO = :lic_no,
+                ASCEM_NO = :ascem_no,
+                FIRST_ISSUE_DATE = :first_issue_date,
+                EXPIRATION_DATE = :expiration_date,
+                LIC_NOTIFY_NAMES = :lic_notify_names,
+                ROW_HASH = :row_hash,
+                UPDATED_AT = SYSDATE
+            WHERE LIC_ID = :lic_id
+        """, updates)
+
+    if inserts:
+        cursor.executemany(f"""
+            INSERT INTO "{schema}".LICENSES (
+                LIC_ID, LIC_NAME, LIC_STATE, LIC_TYPE, LIC_NO,
+                ASCEM_NO, FIRST_ISSUE_DATE, EXPIRATION_DATE,
+                LIC_NOTIFY_NAMES, ROW_HASH, CREATED_AT, UPDATED_AT
+            ) VALUES (
+                :lic_id, :lic_name, :lic_state, :lic_type, :lic_no,
+                :ascem_no, :first_issue_date, :expiration_date,
+                :lic_notify_names, :row_hash, SYSDATE, SYSDATE
+            )
+        """, inserts)
+
+    return len(inserts), len(updates), len(incoming) - len(inserts) - len(updates)
+
+
+def process_import_job(connection, schema, job_id, time_budget=None, chunk_rows=None):
+    """
+    Advance an import job by as many chunks as fit in the time budget
+
+    Each chunk is validated, synced and recorded in its own transaction, so
+    a request that times out loses at most the chunk in flight. Concurrent
+    polls skip the job while another request holds its row lock. Returns the
+    job status dict.
+    """
+    time_budget = IMPORT_TIME_BUDGET if time_budget is None else time_budget
+    chunk_rows = chunk_rows or IMPORT_CHUNK_ROWS
+    deadline = time.monotonic() + time_budget
+
+    cursor = connection.cursor()
+    reader = None
+    try:
+        while time.monotonic() < deadline:
+            job = _lock_job(cursor, schema, job_id)
+            if job is None:
+                break
+
+            status, workbook, offset, total_rows, errors, seen_keys = job
+            if status not in ('pending', 'running'):
+                connection.rollback()
+                break
+
+            errors = errors.read() if hasattr(errors, 'read') else errors
+            rejections = json.loads(errors) if errors else []
+            seen_keys = seen_keys.read() if hasattr(seen_keys, 'read') else seen_keys
+            seen = json.loads(seen_keys) if seen_keys else {'lic_id': [], 'lic_no': []}
+
+            try:
+                if reader is None or reader.offset != offset:
+                    # First chunk of this poll (or another poll moved the job on)
+                    if reader is not None:
+                        reader.close()
+                    workbook_bytes = workbook.read() if hasattr(workbook, 'read') else workbook
+                    reader = _WorkbookReader(workbook_bytes, offset)
+                chunk = reader.read(chunk_rows)
+                clean, rejected = validate_licenses(chunk.dropna(how='all'))
+                clean, rejected = _reject_seen(clean, rejected, seen)
+                inserted, updated, unchanged = _sync_chunk(cursor, schema, clean) if not clean.empty else (0, 0, 0)
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Import job {job_id} failed at row {offset + 2}: {e}")
+                cursor.setinputsizes(errors=oracledb.DB_TYPE_CLOB)
+                cursor.execute(f"""
+                    UPDATE "{schema}".{IMPORT_JOBS_TABLE}
+                    SET STATUS = 'failed', ERRORS = :errors, UPDATED_AT = SYSDATE
+                    WHERE JOB_ID = :job_id
+                """, {
+                    'errors': json.dumps(rejections + [{'row_number': offset + 2, 'reason': str(e)}]),
+                    'job_id': job_id
+                })
+                connection.commit()
+                break
+
+            for _, row in rejected.iterrows():
+                if len(rejections) >= MAX_STORED_REJECTIONS:
+                    break
+                rejections.append({'row_number': int(row['ROW_NUMBER']), 'reason': row['REJECT_REASON']})
+
+            done = len(chunk) < chunk_rows or offset + len(chunk) >= total_rows
+            cursor.setinputsizes(errors=oracledb.DB_TYPE_CLOB, seen_keys=oracledb.DB_TYPE_CLOB)
+            cursor.execute(f"""
+                UPDATE "{schema}".{IMPORT_JOBS_TABLE}
+                SET STATUS = :status,
+                    PROCESSED_ROWS = PROCESSED_ROWS + :processed,
+                    REJECTED_ROWS = REJECTED_ROWS + :rejected,
+                    INSERTED_ROWS = INSERTED_ROWS + :inserted,
+                    UPDATED_ROWS = UPDATED_ROWS + :updated,
+                    UNCHANGED_ROWS = UNCHANGED_ROWS + :unchanged,
+                    ERRORS = :errors,
+                    SEEN_KEYS = CASE WHEN :status = 'completed' THEN NULL ELSE :seen_keys END,
+                    WORKBOOK = CASE WHEN :status = 'completed' THEN NULL ELSE WORKBOOK END,
+                    UPDATED_AT = SYSDATE
+                WHERE JOB_ID = :job_id
+            """, {
+                'status': 'completed' if done else 'running',
+                'processed': len(chunk),
+                'rejected': len(rejected),
+                'inserted': inserted,
+                'updated': updated,
+                'unchanged': unchanged,
+                'errors': json.dumps(rejections),
+                'seen_keys': json.dumps(seen),
+                'job_id': job_id
+            })
+            connection.commit()
+
+            logger.info(f"Import job {job_id}: rows {offset + 2}-{offset + len(chunk) + 1} synced "
+                        f"({inserted} inserted, {updated} updated, {len(rejected)} rejected)")
+            if done:
+                break
+    finally:
+        if reader is not None:
+            reader.close()
+        cursor.close()
+
+    return get_import_job(connection, schema, job_id)
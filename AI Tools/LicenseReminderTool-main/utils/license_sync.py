@@ -0,0 +1,87 @@
+"""
+Incremental license sync helpers
+Hashes license rows so Excel re-uploads only write rows whose content changed
+"""
+
+import hashlib
+import json
+from datetime import date, datetime
+
+# Columns that make up a license's content hash (LIC_ID is the key, not content)
+SYNC_COLUMNS = [
+    'LIC_NAME', 'LIC_STATE', 'LIC_TYPE', 'LIC_NO', 'ASCEM_NO',
+    'FIRST_ISSUE_DATE', 'EXPIRATION_DATE', 'LIC_NOTIFY_NAMES'
+]
+
+
+def normalize_lic_id(value):
+    """Return LIC_ID as an int (Excel and Oracle may hand back 12.0 or '12')"""
+    if value is None or value != value:  # None or NaN
+        return None
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return None
+
+
+def _normalize_value(value):
+    """Normalize a cell so equal content always hashes the same way"""
+    if value is None or value != value:  # None, NaN and NaT
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _get_column(record, column):
+    """Read a column from an Oracle (upper case) or Supabase (lower case) record"""
+    if column in record:
+        return record[column]
+    return record.get(column.lower())
+
+
+def compute_row_hash(record):
+    """Compute a SHA-256 content hash for one license record"""
+    canonical = [_normalize_value(_get_column(record, column)) for column in SYNC_COLUMNS]
+    payload = json.dumps(canonical, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def diff_license_hashes(incoming, existing):
+    """
+    Compare incoming {lic_id: hash} against hashes stored in the database
+
+    Rows stored before hashing was introduced have a NULL hash and are
+    reported as updates, so the first sync backfills them.
+    """
+    diff = {'insert': [], 'update': [], 'unchanged': [], 'delete': []}
+
+    for lic_id, row_hash in incoming.items():
+        if lic_id not in existing:
+            diff['insert'].append(lic_id)
+        elif existing[lic_id] != row_hash:
+            diff['update'].append(lic_id)
+        else:
+            diff['unchanged'].append(lic_id)
+
+    diff['delete'] = sorted(lic_id for lic_id in existing if lic_id not in incoming)
+    return diff
+
+
+def format_sync_report(diff, dry_run=False):
+    """Build a human readable diff report"""
+    lines = [
+        f"License sync {'dry run' if dry_run else 'report'}:",
+        f"  {len(diff['insert'])} new, {len(diff['update'])} changed, "
+        f"{len(diff['unchanged'])} unchanged, {len(diff['delete'])} missing from workbook"
+    ]
+    for label, key in [('New', 'insert'), ('Changed', 'update'), ('Missing from workbook', 'delete')]:
+        if diff[key]:
+            ids = ', '.join(str(lic_id) for lic_id in sorted(diff[key]))
+            lines.append(f"  {label} LIC_IDs: {ids}")
+    return '\n'.join(lines)
@@ -0,0 +1,171 @@
+"""
+Validation and cleaning stage for license imports
+Shared by the Oracle, Supabase and SQL-generation importers. Every check is
+a pandas column operation, so cost grows with columns rather than cells.
+"""
+
+import re
+
+import pandas as pd
+
+LICENSE_COLUMNS = [
+    'LIC_ID', 'LIC_NAME', 'LIC_STATE', 'LIC_TYPE', 'LIC_NO', 'ASCEM_NO',
+    'FIRST_ISSUE_DATE', 'EXPIRATION_DATE', 'LIC_NOTIFY_NAMES'
+]
+REQUIRED_COLUMNS = ['LIC_ID', 'LIC_NAME']
+DATE_COLUMNS = ['FIRST_ISSUE_DATE', 'EXPIRATION_DATE']
+NUMERIC_ID_COLUMNS = ['LIC_ID', 'ASCEM_NO']
+
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+EMAIL_SEPARATORS = r'[,;]'
+_EMAIL_RE = re.compile(EMAIL_PATTERN)
+_EMAIL_SEPARATORS_RE = re.compile(EMAIL_SEPARATORS)
+
+# Spreadsheet placeholders that mean "no value"
+_EMPTY_MARKERS = ['', 'nan', 'none', 'null', 'nat', 'n/a']
+
+
+def parse_email_addresses(value):
+    """
+    Parse a comma or semicolon separated email string into valid addresses
+
+    Plain Python for the one-license-at-a-time send path; whole columns go
+    through parse_email_series, which applies the same patterns.
+    """
+    if value is None or value != value:  # None or NaN
+        return []
+    addresses = (part.strip() for part in _EMAIL_SEPARATORS_RE.split(str(value)))
+    return [address for address in addresses if _EMAIL_RE.match(address)]
+
+
+def parse_email_series(series):
+    """Parse a column of email strings into lists of valid addresses"""
+    values = series.reset_index(drop=True)
+    exploded = (
+        values.astype('string')
+        .str.split(EMAIL_SEPARATORS)
+        .explode()
+        .str.strip()
+    )
+    valid = exploded[exploded.str.match(EMAIL_PATTERN).fillna(False)]
+    parsed = valid.groupby(level=0).agg(list).reindex(values.index)
+    parsed = parsed.apply(lambda emails: emails if isinstance(emails, list) else [])
+    parsed.index = series.index
+    return parsed
+
+
+def _clean_strings(series):
+    """Strip text and turn spreadsheet placeholders into missing values"""
+    text = series.astype('string').str.strip()
+    return text.mask(text.str.lower().isin(_EMPTY_MARKERS))
+
+
+def validate_licenses(df):
+    """
+    Validate and clean a raw license workbook frame
+
+    Returns (clean, rejected). `clean` has typed license columns plus any
+    extra workbook columns; `rejected` holds the original rows with their
+    workbook row number and a REJECT_REASON column.
+    """
+    raw = df.copy()
+    raw.columns = raw.columns.astype(str).str.strip().str.upper()
+    for column in LICENSE_COLUMNS:
+        if column not in raw.columns:
+            raw[column] = pd.NA
+
+    clean = pd.DataFrame(index=raw.index)
+    for column in raw.columns:
+        if raw[column].dtype == object or pd.api.types.is_string_dtype(raw[column]):
+            clean[column] = _clean_strings(raw[column])
+        else:
+            clean[column] = raw[column]
+
+    problems = []
+
+    for column in REQUIRED_COLUMNS:
+        problems.append((clean[column].isna(), f'missing {column}'))
+
+    # Numeric IDs: non-numeric or fractional values are not valid IDs
+    for column in NUMERIC_ID_COLUMNS:
+        numbers = pd.to_numeric(clean[column], errors='coerce')
+        not_integral = numbers.notna() & (numbers % 1 != 0)
+        invalid = (clean[column].notna() & numbers.isna()) | not_integral
+        problems.append((invalid, f'{column} is not a whole number'))
+        clean[column] = numbers.where(~not_integral).round().astype('Int64')
+
+    for column in DATE_COLUMNS:
+        dates = pd.to_datetime(clean[column], errors='coerce', format='mixed')
+        problems.append((clean[column].notna() & dates.isna(), f'invalid {column}'))
+        clean[column] = dates
+
+    emails = parse_email_series(clean['LIC_NOTIFY_NAMES'])
+    has_emails = emails.str.len() > 0
+    problems.append((clean['LIC_NOTIFY_NAMES'].notna() & ~has_emails,
+                     'LIC_NOTIFY_NAMES has no valid email address'))
+    clean['LIC_NOTIFY_NAMES'] = emails.str.join(', ').where(has_emails)
+
+    def add_reasons(reasons, problems):
+        for mask, reason in problems:
+            mask = mask.reindex(reasons.index).fillna(False).astype(bool)
+            reasons = reasons.mask(mask, reasons + '; ' + reason)
+        return reasons
+
+    reasons = add_reasons(pd.Series('', index=clean.index, dtype='string'), problems)
+
+    # Duplicates: among rows that are otherwise valid, the first occurrence
+    # wins and later ones are rejected (an invalid first row does not take
+    # a valid later one down with it). LIC_NO is only unique within a
+    # state, so it is checked per LIC_STATE.
+    valid = clean[reasons == '']
+    lic_no_key = valid[['LIC_STATE', 'LIC_NO']].astype('string').fillna('')
+    reasons = add_reasons(reasons, [
+        (valid['LIC_ID'].notna() & valid['LIC_ID'].duplicated(keep='first'), 'duplicate LIC_ID'),
+        (valid['LIC_NO'].notna() & lic_no_key.duplicated(keep='first'), 'duplicate LIC_NO for LIC_STATE'),
+    ])
+    reasons = reasons.str.lstrip('; ')
+    is_rejected = reasons != ''
+
+    rejected = raw[is_rejected].copy()
+    rejected.insert(0, 'ROW_NUMBER', rejected.index + 2)  # header row + 1-based rows
+    rejected['REJECT_REASON'] = reasons[is_rejected]
+
+    return clean[~is_rejected], rejected
+
+
+def duplicate_keys(clean):
+    """
+    LIC_ID and LIC_STATE/LIC_NO keys of validated rows, as strings
+
+    Validation only sees one chunk; chunked importers keep these to reject
+    repeats across chunks (LIC_NO is missing where the row has none).
+    """
+    lic_ids = clean['LIC_ID'].astype('string')
+    lic_nos = (clean['LIC_STATE'].astype('string').fillna('') + '|' + clean['LIC_NO'].astype('string').fillna(''))
+    return lic_ids, lic_nos.where(clean['LIC_NO'].notna())
+
+
+def frame_to_records(clean, date_format=None, lowercase=True):
+    """
+    Convert a validated frame to plain dicts with None for missing values
+
+    Dates stay datetime objects for Oracle binds unless `date_format` is
+    given (Supabase expects ISO strings).
+    """
+    frame = clean.copy()
+    if date_format:
+        for column in DATE_COLUMNS:
+            frame[column] = frame[column].dt.strftime(date_format)
+    if lowercase:
+        frame.columns = frame.columns.str.lower()
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict('records')
+
+
+def log_rejected_rows(rejected, logger):
+    """Log a short summary of rejected rows"""
+    if rejected.empty:
+        return
+    logger.warning(f"Rejected {len(rejected)} rows during validation")
+    for _, row in rejected.iterrows():
+        logger.warning(f"  Row {row['ROW_NUMBER']} (LIC_ID {row['LIC_ID']}): {row['REJECT_REASON']}")
@@ -0,0 +1,182 @@
+"""
+Login throttling for the auth API
+Token buckets per client IP and per username, with progressive backoff
+after repeated failures, checked before any database work
+"""
+
+import os
+import math
+import json
+import time
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_BACKEND = os.getenv('LOGIN_THROTTLE_BACKEND', 'memory').lower()
+THROTTLE_DB_PATH = os.getenv('LOGIN_THROTTLE_DB', '/tmp/login_throttle.sqlite3')
+
+# Bucket: BURST attempts at once, refilled at RATE attempts per minute
+THROTTLE_BURST = float(os.getenv('LOGIN_THROTTLE_BURST', '10'))
+THROTTLE_RATE = float(os.getenv('LOGIN_THROTTLE_RATE_PER_MINUTE', '5'))
+
+# Backoff: after FREE_FAILURES consecutive failures, lock out for
+# BACKOFF_BASE * 2^(extra failures) seconds, capped at BACKOFF_MAX
+FREE_FAILURES = int(os.getenv('LOGIN_THROTTLE_FREE_FAILURES', '3'))
+BACKOFF_BASE = float(os.getenv('LOGIN_THROTTLE_BACKOFF_SECONDS', '2'))
+BACKOFF_MAX = float(os.getenv('LOGIN_THROTTLE_BACKOFF_MAX_SECONDS', '900'))
+
+# Idle entries are forgotten after this long
+STATE_TTL = 3600
+MAX_MEMORY_KEYS = 10000
+
+
+def _new_state(now):
+    return {'tokens': THROTTLE_BURST, 'updated_at': now, 'failures': 0, 'blocked_until': 0}
+
+
+class MemoryBackend:
+    """Per-process state; enough for a single instance"""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, fn):
+        """Apply fn(state, now) -> result atomically and store the new state"""
+        with self._lock:
+            now = time.time()
+            state = self._states.get(key) or _new_state(now)
+            result = fn(state, now)
+            self._states[key] = state
+            if len(self._states) > MAX_MEMORY_KEYS:
+                self._prune(now)
+            return result
+
+    def _prune(self, now):
+        for key in [k for k, s in self._states.items() if now - s['updated_at'] > STATE_TTL]:
+            del self._states[key]
+
+
+class SQLiteBackend:
+    """State in a SQLite file shared by every process on the host"""
+
+    def __init__(self, path=THROTTLE_DB_PATH):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS login_throttle (key TEXT PRIMARY KEY, state TEXT, updated_at REAL)'
+            )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def update(self, key, fn):
+        """Apply fn(state, now) -> result inside an IMMEDIATE transaction"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            row = conn.execute('SELECT state FROM login_throttle WHERE key = ?', (key,)).fetchone()
+            state = json.loads(row[0]) if row else _new_state(now)
+            result = fn(state, now)
+            conn.execute(
+                'INSERT OR REPLACE INTO login_throttle (key, state, updated_at) VALUES (?, ?, ?)',
+                (key, json.dumps(state), now)
+            )
+            conn.execute('DELETE FROM login_throttle WHERE updated_at < ?', (now - STATE_TTL,))
+            conn.execute('COMMIT')
+            return result
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+
+def _refill(state, now):
+    refill = (now - state['updated_at']) * THROTTLE_RATE / 60
+    state['tokens'] = min(THROTTLE_BURST, state['tokens'] + refill)
+    state['updated_at'] = now
+
+
+def _consume(state, now):
+    """Take one token; return seconds to wait (0 when allowed)"""
+    if state['blocked_until'] > now:
+        return state['blocked_until'] - now
+
+    _refill(state, now)
+    if state['tokens'] < 1:
+        return (1 - state['tokens']) * 60 / THROTTLE_RATE
+    state['tokens'] -= 1
+    return 0
+
+
+def _fail(state, now):
+    _refill(state, now)
+    state['failures'] += 1
+    extra = state['failures'] - FREE_FAILURES
+    if extra >= 0:
+        state['blocked_until'] = now + min(BACKOFF_BASE * (2 ** extra), BACKOFF_MAX)
+
+
+def _succeed(state, now):
+    _refill(state, now)
+    state['failures'] = 0
+    state['blocked_until'] = 0
+
+
+class LoginThrottle:
+    """Checks and records login attempts for a set of keys (client IP, username)"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _each(self, keys, fn):
+        results = []
+        for key in keys:
+            try:
+                results.append(self.backend.update(key, fn))
+            except Exception as e:
+                # Never lock everyone out because the throttle store is broken
+                logger.error(f"Login throttle error for {key}: {e}")
+                results.append(0)
+        return results
+
+    def check(self, keys):
+        """Consume an attempt for every key; return whole seconds to wait (0 when allowed)"""
+        wait = max(self._each(keys, _consume), default=0)
+        return math.ceil(wait) if wait > 0 else 0
+
+    def record_failure(self, keys):
+        """Count a failed login; past FREE_FAILURES each one doubles the lockout"""
+        self._each(keys, _fail)
+
+    def record_success(self, keys):
+        """Clear the failure count after a successful login"""
+        self._each(keys, _succeed)
+
+
+def throttle_keys(client_ip, username):
+    """Throttle keys for one login attempt"""
+    keys = [f'ip:{client_ip}']
+    if username:
+        keys.append(f'user:{username.strip().lower()}')
+    return keys
+
+
+def _create_throttle():
+    if THROTTLE_BACKEND == 'sqlite':
+        try:
+            return LoginThrottle(SQLiteBackend())
+        except Exception as e:
+            logger.error(f"SQLite login throttle unavailable ({e}); using in-memory throttle")
+    return LoginThrottle(MemoryBackend())
+
+
+login_throttle = _create_throttle()
@@ -0,0 +1,105 @@
+"""
+Shared Oracle connection pool
+Reuses connections across requests in a warm process instead of paying a
+new connect (TCP + TLS + auth) on every call
+"""
+
+import os
+import threading
+import logging
+
+import oracledb
+
+logger = logging.getLogger(__name__)
+
+POOL_MIN = int(os.getenv('ORACLE_POOL_MIN', '0'))
+POOL_MAX = int(os.getenv('ORACLE_POOL_MAX', '4'))
+POOL_INCREMENT = int(os.getenv('ORACLE_POOL_INCREMENT', '1'))
+# How long a request waits for a free pooled connection before failing
+POOL_WAIT_TIMEOUT_MS = int(os.getenv('ORACLE_POOL_WAIT_TIMEOUT_MS', '5000'))
+
+# Wait-timeout errors from acquire() (thin and thick mode)
+POOL_TIMEOUT_CODES = ('DPY-4005', 'ORA-24457')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PoolExhausted(Exception):
+    """No pooled connection became free within ORACLE_POOL_WAIT_TIMEOUT_MS"""
+
+
+def _connect_params():
+    """Connection arguments from the ORACLE_* environment variables"""
+    params = {
+        'user': os.getenv('ORACLE_USER', 'SYS'),
+        'password': os.getenv('ORACLE_PASSWORD'),
+        'dsn': oracledb.makedsn(
+            os.getenv('ORACLE_HOST'),
+            os.getenv('ORACLE_PORT', 1521),
+            service_name=os.getenv('ORACLE_SERVICE_NAME')
+        )
+    }
+    # When connecting as SYS, we need to specify SYSDBA mode
+    if params['user'].upper() == 'SYS':
+        params['mode'] = oracledb.AUTH_MODE_SYSDBA
+    return params
+
+
+def get_pool():
+    """Create the process-wide pool on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = oracledb.create_pool(
+                    min=POOL_MIN,
+                    max=POOL_MAX,
+                    increment=POOL_INCREMENT,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=POOL_WAIT_TIMEOUT_MS,
+                    ping_interval=60,
+                    **_connect_params()
+                )
+                logger.info(f"Created Oracle pool (min={POOL_MIN}, max={POOL_MAX})")
+    return _pool
+
+
+def get_connection():
+    """
+    Acquire a pooled connection; close() returns it to the pool
+
+    Falls back to a standalone connection only if the pool cannot be
+    created. A drained pool raises PoolExhausted after the wait timeout
+    rather than opening connections past ORACLE_POOL_MAX.
+    """
+    try:
+        pool = get_pool()
+    except oracledb.Error as e:
+        logger.warning(f"Oracle pool unavailable ({e}); using a standalone connection")
+        return oracledb.connect(**_connect_params())
+
+    try:
+        return pool.acquire()
+    except oracledb.Error as e:
+        error = e.args[0] if e.args else None
+        if getattr(error, 'full_code', None) in POOL_TIMEOUT_CODES:
+            raise PoolExhausted(f"No Oracle connection free after {POOL_WAIT_TIMEOUT_MS} ms") from e
+        raise
+
+
+def reset_pool(close=True):
+    """
+    Discard the pool so the next call creates a fresh one
+
+    A forked worker should pass close=False: the inherited sockets belong to
+    the parent and must not be used, not even to close them cleanly.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and close:
+            try:
+                _pool.close(force=True)
+            except oracledb.Error as e:
+                logger.warning(f"Error closing Oracle pool: {e}")
+        _pool = None
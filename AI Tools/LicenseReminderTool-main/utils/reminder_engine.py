@@ -0,0 +1,346 @@
+"""
+License reminder engine
+Finds licenses due a reminder, sends the emails over one SMTP session and
+logs them to EMAIL_REMINDERS. No Flask dependency, so the cron function,
+the dashboard and the command-line tool all run the same code.
+"""
+
+import os
+import re
+import smtplib
+import logging
+from datetime import datetime
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+logger = logging.getLogger(__name__)
+
+# Days before expiration that get a reminder, with the window (days) in
+# which an earlier reminder of the same type suppresses a repeat
+REMINDER_SCHEDULE = [
+    (30, '30_days', 7),
+    (15, '15_days', 7),
+    (10, '10_days', 7),
+    (7, '7_days', 7),
+    (1, '1_day', 1),
+]
+# Expired licenses are reminded once per week
+OVERDUE_REPEAT_DAYS = 7
+# Sent emails are logged in batches this size, so a run cut short (timeout,
+# crash) has already recorded what it sent and the next run does not resend
+RECORD_BATCH_SIZE = int(os.getenv('REMINDER_RECORD_BATCH_SIZE', '10'))
+
+
+def load_company_info():
+    """Company details for the email templates"""
+    return {
+        'name': os.getenv('COMPANY_NAME', 'MSMM Engineering'),
+        'website': os.getenv('COMPANY_WEBSITE', 'https://www.msmmeng.com'),
+        'support_email': os.getenv('SUPPORT_EMAIL', 'support@msmmeng.com')
+    }
+
+
+def load_smtp_config():
+    """SMTP settings from the SMTP_* environment variables"""
+    username = os.getenv('SMTP_USERNAME')
+    return {
+        'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+        'smtp_port': int(os.getenv('SMTP_PORT', 587)),
+        'username': username,
+        'password': os.getenv('SMTP_PASSWORD'),
+        'from_email': os.getenv('SENDER_EMAIL', username),
+        'from_name': os.getenv('COMPANY_NAME', 'MSMM Engineering')
+    }
+
+
+def reminder_type_for(days_left):
+    """REMINDER_TYPE logged to EMAIL_REMINDERS for a number of days left"""
+    if days_left < 0:
+        return 'overdue'
+    for days, reminder_type, _ in REMINDER_SCHEDULE:
+        if days_left == days:
+            return reminder_type
+    return 'custom'
+
+
+def get_licenses_needing_reminders(connection, schema):
+    """Licenses with notifications enabled that are due a reminder today"""
+    due = [
+        f"""(TRUNC(l.EXPIRATION_DATE) - TRUNC(SYSDATE) = {days} AND NOT EXISTS (
+                SELECT 1 FROM "{schema}".EMAIL_REMINDERS er
+                WHERE er.LICENSE_ID = l.LIC_ID
+                AND er.REMINDER_TYPE = '{reminder_type}'
+                AND TRUNC(er.SENT_DATE) >= TRUNC(SYSDATE) - {repeat_days}
+            ))"""
+        for days, reminder_type, repeat_days in REMINDER_SCHEDULE
+    ]
+    due.append(
+        f"""(TRUNC(l.EXPIRATION_DATE) < TRUNC(SYSDATE) AND NOT EXISTS (
+                SELECT 1 FROM "{schema}".EMAIL_REMINDERS er
+                WHERE er.LICENSE_ID = l.LIC_ID
+                AND er.REMINDER_TYPE = 'overdue'
+                AND TRUNC(er.SENT_DATE) >= TRUNC(SYSDATE) - {OVERDUE_REPEAT_DAYS}
+            ))"""
+    )
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT
+                l.LIC_ID as id,
+                l.LIC_NAME as lic_name,
+                l.LIC_TYPE as lic_type,
+                l.LIC_STATE as lic_state,
+                l.LIC_NO as lic_no,
+                l.EXPIRATION_DATE as expiration_date,
+                l.LIC_NOTIFY_NAMES as lic_notify_names,
+                TRUNC(l.EXPIRATION_DATE) - TRUNC(SYSDATE) as days_until_expiration
+            FROM "{schema}".LICENSES l
+            WHERE l.EXPIRATION_DATE IS NOT NULL
+            AND l.LIC_NOTIFY_NAMES IS NOT NULL
+            AND NVL(l.EMAIL_ENABLED, 1) = 1
+            AND ({' OR '.join(due)})
+        """)
+        columns = [col[0].lower() for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+    finally:
+        cursor.close()
+
+
+def parse_recipients(notify_names):
+    """Split LIC_NOTIFY_NAMES on commas and semicolons"""
+    return [name.strip() for name in re.split(r'[,;]', notify_names or '') if name.strip()]
+
+
+def _format_date(value):
+    if isinstance(value, datetime):
+        return value.strftime('%B %d, %Y')
+    return value if value else 'N/A'
+
+
+def build_reminder_email(license, company_info):
+    """Return (subject, html_body) for one license"""
+    days_left = int(license.get('days_until_expiration') or 0)
+    lic_name = license.get('lic_name', 'License')
+
+    if days_left < 0:
+        subject = f"⚠️ OVERDUE: {lic_name} - License has EXPIRED"
+        urgency_color = '#dc3545'
+    elif days_left == 1:
+        subject = f"🚨 URGENT: {lic_name} - Expires TOMORROW"
+        urgency_color = '#dc3545'
+    elif days_left <= 7:
+        subject = f"⚠️ ALERT: {lic_name} - Expires in {days_left} days"
+        urgency_color = '#dc3545'
+    elif days_left <= 15:
+        subject = f"📅 REMINDER: {lic_name} - Expires in {days_left} days"
+        urgency_color = '#ffc107'
+    else:
+        subject = f"📢 Notice: {lic_name} - Expires in {days_left} days"
+        urgency_color = '#17a2b8'
+
+    if days_left < 0:
+        intro = "<p><strong>⚠️ This license has EXPIRED and requires immediate attention!</strong></p>"
+    else:
+        plural = 's' if days_left != 1 else ''
+        intro = (f"<p>This is an automated reminder that the following license will expire in "
+                 f"<strong>{days_left} day{plural}</strong>:</p>")
+    first_action = "Renew this license IMMEDIATELY" if days_left <= 0 else "Begin the renewal process if not already started"
+
+    body = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <style>
+                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+                .header {{ background-color: {urgency_color}; color: white; padding: 20px; text-align: center; border-radius: 5px 5px 0 0; }}
+                .content {{ background-color: #f9f9f9; padding: 20px; border: 1px solid #ddd; border-top: none; }}
+                .license-info {{ background-color: white; padding: 15px; border-left: 4px solid {urgency_color}; margin: 15px 0; }}
+                .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>License {"EXPIRED" if days_left < 0 else "Expiration Reminder"}</h1>
+                </div>
+
+                <div class="content">
+                    <p>Dear License Administrator,</p>
+
+                    {intro}
+
+                    <div class="license-info">
+                        <strong>License Holder:</strong> {license.get('lic_name', 'N/A')}<br>
+                        <strong>License Type:</strong> {license.get('lic_type', 'N/A')}<br>
+                        <strong>State:</strong> {license.get('lic_state', 'N/A')}<br>
+                        <strong>License Number:</strong> {license.get('lic_no', 'N/A')}<br>
+                        <strong>Expiration Date:</strong> <span style="color: {urgency_color}; font-weight: bold;">{_format_date(license.get('expiration_date'))}</span>
+                    </div>
+
+                    <p><strong>Action Required:</strong></p>
+                    <ul>
+                        <li>{first_action}</li>
+                        <li>Contact the appropriate licensing authority</li>
+                        <li>Update our records once renewed</li>
+                    </ul>
+
+                    <p>If you have already renewed this license, please update our records or contact support.</p>
+                </div>
+
+                <div class="footer">
+                    <p>This is an automated reminder from {company_info['name']}<br>
+                    For assistance, contact: {company_info['support_email']}<br>
+                    <a href="{company_info['website']}">{company_info['website']}</a></p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+    return subject, body
+
+
+class ReminderMailer:
+    """
+    One SMTP session for a whole reminder run
+
+    Connects on the first send; a dropped session is reopened once before
+    the message counts as failed.
+    """
+
+    def __init__(self, smtp_config):
+        self.config = smtp_config
+        self._server = None
+
+    @property
+    def configured(self):
+        return bool(self.config.get('username') and self.config.get('password'))
+
+    def _connect(self):
+        server = smtplib.SMTP(self.config['smtp_server'], self.config['smtp_port'])
+        server.starttls()
+        server.login(self.config['username'], self.config['password'])
+        return server
+
+    def send(self, recipients, subject, html_body):
+        msg = MIMEMultipart('alternative')
+        msg['From'] = f"{self.config['from_name']} <{self.config['from_email']}>"
+        msg['To'] = ', '.join(recipients)
+        msg['Subject'] = subject
+        msg.attach(MIMEText(html_body, 'html'))
+
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._server = self._connect()
+            self._server.send_message(msg)
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            self._server = None
+
+
+def record_reminders(connection, schema, rows):
+    """Log a batch of emails to EMAIL_REMINDERS with one executemany"""
+    if not rows:
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.executemany(f"""
+            INSERT INTO "{schema}".EMAIL_REMINDERS (
+                LICENSE_ID, REMINDER_TYPE, EMAIL_TO,
+                EMAIL_SUBJECT, EMAIL_BODY, STATUS, SENT_DATE
+            ) VALUES (
+                :license_id, :reminder_type, :email_to,
+                :email_subject, :email_body, :status, SYSDATE
+            )
+        """, rows)
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def run_reminder_check(get_connection=None, schema=None, smtp_config=None, company_info=None, licenses=None):
+    """
+    Send today's reminders; return a summary dict
+
+    get_connection defaults to the shared Oracle pool and schema to
+    ORACLE_SCHEMA. Pass licenses to send for an already selected set instead
+    of running the default query; a 'reminder_type' key on a license is
+    logged as-is.
+    """
+    if get_connection is None:
+        from oracle_pool import get_connection
+    schema = schema or os.getenv('ORACLE_SCHEMA')
+    smtp_config = smtp_config or load_smtp_config()
+    company_info = company_info or load_company_info()
+
+    logger.info("Starting reminder check...")
+    connection = get_connection()
+    try:
+        if licenses is None:
+            licenses = get_licenses_needing_reminders(connection, schema)
+
+        mailer = ReminderMailer(smtp_config)
+        if licenses and not mailer.configured:
+            logger.warning("SMTP not configured; reminders will be logged as failed")
+
+        rows = []
+        sent_count = 0
+
+        def flush():
+            try:
+                record_reminders(connection, schema, rows)
+            except Exception as e:
+                logger.error(f"Failed to log email history: {e}")
+            rows.clear()
+
+        try:
+            for license in licenses:
+                days_left = int(license.get('days_until_expiration') or 0)
+                recipients = parse_recipients(license.get('lic_notify_names')) or [company_info['support_email']]
+                subject, body = build_reminder_email(license, company_info)
+
+                status = 'failed'
+                if mailer.configured:
+                    try:
+                        mailer.send(recipients, subject, body)
+                        status = 'sent'
+                        sent_count += 1
+                        logger.info(f"Email sent for license {license['id']}")
+                    except Exception as e:
+                        logger.error(f"Failed to send email for license {license['id']}: {e}")
+
+                rows.append({
+                    'license_id': license['id'],
+                    'reminder_type': license.get('reminder_type') or reminder_type_for(days_left),
+                    'email_to': ', '.join(recipients),
+                    'email_subject': subject,
+                    'email_body': body,
+                    'status': status
+                })
+                if len(rows) >= RECORD_BATCH_SIZE:
+                    flush()
+        finally:
+            mailer.close()
+            flush()
+    finally:
+        connection.close()
+
+    failed_count = len(licenses) - sent_count
+    logger.info(f"Reminder check complete: {sent_count} sent, {failed_count} failed")
+    return {
+        'success': True,
+        'message': f'Processed {len(licenses)} licenses' if licenses else 'No licenses need reminders',
+        'checked_at': datetime.now().isoformat(),
+        'licenses_checked': len(licenses),
+        'emails_sent': sent_count,
+        'emails_failed': failed_count
+    }
@@ -0,0 +1,82 @@
+"""
+In-process cache of verified session tokens
+Lets require_auth skip the USER_SESSIONS lookup for tokens it verified recently
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+SESSION_CACHE_TTL = float(os.getenv('SESSION_CACHE_TTL_SECONDS', '60'))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '1024'))
+
+
+def hash_token(session_token):
+    """Key entries by token hash so raw tokens are never held in memory"""
+    return hashlib.sha256(session_token.encode('utf-8')).hexdigest()
+
+
+class SessionCache:
+    """
+    Bounded TTL + LRU cache of token hash -> session dict
+
+    An entry lives for the TTL or until the session's own EXPIRES_AT,
+    whichever comes first. The TTL bounds how long a logout in another
+    process (each serverless function has its own cache) can go unnoticed.
+    """
+
+    def __init__(self, max_entries=SESSION_CACHE_MAX_ENTRIES, ttl=SESSION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_token):
+        """Return the cached session for a token, or None on a miss"""
+        key = hash_token(session_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            deadline, session = entry
+            if time.monotonic() >= deadline:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return session
+
+    def put(self, session_token, session):
+        """Cache a verified session until the TTL or its expiry"""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+
+        lifetime = self.ttl
+        expires_at = session.get('expires_at')
+        if isinstance(expires_at, datetime):
+            lifetime = min(lifetime, (expires_at - datetime.now()).total_seconds())
+        if lifetime <= 0:
+            return
+
+        key = hash_token(session_token)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + lifetime, session)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, session_token):
+        """Drop a token, e.g. on logout"""
+        with self._lock:
+            self._entries.pop(hash_token(session_token), None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every app in the process
+session_cache = SessionCache()
@@ -0,0 +1,104 @@
+"""
+Sliding session expiry
+Sessions are extended once a fraction of their lifetime has passed, and the
+EXPIRES_AT updates are queued and written in batches rather than per request.
+A timer writes a partial batch once it has waited the flush interval. On
+serverless hosts, where a frozen instance runs neither timers nor atexit,
+each extension is written straight away.
+"""
+
+import os
+import time
+import threading
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+SESSION_LIFETIME = timedelta(hours=float(os.getenv('SESSION_LIFETIME_HOURS', '24')))
+# Extend once this fraction of the lifetime has elapsed (0.5 = after 12 of 24 hours)
+SESSION_REFRESH_FRACTION = float(os.getenv('SESSION_REFRESH_FRACTION', '0.5'))
+EXTENSION_FLUSH_SECONDS = float(os.getenv('SESSION_EXTENSION_FLUSH_SECONDS', '30'))
+EXTENSION_BATCH_SIZE = int(os.getenv('SESSION_EXTENSION_BATCH_SIZE', '1' if os.getenv('VERCEL') else '50'))
+
+
+def needs_extension(expires_at, now=None):
+    """Return True once less than (1 - fraction) of the lifetime remains"""
+    now = now or datetime.now()
+    return expires_at - now < SESSION_LIFETIME * (1 - SESSION_REFRESH_FRACTION)
+
+
+class ExtensionQueue:
+    """
+    Pending EXPIRES_AT extensions, keyed by session token
+
+    Repeated extensions of one session collapse into a single entry. add()
+    reports when the queue is due for a flush (oldest entry older than the
+    flush interval, or the batch is full); otherwise flush_later() makes
+    sure a partial batch is written once the interval is up.
+    """
+
+    def __init__(self, flush_seconds=EXTENSION_FLUSH_SECONDS, batch_size=EXTENSION_BATCH_SIZE):
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self._pending = {}
+        self._first_queued = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, session_token, expires_at):
+        """Queue an extension; return True if the queue should be flushed now"""
+        with self._lock:
+            self._pending[session_token] = expires_at
+            if self._first_queued is None:
+                self._first_queued = time.monotonic()
+            return (len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._first_queued >= self.flush_seconds)
+
+    def flush_later(self, get_connection, schema):
+        """Arm a timer to flush when the oldest pending entry reaches the flush interval"""
+        with self._lock:
+            if not self._pending or (self._timer is not None and self._timer.is_alive()):
+                return
+            delay = max(0.0, self.flush_seconds - (time.monotonic() - self._first_queued))
+            self._timer = threading.Timer(delay, self.flush, (get_connection, schema))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self, get_connection, schema):
+        """Write every pending extension with one executemany; return the count"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._first_queued = None
+            # Entries queued from here on need a timer of their own
+            self._timer = None
+        if not pending:
+            return 0
+
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.executemany(
+                f'UPDATE "{schema}".USER_SESSIONS SET EXPIRES_AT = :expires_at '
+                f'WHERE SESSION_ID = :token AND EXPIRES_AT < :expires_at',
+                [{'token': token, 'expires_at': expires_at} for token, expires_at in pending.items()]
+            )
+            conn.commit()
+            cursor.close()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Session extension flush error: {e}")
+            # Keep the extensions for the next flush unless newer ones replaced them
+            with self._lock:
+                for token, expires_at in pending.items():
+                    self._pending.setdefault(token, expires_at)
+                if self._first_queued is None:
+                    self._first_queued = time.monotonic()
+            self.flush_later(get_connection, schema)
+            return 0
+
+        logger.info(f"Extended {len(pending)} sessions")
+        return len(pending)
+
+
+extension_queue = ExtensionQueue()
@@ -0,0 +1,194 @@
+"""
+Stateless signed session tokens
+HMAC-SHA256 signed payloads that verify without a database lookup, plus an
+in-memory copy of the REVOKED_SESSIONS table for logouts
+"""
+
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+import logging
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# 'opaque' keeps database-backed USER_SESSIONS tokens; 'signed' issues signed tokens
+SESSION_TOKEN_FORMAT = os.getenv('SESSION_TOKEN_FORMAT', 'opaque').lower()
+REVOCATION_POLL_SECONDS = float(os.getenv('REVOCATION_POLL_SECONDS', '30'))
+
+TOKEN_PREFIX = 'v1.'
+
+# Defaults shipped in the code and config template; anyone could sign with these
+PLACEHOLDER_SECRETS = {'', 'your-secret-key-change-this'}
+
+_missing_secret_logged = False
+
+
+def signed_tokens_enabled():
+    """
+    Return True when logins should issue signed tokens
+
+    Signed mode needs a real FLASK_SECRET_KEY; without one, logins fall
+    back to opaque tokens rather than issue tokens anyone could forge.
+    """
+    global _missing_secret_logged
+    if SESSION_TOKEN_FORMAT != 'signed':
+        return False
+    if _secret() is None:
+        if not _missing_secret_logged:
+            logger.error("SESSION_TOKEN_FORMAT=signed but FLASK_SECRET_KEY is unset or the placeholder; "
+                         "issuing opaque session tokens instead")
+            _missing_secret_logged = True
+        return False
+    return True
+
+
+def is_signed_token(token):
+    """Signed tokens carry a version prefix; opaque session ids never do"""
+    return bool(token) and token.startswith(TOKEN_PREFIX)
+
+
+def _secret():
+    """The signing key, or None when FLASK_SECRET_KEY is unset or still a placeholder"""
+    secret = os.getenv('FLASK_SECRET_KEY', '').strip()
+    if secret in PLACEHOLDER_SECRETS:
+        return None
+    return secret.encode('utf-8')
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(body, secret):
+    return _b64encode(hmac.new(secret, body.encode('ascii'), hashlib.sha256).digest())
+
+
+def create_signed_token(user_id, username, lifetime=timedelta(hours=24)):
+    """Issue a signed token carrying the user id, username and issue/expiry times"""
+    secret = _secret()
+    if secret is None:
+        raise RuntimeError('FLASK_SECRET_KEY must be set to a real secret to issue signed tokens')
+    issued_at = int(time.time())
+    payload = {
+        'jti': secrets.token_urlsafe(12),
+        'uid': user_id,
+        'usr': username,
+        'iat': issued_at,
+        'exp': issued_at + int(lifetime.total_seconds())
+    }
+    body = TOKEN_PREFIX + _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    return f"{body}.{_sign(body, secret)}"
+
+
+def decode_signed_token(token):
+    """Return the payload of a correctly signed, unexpired token, or None"""
+    secret = _secret()
+    if secret is None or not is_signed_token(token):
+        return None
+    body, _, signature = token.rpartition('.')
+    try:
+        if not body or not hmac.compare_digest(signature.encode('utf-8'), _sign(body, secret).encode('ascii')):
+            return None
+        payload = json.loads(_b64decode(body[len(TOKEN_PREFIX):]))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(payload, dict) or payload.get('exp', 0) <= time.time():
+        return None
+    return payload
+
+
+class RevocationList:
+    """
+    In-memory copy of REVOKED_SESSIONS, refreshed at most every poll interval
+
+    Refreshes happen lazily on lookup; if the database is unreachable the
+    last known list is kept.
+    """
+
+    def __init__(self, poll_seconds=REVOCATION_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._revoked = set()
+        self._local = {}  # jti -> exp for logouts in this process, kept across refreshes
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self, get_connection, schema):
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT JTI FROM "{schema}".REVOKED_SESSIONS WHERE EXPIRES_AT > CURRENT_TIMESTAMP'
+            )
+            revoked = {row[0] for row in cursor}
+            cursor.close()
+            conn.close()
+        except Exception as e:
+            logger.error(f"Revocation list refresh error: {e}")
+            revoked = None
+
+        with self._lock:
+            if revoked is not None:
+                self._revoked = revoked
+            now = time.time()
+            self._local = {jti: exp for jti, exp in self._local.items() if exp > now}
+            self._loaded_at = time.monotonic()
+
+    def is_revoked(self, jti, get_connection, schema):
+        """Check a token id, refreshing the list first if it is stale"""
+        with self._lock:
+            stale = self._loaded_at is None or time.monotonic() - self._loaded_at >= self.poll_seconds
+        if stale:
+            self._refresh(get_connection, schema)
+        with self._lock:
+            return jti in self._revoked or jti in self._local
+
+    def add(self, jti, expires_at):
+        """Revoke locally right away, without waiting for the next poll"""
+        with self._lock:
+            self._local[jti] = expires_at
+
+
+revocation_list = RevocationList()
+
+
+def verify_signed_token(token, get_connection, schema):
+    """Verify a signed token and return a session dict like verify_session, or None"""
+    payload = decode_signed_token(token)
+    if not payload or revocation_list.is_revoked(payload['jti'], get_connection, schema):
+        return None
+    return {
+        'user_id': payload['uid'],
+        'username': payload['usr'],
+        'expires_at': datetime.fromtimestamp(payload['exp'])
+    }
+
+
+def revoke_signed_token(token, get_connection, schema):
+    """Record a signed token in REVOKED_SESSIONS until it would have expired"""
+    payload = decode_signed_token(token)
+    if not payload:
+        return False
+
+    revocation_list.add(payload['jti'], payload['exp'])
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f'INSERT INTO "{schema}".REVOKED_SESSIONS (JTI, USERNAME, EXPIRES_AT) VALUES (:jti, :username, :expires_at)',
+        jti=payload['jti'],
+        username=payload['usr'],
+        expires_at=datetime.fromtimestamp(payload['exp'])
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return True
@@ -0,0 +1,107 @@
+"""
+Bulk write helpers for the Supabase importers
+Sends rows as chunked upserts over a bounded worker pool and retries
+rate limits (429) and server errors (5xx) with exponential backoff
+"""
+
+import os
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('SUPABASE_BULK_CHUNK_SIZE', '500'))
+DEFAULT_MAX_WORKERS = int(os.getenv('SUPABASE_BULK_WORKERS', '4'))
+DEFAULT_MAX_RETRIES = int(os.getenv('SUPABASE_BULK_RETRIES', '5'))
+
+
+def chunked(rows, size):
+    """Split a list of rows into lists of at most `size` rows"""
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def _status_code(error):
+    """Best-effort HTTP status for postgrest APIError and httpx errors"""
+    response = getattr(error, 'response', None)
+    for value in (getattr(error, 'code', None), getattr(response, 'status_code', None)):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def is_retryable_error(error):
+    """Return True for rate limits, server errors and transport failures"""
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # httpx transport errors (timeouts, dropped connections) carry no status
+    return any(cls.__name__ in ('TransportError', 'TimeoutException') for cls in type(error).__mro__)
+
+
+def _write_chunk(client, table_name, chunk, on_conflict, max_retries):
+    """Write one chunk, retrying transient failures"""
+    for attempt in range(max_retries + 1):
+        try:
+            query = client.table(table_name)
+            if on_conflict:
+                query.upsert(chunk, on_conflict=on_conflict).execute()
+            else:
+                query.insert(chunk).execute()
+            return len(chunk)
+        except Exception as e:
+            if attempt == max_retries or not is_retryable_error(e):
+                raise
+            delay = min(0.5 * (2 ** attempt), 10) + random.uniform(0, 0.25)
+            logger.warning(f"Supabase write of {len(chunk)} rows failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def bulk_write(client, table_name, rows, on_conflict=None, chunk_size=None,
+               max_workers=None, max_retries=None):
+    """
+    Write rows in concurrent chunks and return the number of rows written
+
+    With `on_conflict` the chunks are upserts on that column, otherwise plain
+    inserts. Raises the first error once every chunk has been attempted.
+    """
+    if not rows:
+        return 0
+
+    chunks = chunked(rows, chunk_size or DEFAULT_CHUNK_SIZE)
+    max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(chunks)))
+
+    written = 0
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_write_chunk, client, table_name, chunk, on_conflict, max_retries)
+            for chunk in chunks
+        ]
+        for future in futures:
+            try:
+                written += future.result()
+            except Exception as e:
+                errors.append(e)
+
+    if errors:
+        logger.error(f"{len(errors)} of {len(chunks)} chunks failed writing to {table_name}")
+        raise errors[0]
+
+    return written
+
+
+def bulk_upsert(client, table_name, rows, on_conflict, **kwargs):
+    """Upsert rows in concurrent chunks, resolving conflicts on `on_conflict`"""
+    return bulk_write(client, table_name, rows, on_conflict=on_conflict, **kwargs)
+
+
+def bulk_insert(client, table_name, rows, **kwargs):
+    """Insert rows in concurrent chunks"""
+    return bulk_write(client, table_name, rows, **kwargs)
@@ -1,75 +1,127 @@
+import io
 import os
-import tempfile
 import json
 import sys
+import threading
 from pathlib import Path
-from flask import Flask, request, render_template, jsonify, send_file
+from flask import Flask, Request, Response, request, render_template, jsonify, send_file
 from werkzeug.utils import secure_filename
-import openai
-from docxtpl import DocxTemplate
-import PyPDF2
-import docx2txt
-from docx import Document
 from dotenv import load_dotenv
 
+# openai, docxtpl, PyPDF2, docx2txt and python-docx are imported inside the
+# functions that use them, so cold starts that only serve / skip loading them
+
 # Add utils directory to path for auth middleware (3 levels up: api -> Projects_Writeup -> AI Tools -> root)
 root_path = Path(__file__).parent.parent.parent.parent
 auth_utils_path = root_path / 'AI Tools' / 'LicenseReminderTool-main' / 'utils'
 if auth_utils_path.exists():
     sys.path.insert(0, str(auth_utils_path))
     from auth_middleware import require_auth
+    from oracle_pool import PoolExhausted
 else:
     # Fallback: no auth if middleware not found
     print(f"[ProjectWriteup] Warning: Auth middleware not found at {auth_utils_path}", file=sys.stderr)
     def require_auth(f):
         return f
+    PoolExhausted = None
+
+# Project Writeup helpers (LLM response and extracted-text caches, extraction pool)
+sys.path.insert(0, str(Path(__file__).parent.parent / 'utils'))
+from llm_cache import llm_cache, cache_key
+from text_cache import text_cache, content_key
+from document_extract import extract_files, extract_bytes
+from passage_select import select_passages
+from document_summary import summary_jobs, SUMMARY_JOBS_ENABLED, create_summary_job, advance_summary_job
+from document_store import document_store, DocumentSetMissing, DOCUMENT_STORE_ENABLED
 
 # Load environment variables
 load_dotenv()
 
+class InMemoryUploadRequest(Request):
+    """
+    Keep uploaded files in memory instead of spooling large ones to a
+    temporary file; MAX_CONTENT_LENGTH bounds how much that can be
+    """
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
 # Create Flask app
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
+app.request_class = InMemoryUploadRequest
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-# Configure OpenAI - client will be initialized per request
+# One OpenAI client per process, so requests reuse its HTTP connection pool;
+# callers get a copy with their own timeout and retry limits
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+def get_openai_client(timeout, max_retries):
+    """Return the shared OpenAI client with per-call timeout and retries"""
+    global _openai_client
+    api_key = os.getenv('OPENAI_API_KEY')
+    if _openai_client is None or _openai_client.api_key != api_key:
+        with _openai_client_lock:
+            if _openai_client is None or _openai_client.api_key != api_key:
+                import openai
+                _openai_client = openai.OpenAI(api_key=api_key)
+    return _openai_client.with_options(timeout=timeout, max_retries=max_retries)
 
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'doc', 'docx'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_file(file_path):
-    """Extract text content from various file types"""
-    text = ""
-    file_extension = file_path.split('.')[-1].lower()
+def extract_text_from_file(file):
+    """Extract text content from an uploaded file object (e.g. from request.files), in memory"""
+    extension = secure_filename(file.filename).split('.')[-1].lower()
+    return extract_bytes(file.stream, extension)
+
+# Bump when document_extract changes so cached text is extracted again
+EXTRACTOR_VERSION = 2
+EXTRACTION_FAILURES = ('Error extracting text from file', 'Could not extract text')
+
+# Only this much document text reaches each prompt (roughly 4 characters
+# per token). Description uploads keep several times that, for passage
+# selection to choose from, and far more when long documents are
+# summarized first. Quote uploads are extracted in full: the fallback
+# text search scans every page, only the OpenAI prompt is cut.
+DESCRIPTION_TEXT_LIMIT = int(os.getenv('DESCRIPTION_TEXT_CHARS', '12000'))
+QUOTES_TEXT_LIMIT = 3000
+DOCUMENTS_CHAR_BUDGET = int(os.getenv(
+    'DOCUMENTS_CHAR_BUDGET', str((40 if SUMMARY_JOBS_ENABLED else 8) * DESCRIPTION_TEXT_LIMIT)
+))
+
+def extract_uploaded_files(files, char_budget=None):
+    """
+    Return [(filename, extraction), ...] for uploads, in upload order
     
-    try:
-        if file_extension == 'pdf':
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-        
-        elif file_extension == 'docx':
-            text = docx2txt.process(file_path)
-        
-        elif file_extension == 'doc':
-            # For .doc files, we'll try to read as text (limited support)
-            try:
-                doc = Document(file_path)
-                for paragraph in doc.paragraphs:
-                    text += paragraph.text + "\n"
-            except:
-                text = "Could not extract text from .doc file. Please use .docx format."
-        
-        elif file_extension == 'txt':
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
-                
-    except Exception as e:
-        text = f"Error extracting text from file: {str(e)}"
+    Each extraction holds the text plus, for PDFs, the offsets of the pages
+    included. With a char_budget, extraction stops once the files so far
+    hold that much text. Complete results are cached by content; the rest
+    is extracted in parallel worker processes.
+    """
+    uploads = []
+    for file in files:
+        filename = secure_filename(file.filename)
+        extension = filename.split('.')[-1].lower()
+        data = file.read()
+        key = content_key(data, extension, EXTRACTOR_VERSION)
+        uploads.append((filename, extension, data, key, text_cache.get(key)))
+    
+    for filename, _, _, _, cached in uploads:
+        if cached is not None:
+            print(f"Using cached text for {filename}")
     
-    return text
+    results = extract_files(
+        [(data, extension) for _, extension, data, _, _ in uploads],
+        char_budget=char_budget,
+        cached=[cached for _, _, _, _, cached in uploads]
+    )
+    
+    for (filename, _, _, key, cached), result in zip(uploads, results):
+        if cached is None and result['complete'] and not result['text'].startswith(EXTRACTION_FAILURES):
+            text_cache.put(key, result)
+    return [(filename, result) for (filename, _, _, _, _), result in zip(uploads, results)]
 
 def extract_quotes_simple_search(documents_text):
     """Simple text-based quote extraction - completely avoids AI and JSON parsing"""
@@ -167,7 +219,12 @@ def extract_quotes_simple_search(documents_text):
         print(f"Error in text-based quote search: {str(e)}")
         return []
 
-def extract_and_generate_quotes(documents_text):
+# Bump when a prompt changes so cached responses to the old prompt are not reused
+QUOTES_PROMPT_VERSION = 1
+QUOTES_MODEL = "gpt-3.5-turbo"  # Faster and more reliable for simple tasks
+QUOTES_SYSTEM_PROMPT = "You extract quotes from business documents. You ONLY return valid JSON arrays. Never include explanations or markdown."
+
+def extract_and_generate_quotes(documents_text, use_cache=True):
     """Extract quotes using OpenAI API with bulletproof JSON parsing"""
     try:
         if not documents_text or len(documents_text.strip()) < 20:
@@ -179,14 +236,6 @@ def extract_and_generate_quotes(documents_text):
             print("No OpenAI API key available")
             return []
         
-        print(f"Using OpenAI for quote extraction from {len(documents_text)} characters")
-        
-        client = openai.OpenAI(
-            api_key=api_key,
-            timeout=20.0,
-            max_retries=0
-        )
-        
         # Simple, clear prompt that should always return valid JSON
         prompt = f"""
 Extract 1-3 professional quotes from this business correspondence.
@@ -194,20 +243,32 @@ Extract 1-3 professional quotes from this business correspondence.
 CRITICAL: Respond with ONLY a JSON array. No explanations, no markdown, no extra text.
 
 Text to analyze:
-{documents_text[:3000]}
+{documents_text[:QUOTES_TEXT_LIMIT]}
 
 Return format (ONLY this JSON, nothing else):
 [{{"quote": "quote text", "author": "name", "title": "title"}}]
 
 If no quotes found, return: []
 """
-
+        messages = [
+            {"role": "system", "content": QUOTES_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        
+        key = cache_key('quotes', model=QUOTES_MODEL, prompt_version=QUOTES_PROMPT_VERSION, messages=messages)
+        if use_cache:
+            cached = llm_cache.get(key)
+            if cached is not None:
+                print(f"Using cached quotes ({len(cached)})")
+                return cached
+        
+        print(f"Using OpenAI for quote extraction from {len(documents_text)} characters")
+        
+        client = get_openai_client(timeout=20.0, max_retries=0)
+        
         response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # Faster and more reliable for simple tasks
-            messages=[
-                {"role": "system", "content": "You extract quotes from business documents. You ONLY return valid JSON arrays. Never include explanations or markdown."},
-                {"role": "user", "content": prompt}
-            ],
+            model=QUOTES_MODEL,
+            messages=messages,
             max_tokens=500,  # Limited tokens for focused response
             temperature=0.1
         )
@@ -260,7 +321,9 @@ If no quotes found, return: []
                     })
             
             print(f"Successfully extracted {len(validated_quotes)} quotes via OpenAI")
-            return validated_quotes[:3]  # Limit to 3 quotes
+            validated_quotes = validated_quotes[:3]  # Limit to 3 quotes
+            llm_cache.put(key, validated_quotes)
+            return validated_quotes
             
         except json.JSONDecodeError as e:
             print(f"JSON parsing failed: {str(e)}")
@@ -271,17 +334,42 @@ If no quotes found, return: []
         print(f"Error in OpenAI quote extraction: {str(e)}")
         return []
 
-def generate_brief_description(documents_text, max_words, num_paragraphs, paragraph_titles, keywords, tense, user_prompt=None, quotes=None):
-    """Generate brief description using OpenAI API"""
-    try:
-        # Prepare the prompt
-        tense_instruction = {
-            'present': 'Write in present tense',
-            'past': 'Write in past tense', 
-            'future': 'Write in future tense'
-        }.get(tense, 'Write in past tense')
-        
-        prompt = f"""
+DESCRIPTION_PROMPT_VERSION = 2
+DESCRIPTION_MODEL = "gpt-4-turbo-preview"
+DESCRIPTION_SYSTEM_PROMPT = "You are a professional business writer who specializes in creating project descriptions for engineering firms. You write clear, detailed, and professional content for business portfolios and client presentations. You always complete the writing tasks as requested."
+
+def description_query(paragraph_titles, keywords, user_prompt=None):
+    """What the writer asked for, to rank document passages against"""
+    parts = []
+    for value in (keywords, paragraph_titles):
+        parts.extend(value if isinstance(value, (list, tuple)) else [value or ''])
+    parts.append(user_prompt or '')
+    return ' '.join(str(part) for part in parts)
+
+def build_description_messages(documents_text, max_words, num_paragraphs, paragraph_titles, keywords, tense, user_prompt=None, quotes=None):
+    """Chat messages asking for one brief description"""
+    # The passages most relevant to the request, rather than the first pages
+    project_text = select_passages(
+        documents_text, description_query(paragraph_titles, keywords, user_prompt), DESCRIPTION_TEXT_LIMIT
+    )
+    
+    # Prepare the prompt
+    tense_instruction = {
+        'present': 'Write in present tense',
+        'past': 'Write in past tense', 
+        'future': 'Write in future tense'
+    }.get(tense, 'Write in past tense')
+    
+    # Built separately: nesting triple-quoted f-strings needs Python 3.12+
+    quotes_section = ""
+    if quotes and len(quotes) > 0 and any(isinstance(q, dict) and q.get("quote") for q in quotes):
+        quote_lines = chr(10).join([f'"{quote.get("quote", "")}" - {quote.get("author", "Unknown")}{", " + quote.get("title", "") if quote.get("title") else ""}' for quote in quotes if isinstance(quote, dict) and quote.get("quote")])
+        quotes_section = f"""
+        CLIENT FEEDBACK AVAILABLE:
+        {quote_lines}
+        """
+    
+    prompt = f"""
         You are writing a professional project description for MSMM Engineering's portfolio. This is a standard business writing task for a civil engineering firm.
         
         TASK: Create a professional project brief description for a civil engineering project.
@@ -300,12 +388,9 @@ def generate_brief_description(documents_text, max_words, num_paragraphs, paragr
         - Describe engineering challenges and solutions
         
         PROJECT INFORMATION TO USE:
-        {documents_text[:12000]}
+        {project_text}
         
-        {f"""
-        CLIENT FEEDBACK AVAILABLE:
-        {chr(10).join([f'"{quote.get("quote", "")}" - {quote.get("author", "Unknown")}{", " + quote.get("title", "") if quote.get("title") else ""}' for quote in quotes if isinstance(quote, dict) and quote.get("quote")])}
-        """ if quotes and len(quotes) > 0 and any(isinstance(q, dict) and q.get("quote") for q in quotes) else ""}
+        {quotes_section}
         
         Please write a comprehensive project description that showcases MSMM Engineering's technical capabilities. This description will be used in project portfolios and client presentations. Focus on the engineering work performed, methodologies used, and value delivered.
         
@@ -313,24 +398,50 @@ def generate_brief_description(documents_text, max_words, num_paragraphs, paragr
         
         Remember: Write approximately {max_words} words as requested. This is a legitimate business writing task for an engineering firm's project portfolio.
         """
+    
+    return [
+        {"role": "system", "content": DESCRIPTION_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def description_cache_key(messages, variant):
+    """Cache key for one version; the variant keeps the versions distinct"""
+    return cache_key(
+        'description', model=DESCRIPTION_MODEL, prompt_version=DESCRIPTION_PROMPT_VERSION,
+        messages=messages, variant=variant
+    )
+
+def generate_brief_description(documents_text, max_words, num_paragraphs, paragraph_titles, keywords, tense, user_prompt=None, quotes=None, variant=1, use_cache=True):
+    """
+    Generate brief description using OpenAI API
+    
+    Successful descriptions are cached per variant; use_cache=False skips
+    the lookup (the new description still replaces the cached one).
+    """
+    try:
+        messages = build_description_messages(
+            documents_text, max_words, num_paragraphs, paragraph_titles,
+            keywords, tense, user_prompt, quotes
+        )
         
-        # Initialize OpenAI client with explicit configuration
+        key = description_cache_key(messages, variant)
+        if use_cache:
+            cached = llm_cache.get(key)
+            if cached:
+                print(f"Using cached description (variant {variant})")
+                return cached
+        
+        # Check the OpenAI API key before building the request
         api_key = os.getenv('OPENAI_API_KEY')
         if not api_key:
             return "Error: OpenAI API key not configured"
         
-        client = openai.OpenAI(
-            api_key=api_key,
-            timeout=45.0,  # Reduced timeout to fit within Vercel's limits
-            max_retries=1   # Reduced retries to avoid timeout
-        )
+        # Reduced timeout and retries to fit within Vercel's limits
+        client = get_openai_client(timeout=45.0, max_retries=1)
         
         response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
-                {"role": "system", "content": "You are a professional business writer who specializes in creating project descriptions for engineering firms. You write clear, detailed, and professional content for business portfolios and client presentations. You always complete the writing tasks as requested."},
-                {"role": "user", "content": prompt}
-            ],
+            model=DESCRIPTION_MODEL,
+            messages=messages,
             max_tokens=4000,
             temperature=0.7
         )
@@ -350,6 +461,7 @@ def generate_brief_description(documents_text, max_words, num_paragraphs, paragr
                 return error_msg
             
             print(f"Description generation successful: {len(content)} characters")
+            llm_cache.put(key, content)
             return content
         else:
             error_msg = "Error: No content generated"
@@ -359,6 +471,132 @@ def generate_brief_description(documents_text, max_words, num_paragraphs, paragr
     except Exception as e:
         return f"Error generating description: {str(e)}"
 
+def stream_brief_description(messages):
+    """
+    Yield a brief description piece by piece as OpenAI generates it
+    
+    Takes the messages from build_description_messages, so versions of one
+    request share a single passage selection.
+    """
+    if not os.getenv('OPENAI_API_KEY'):
+        raise RuntimeError("OpenAI API key not configured")
+    
+    # The timeout applies per read, so a long description can stream past it
+    client = get_openai_client(timeout=45.0, max_retries=1)
+    stream = client.chat.completions.create(
+        model=DESCRIPTION_MODEL,
+        messages=messages,
+        max_tokens=4000,
+        temperature=0.7,
+        stream=True
+    )
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        stream.close()
+
+# Cheap model for the map and reduce steps of document summaries
+SUMMARY_PROMPT_VERSION = 1
+SUMMARY_MODEL = "gpt-3.5-turbo"
+SUMMARY_SYSTEM_PROMPT = "You summarize civil engineering project documents for a writer preparing portfolio descriptions. You keep facts and drop boilerplate."
+SUMMARY_CALL_TIMEOUT = 60.0
+SUMMARY_CALL_RETRIES = 2
+# A step lease outlasts one call's worst case (every attempt timing out, plus backoff)
+SUMMARY_STEP_LEASE = max(
+    float(os.getenv('SUMMARY_STEP_LEASE_SECONDS', '0')),
+    SUMMARY_CALL_TIMEOUT * (SUMMARY_CALL_RETRIES + 1) + 60
+)
+
+def summary_completion(kind, prompt, max_tokens):
+    """One cached summary call to SUMMARY_MODEL"""
+    messages = [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+    key = cache_key(kind, model=SUMMARY_MODEL, prompt_version=SUMMARY_PROMPT_VERSION, messages=messages)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    client = get_openai_client(timeout=SUMMARY_CALL_TIMEOUT, max_retries=SUMMARY_CALL_RETRIES)
+    response = client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=0.2
+    )
+    summary = (response.choices[0].message.content or '').strip()
+    if summary:
+        llm_cache.put(key, summary)
+    return summary
+
+def summarize_chunk(chunk):
+    """Map step: the facts in one part of the documents"""
+    return summary_completion('chunk_summary', f"""
+Summarize this part of a project's documents in at most 300 words.
+Keep the project name, location, owner, dates, quantities, costs, engineering scope, methods, challenges and outcomes.
+Leave out cover pages, tables of contents, legal boilerplate and anything unrelated to the project.
+
+Text:
+{chunk}
+""", max_tokens=500)
+
+def reduce_summaries(summaries):
+    """Reduce step: one summary of the project from the summaries of its parts"""
+    parts = '\n\n'.join(f"Part {number}:\n{summary}" for number, summary in enumerate(summaries, 1))
+    return summary_completion('reduce_summary', f"""
+Combine these summaries of parts of one project's documents into a single summary of the project.
+Merge repeated facts, keep every distinct fact, and keep it under {DESCRIPTION_TEXT_LIMIT // 6} words.
+
+{parts}
+""", max_tokens=min(DESCRIPTION_TEXT_LIMIT // 4, 3000))
+
+def request_documents_text(data):
+    """Document text for a generate request: the finished summary when a summary job is named"""
+    job_id = data.get('summary_job_id')
+    if job_id:
+        try:
+            job = summary_jobs.get(job_id)
+        except Exception as e:
+            print(f"Could not read summary job {job_id}: {str(e)}")
+            job = None
+        if job and job['status'] == 'completed' and job['summary']:
+            return job['summary']
+        print(f"Summary job {job_id} not usable; using the document text")
+    return stored_documents_text(data)
+
+def stored_documents_text(data):
+    """
+    The uploaded text: from the document set when the request names one,
+    else the documents_text it carries
+    
+    Raises DocumentSetMissing when a named set has expired and no text was sent.
+    """
+    set_id = data.get('document_set_id')
+    if set_id and not data.get('documents_text'):
+        return document_store.text(set_id)
+    return data.get('documents_text', '')
+
+@app.errorhandler(DocumentSetMissing)
+def document_set_missing(e):
+    """The browser stores its documents again, or sends the text, and retries once"""
+    return jsonify({
+        'error': 'Uploaded documents have expired; please upload them again',
+        'document_set_missing': True
+    }), 410
+
+def pool_exhausted(e):
+    """Session checks found every pooled connection busy; the client should retry shortly"""
+    print(f"Oracle pool exhausted: {str(e)}")
+    response = jsonify({'error': 'Service busy, please try again in a moment'})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+if PoolExhausted is not None:
+    app.register_error_handler(PoolExhausted, pool_exhausted)
+
 @app.route('/')
 @require_auth
 def index():
@@ -371,30 +609,63 @@ def upload_documents():
     if 'documents' not in request.files:
         return jsonify({'error': 'No files uploaded'}), 400
     
-    files = request.files.getlist('documents')
+    files = [file for file in request.files.getlist('documents')
+             if file and file.filename and allowed_file(file.filename)]
     extracted_texts = []
     
-    for file in files:
-        if file and file.filename and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Use temporary directory for Vercel
-            temp_dir = tempfile.mkdtemp()
-            file_path = os.path.join(temp_dir, filename)
-            file.save(file_path)
-            
-            # Extract text from the file
-            text = extract_text_from_file(file_path)
-            extracted_texts.append({
-                'filename': filename,
-                'text': text,  # Store full text for AI processing
-                'preview': text[:1000] + '...' if len(text) > 1000 else text  # Preview for display
-            })
-            
-            # Clean up the uploaded file
-            os.remove(file_path)
-            os.rmdir(temp_dir)
+    # Extract text from the files (cached by content, in parallel, up to the prompt budget)
+    for filename, result in extract_uploaded_files(files, char_budget=DOCUMENTS_CHAR_BUDGET):
+        text = result['text']
+        extracted_texts.append({
+            'filename': filename,
+            'text': text,  # Store full text for AI processing
+            'preview': text[:1000] + '...' if len(text) > 1000 else text,  # Preview for display
+            'page_offsets': result['page_offsets'],  # [start, end) of each PDF page included
+            'total_pages': result['total_pages'],
+            'complete': result['complete']
+        })
     
-    return jsonify({'extracted_texts': extracted_texts})
+    # Keep the text on the server so generate requests can send its id instead
+    document_set_id = None
+    try:
+        if DOCUMENT_STORE_ENABLED:
+            document_set_id = document_store.add(
+                [(doc['filename'], doc['text']) for doc in extracted_texts],
+                set_id=request.form.get('document_set_id')
+            )
+    except Exception as e:
+        print(f"Could not store uploaded documents: {str(e)}")
+    
+    return jsonify({'extracted_texts': extracted_texts, 'document_set_id': document_set_id})
+
+@app.route('/document_sets', methods=['POST'])
+@require_auth
+def create_document_set():
+    """Store documents the browser already has, e.g. after their set expired"""
+    if not DOCUMENT_STORE_ENABLED:
+        # The browser sends the text with each request instead
+        return jsonify({'error': 'Document store disabled on this host'}), 503
+    data = request.get_json() or {}
+    documents = [(doc.get('filename', ''), doc.get('text', '')) for doc in data.get('documents', [])
+                 if isinstance(doc, dict)]
+    try:
+        document_set_id = document_store.add(documents)
+    except Exception as e:
+        print(f"Could not store documents: {str(e)}")
+        return jsonify({'error': f'Document store unavailable: {str(e)}'}), 503
+    return jsonify({'document_set_id': document_set_id}), 201
+
+@app.route('/document_sets/<document_set_id>')
+@require_auth
+def get_document_set(document_set_id):
+    """Whether a document set is still stored, and the size of each document"""
+    documents = document_store.get(document_set_id)
+    if documents is None:
+        return jsonify({'error': 'Document set not found', 'document_set_missing': True}), 410
+    return jsonify({
+        'document_set_id': document_set_id,
+        'documents': [{'filename': filename, 'characters': len(text)} for filename, text in documents]
+    })
 
 @app.route('/upload_quotes', methods=['POST'])
 @require_auth
@@ -403,27 +674,16 @@ def upload_quotes():
     if 'quote_documents' not in request.files:
         return jsonify({'error': 'No quote files uploaded'}), 400
     
-    files = request.files.getlist('quote_documents')
+    files = [file for file in request.files.getlist('quote_documents')
+             if file and file.filename and allowed_file(file.filename)]
     all_quote_texts = []
     
-    for file in files:
-        if file and file.filename and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Use temporary directory for Vercel
-            temp_dir = tempfile.mkdtemp()
-            file_path = os.path.join(temp_dir, filename)
-            file.save(file_path)
-            
-            # Extract text from the file
-            text = extract_text_from_file(file_path)
-            all_quote_texts.append({
-                'filename': filename,
-                'text': text
-            })
-            
-            # Clean up the uploaded file
-            os.remove(file_path)
-            os.rmdir(temp_dir)
+    # Extract text from the files (cached by content, in parallel)
+    for filename, result in extract_uploaded_files(files):
+        all_quote_texts.append({
+            'filename': filename,
+            'text': result['text']
+        })
     
     # OpenAI-based quote extraction with bulletproof JSON handling
     extracted_quotes = []
@@ -434,7 +694,9 @@ def upload_quotes():
             combined_text = '\n\n'.join([doc['text'] for doc in all_quote_texts])
             if combined_text.strip():
                 # Use OpenAI for intelligent quote extraction
-                extracted_quotes = extract_and_generate_quotes(combined_text)
+                extracted_quotes = extract_and_generate_quotes(
+                    combined_text, use_cache=request.form.get('fresh', '').lower() not in ('1', 'true')
+                )
                 
                 # Fallback to simple text search if OpenAI fails
                 if not extracted_quotes:
@@ -461,27 +723,16 @@ def upload_quotes():
             'processed_files': [doc['filename'] for doc in all_quote_texts]
         })
 
-@app.route('/generate_descriptions', methods=['POST'])
-@require_auth
-def generate_descriptions():
-    """Generate 3 versions of brief description using OpenAI"""
-    data = request.get_json()
-    
-    # Extract parameters
-    documents_text = data.get('documents_text', '')
-    max_words = data.get('max_words', 200)
-    num_paragraphs = data.get('num_paragraphs', 2)
-    paragraph_titles = data.get('paragraph_titles', [])
-    keywords = data.get('keywords', [])
-    tense = data.get('tense', 'past')
-    user_prompt = data.get('user_prompt', None)
-    
-    # Get quotes if provided - ensure it's a valid list (NO AI processing)
-    quotes = data.get('quotes', [])
+def validate_quotes(quotes, selected_quotes=None):
+    """Keep well-formed quotes (optionally only the selected ones), at most 3"""
     if not isinstance(quotes, list):
-        quotes = []
+        return []
+    
+    if selected_quotes:
+        # Filter quotes to only include selected ones
+        selected_quote_texts = set(selected_quotes)
+        quotes = [q for q in quotes if isinstance(q, dict) and q.get('quote') in selected_quote_texts]
     
-    # Validate quotes structure - only use properly formatted quotes
     valid_quotes = []
     try:
         for quote in quotes:
@@ -494,47 +745,226 @@ def generate_descriptions():
                     'author': quote.get('author', 'Client').strip(),
                     'title': quote.get('title', '').strip()
                 })
-        quotes = valid_quotes[:3]  # Limit to 3 quotes
-        print(f"Using {len(quotes)} validated quotes in description generation")
     except Exception as e:
         print(f"Error validating quotes: {str(e)}")
-        quotes = []  # Use empty quotes if validation fails
+        return []
+    return valid_quotes[:3]
+
+# Variants are generated in parallel; whatever is not done by the deadline is
+# reported as failed so the response still fits in the function's maxDuration
+MAX_DESCRIPTION_VERSIONS = 5
+DESCRIPTION_DEADLINE_SECONDS = float(os.getenv('DESCRIPTION_DEADLINE_SECONDS', '55'))
+
+def is_description_error(content):
+    """generate_brief_description reports failures as text rather than raising"""
+    return not content or content.startswith(('Error', 'OpenAI API Error'))
+
+def description_args(data):
+    """generate_brief_description keyword arguments from a request body"""
+    # Get quotes if provided - ensure it's a valid list (NO AI processing)
+    quotes = validate_quotes(data.get('quotes', []), data.get('selected_quotes', []))
+    print(f"Using {len(quotes)} validated quotes in description generation")
+    return {
+        'documents_text': request_documents_text(data),
+        'max_words': data.get('max_words', 200),
+        'num_paragraphs': data.get('num_paragraphs', 2),
+        'paragraph_titles': data.get('paragraph_titles', []),
+        'keywords': data.get('keywords', []),
+        'tense': data.get('tense', 'past'),
+        'user_prompt': data.get('user_prompt', None),
+        'quotes': quotes
+    }
+
+def requested_versions(data):
+    """Number of versions asked for, clamped to 1..MAX_DESCRIPTION_VERSIONS"""
+    try:
+        return min(max(int(data.get('num_responses', 3)), 1), MAX_DESCRIPTION_VERSIONS)
+    except (TypeError, ValueError):
+        return 3
+
+@app.route('/generate_descriptions', methods=['POST'])
+@require_auth
+def generate_descriptions():
+    """Generate several versions of brief description in parallel using OpenAI"""
+    from concurrent.futures import ThreadPoolExecutor, wait
+    
+    data = request.get_json()
+    args = description_args(data)
+    num_versions = requested_versions(data)
+    # "fresh" asks for new text instead of cached versions
+    use_cache = not data.get('fresh', False)
+    
+    # One thread per version: wall time is one OpenAI call instead of one per version
+    executor = ThreadPoolExecutor(max_workers=num_versions)
+    futures = {
+        executor.submit(generate_brief_description, **args, variant=version, use_cache=use_cache): version
+        for version in range(1, num_versions + 1)
+    }
+    done, not_done = wait(futures, timeout=DESCRIPTION_DEADLINE_SECONDS)
+    # Do not block the response on stragglers; their results are dropped
+    executor.shutdown(wait=False, cancel_futures=True)
     
-    # Generate 3 different versions with detailed error tracking
     descriptions = []
-    for i in range(3):
+    failed_versions = []
+    for future, version in sorted(futures.items(), key=lambda item: item[1]):
+        if future in not_done:
+            content = f"Error: Timed out after {DESCRIPTION_DEADLINE_SECONDS:.0f} seconds"
+        elif future.exception():
+            content = f"Error: {str(future.exception())}"
+        else:
+            content = future.result()
+        
+        if is_description_error(content):
+            failed_versions.append(version)
+            print(f"Description version {version} failed: {content[:200] if content else 'no content'}")
+        else:
+            print(f"Successfully generated description version {version}")
+        descriptions.append({
+            'version': version,
+            'content': content
+        })
+    
+    return jsonify({
+        'success': len(failed_versions) < num_versions,
+        'descriptions': descriptions,
+        'failed_versions': failed_versions
+    })
+
+SSE_HEARTBEAT_SECONDS = 10
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/generate_descriptions_stream', methods=['POST'])
+@require_auth
+def generate_descriptions_stream():
+    """
+    Stream several description versions as Server-Sent Events
+    
+    Versions are generated in parallel and their text is interleaved as it
+    arrives: `delta` events carry {version, text}, then each version ends
+    with `done` {version, content} or `error` {version, error}, and the
+    stream closes with `end`.
+    """
+    import time
+    import queue
+    
+    data = request.get_json()
+    args = description_args(data)
+    num_versions = requested_versions(data)
+    use_cache = not data.get('fresh', False)
+    messages = build_description_messages(**args)
+    
+    events = queue.Queue()
+    stop = threading.Event()
+    
+    def produce(version):
+        key = description_cache_key(messages, version)
+        cached = llm_cache.get(key) if use_cache else None
+        if cached:
+            events.put(('delta', {'version': version, 'text': cached}))
+            events.put(('done', {'version': version, 'content': cached}))
+            return
+        
+        parts = []
         try:
-            print(f"Generating description version {i+1}...")
-            description = generate_brief_description(
-                documents_text, max_words, num_paragraphs, 
-                paragraph_titles, keywords, tense, user_prompt, quotes
-            )
-            descriptions.append({
-                'version': i + 1,
-                'content': description
-            })
-            print(f"Successfully generated description version {i+1}")
-        except json.JSONDecodeError as e:
-            error_msg = f"JSON parsing error in description version {i+1}: {str(e)}"
-            print(error_msg)
-            # This shouldn't happen in description generation since we're not parsing JSON
-            # If this occurs, it indicates a bug in the code
-            print(f"UNEXPECTED JSON ERROR in description generation - this suggests a code bug")
-            descriptions.append({
-                'version': i + 1,
-                'content': f"Unexpected JSON parsing error occurred. This may be a system issue."
-            })
+            for text in stream_brief_description(messages):
+                if stop.is_set():
+                    return
+                parts.append(text)
+                events.put(('delta', {'version': version, 'text': text}))
+            content = ''.join(parts).strip()
+            if content:
+                if not is_description_error(content):
+                    llm_cache.put(key, content)
+                events.put(('done', {'version': version, 'content': content}))
+            else:
+                events.put(('error', {'version': version, 'error': 'No content generated'}))
         except Exception as e:
-            error_msg = f"Error generating description version {i+1}: {str(e)}"
-            print(error_msg)
-            descriptions.append({
-                'version': i + 1,
-                'content': f"Error: {str(e)}"
-            })
+            print(f"Streaming description version {version} failed: {str(e)}")
+            events.put(('error', {'version': version, 'error': str(e)}))
     
-    return jsonify({'descriptions': descriptions})
+    def generate():
+        for version in range(1, num_versions + 1):
+            threading.Thread(target=produce, args=(version,), daemon=True).start()
+        
+        finished = set()
+        deadline = time.monotonic() + DESCRIPTION_DEADLINE_SECONDS
+        try:
+            yield sse_event('start', {'versions': num_versions})
+            while len(finished) < num_versions:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    for version in range(1, num_versions + 1):
+                        if version not in finished:
+                            yield sse_event('error', {
+                                'version': version,
+                                'error': f"Timed out after {DESCRIPTION_DEADLINE_SECONDS:.0f} seconds"
+                            })
+                    break
+                try:
+                    event, payload = events.get(timeout=min(SSE_HEARTBEAT_SECONDS, remaining))
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if event in ('done', 'error'):
+                    finished.add(payload['version'])
+                yield sse_event(event, payload)
+            yield sse_event('end', {})
+        finally:
+            # Client went away or deadline passed: stop the producers
+            stop.set()
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 # Single request for one version at a time - helps with timeout issues
+@app.route('/summarize_documents', methods=['POST'])
+@require_auth
+def summarize_documents():
+    """Start a summary of documents too long for the description prompt"""
+    data = request.get_json() or {}
+    documents_text = stored_documents_text(data)
+    if len(documents_text) <= DESCRIPTION_TEXT_LIMIT:
+        return jsonify({'status': 'not_needed'})
+    if not SUMMARY_JOBS_ENABLED:
+        # Job state lives in this host's SQLite file, which serverless instances do not share
+        return jsonify({'status': 'disabled'})
+    
+    try:
+        job_id = create_summary_job(
+            documents_text, summarize_chunk, reduce_summaries, lease_seconds=SUMMARY_STEP_LEASE
+        )
+        job = summary_jobs.get(job_id)
+    except Exception as e:
+        print(f"Could not start summary job: {str(e)}")
+        return jsonify({'error': f'Summaries unavailable: {str(e)}'}), 503
+    
+    print(f"Started summary job {job_id} ({job['total_chunks']} chunks)")
+    return jsonify(job), 202
+
+@app.route('/summarize_documents/<job_id>')
+@require_auth
+def summarize_documents_status(job_id):
+    """
+    Progress of a summary job, with the summary once it is complete
+    
+    Runs the job's next step when no one holds it (no background worker,
+    or the worker died).
+    """
+    try:
+        job = advance_summary_job(job_id, summarize_chunk, reduce_summaries, lease_seconds=SUMMARY_STEP_LEASE)
+    except Exception as e:
+        print(f"Could not advance summary job {job_id}: {str(e)}")
+        return jsonify({'error': f'Summaries unavailable: {str(e)}'}), 503
+    if job is None:
+        return jsonify({'error': 'Summary job not found'}), 404
+    return jsonify(job)
+
 @app.route('/generate_single_description', methods=['POST'])
 @require_auth
 def generate_single_description():
@@ -542,7 +972,7 @@ def generate_single_description():
     data = request.get_json()
     
     # Extract parameters
-    documents_text = data.get('documents_text', '')
+    documents_text = request_documents_text(data)
     max_words = data.get('max_words', 200)
     num_paragraphs = data.get('num_paragraphs', 2)
     paragraph_titles = data.get('paragraph_titles', [])
@@ -551,36 +981,9 @@ def generate_single_description():
     user_prompt = data.get('user_prompt', None)
     version_number = data.get('version_number', 1)
     
-    # Get quotes if provided
-    quotes = data.get('quotes', [])
-    if not isinstance(quotes, list):
-        quotes = []
-    
-    # Get selected quotes - new feature
-    selected_quotes = data.get('selected_quotes', [])
-    if selected_quotes:
-        # Filter quotes to only include selected ones
-        selected_quote_texts = set(selected_quotes)
-        quotes = [q for q in quotes if isinstance(q, dict) and q.get('quote') in selected_quote_texts]
-    
-    # Validate quotes structure
-    valid_quotes = []
-    try:
-        for quote in quotes:
-            if (isinstance(quote, dict) and 
-                isinstance(quote.get('quote'), str) and 
-                isinstance(quote.get('author'), str) and
-                len(quote.get('quote', '').strip()) > 0):
-                valid_quotes.append({
-                    'quote': quote.get('quote', '').strip(),
-                    'author': quote.get('author', 'Client').strip(),
-                    'title': quote.get('title', '').strip()
-                })
-        quotes = valid_quotes[:3]
-        print(f"Using {len(quotes)} validated quotes in single description generation")
-    except Exception as e:
-        print(f"Error validating quotes: {str(e)}")
-        quotes = []
+    # Get quotes if provided, keeping only the selected ones
+    quotes = validate_quotes(data.get('quotes', []), data.get('selected_quotes', []))
+    print(f"Using {len(quotes)} validated quotes in single description generation")
     
     # Generate single version with retry logic
     max_retries = 2
@@ -589,7 +992,8 @@ def generate_single_description():
             print(f"Generating description version {version_number} (attempt {retry + 1})...")
             description = generate_brief_description(
                 documents_text, max_words, num_paragraphs, 
-                paragraph_titles, keywords, tense, user_prompt, quotes
+                paragraph_titles, keywords, tense, user_prompt, quotes,
+                variant=version_number, use_cache=not data.get('fresh', False)
             )
             
             print(f"Successfully generated description version {version_number}")
@@ -629,6 +1033,17 @@ def generate_single_description():
         }
     })
 
+DOCX_TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '..', 'templates', 'jinja_template.docx')
+_docx_template = None
+
+def get_docx_template():
+    """Bytes of the Word template, read from disk once per process"""
+    global _docx_template
+    if _docx_template is None:
+        with open(DOCX_TEMPLATE_PATH, 'rb') as template_file:
+            _docx_template = template_file.read()
+    return _docx_template
+
 @app.route('/generate_document', methods=['POST'])
 @require_auth
 def generate_document():
@@ -636,9 +1051,9 @@ def generate_document():
     try:
         data = request.get_json()
         
-        # Load the template from the correct path
-        template_path = os.path.join(os.path.dirname(__file__), '..', 'templates', 'jinja_template.docx')
-        doc = DocxTemplate(template_path)
+        # Fresh template object per request; render() modifies it in place
+        from docxtpl import DocxTemplate
+        doc = DocxTemplate(io.BytesIO(get_docx_template()))
         
         # Prepare context data for template
         context = {
@@ -657,13 +1072,13 @@ def generate_document():
         # Render the template
         doc.render(context)
         
-        # Save to temporary file
-        temp_dir = tempfile.mkdtemp()
-        output_path = os.path.join(temp_dir, 'project_document.docx')
-        doc.save(output_path)
+        # Render into memory and stream it back; nothing is left on disk
+        output = io.BytesIO()
+        doc.save(output)
+        output.seek(0)
         
         return send_file(
-            output_path, 
+            output, 
             as_attachment=True, 
             download_name='MSMM_Engineering_Project.docx',
             mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
@@ -1,5 +1,5 @@
+import io
 import os
-import tempfile
 from flask import Flask, request, render_template, jsonify, send_file
 from werkzeug.utils import secure_filename
 import openai
@@ -15,10 +15,6 @@ load_dotenv()
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = 'uploads'
-
-# Create uploads directory if it doesn't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Configure OpenAI
 openai.api_key = os.getenv('OPENAI_API_KEY')
@@ -28,33 +24,30 @@ ALLOWED_EXTENSIONS = {'txt', 'pdf', 'doc', 'docx'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_file(file_path):
-    """Extract text content from various file types"""
+def extract_text_from_file(file, file_extension):
+    """Extract text content from an uploaded file object, in memory"""
     text = ""
-    file_extension = file_path.split('.')[-1].lower()
     
     try:
         if file_extension == 'pdf':
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page in pdf_reader.pages:
+                text += page.extract_text() + "\n"
         
         elif file_extension == 'docx':
-            text = docx2txt.process(file_path)
+            text = docx2txt.process(file)
         
         elif file_extension == 'doc':
             # For .doc files, we'll try to read as text (limited support)
             try:
-                doc = Document(file_path)
+                doc = Document(file)
                 for paragraph in doc.paragraphs:
                     text += paragraph.text + "\n"
             except:
                 text = "Could not extract text from .doc file. Please use .docx format."
         
         elif file_extension == 'txt':
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
+            text = file.read().decode('utf-8')
                 
     except Exception as e:
         text = f"Error extracting text from file: {str(e)}"
@@ -127,6 +120,15 @@ def generate_brief_description(documents_text, max_words, num_paragraphs, paragr
             'future': 'Write in future tense'
         }.get(tense, 'Write in past tense')
         
+        # Built separately: nesting triple-quoted f-strings needs Python 3.12+
+        quotes_section = ""
+        if quotes and len(quotes) > 0:
+            quote_lines = chr(10).join([f'"{quote["quote"]}" - {quote["author"]}{", " + quote["title"] if quote.get("title") else ""}' for quote in quotes])
+            quotes_section = f"""
+        CLIENT TESTIMONIALS AND QUOTES:
+        {quote_lines}
+        """
+        
         prompt = f"""
         As a professional technical writer for MSMM Engineering, please create a comprehensive and formal project brief description based on the provided project documents. Maintain a professional, measured tone throughout.
         
@@ -148,10 +150,7 @@ def generate_brief_description(documents_text, max_words, num_paragraphs, paragr
         PROJECT DOCUMENTS AND SPECIFICATIONS:
         {documents_text[:12000]}
         
-        {f"""
-        CLIENT TESTIMONIALS AND QUOTES:
-        {chr(10).join([f'"{quote["quote"]}" - {quote["author"]}{", " + quote["title"] if quote.get("title") else ""}' for quote in quotes])}
-        """ if quotes and len(quotes) > 0 else ""}
+        {quotes_section}
         
         Based on the above project documentation{" and client testimonials" if quotes and len(quotes) > 0 else ""}, please develop a professional brief description that appropriately represents MSMM Engineering's technical capabilities and project contributions. The description should be suitable for client presentations, project portfolios, and professional documentation. Focus on the engineering methodologies employed, technical challenges addressed, and the value delivered to the client.
         
@@ -196,19 +195,14 @@ def upload_documents():
     for file in files:
         if file and file.filename and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
             
-            # Extract text from the file
-            text = extract_text_from_file(file_path)
+            # Extract text straight from the upload stream
+            text = extract_text_from_file(io.BytesIO(file.read()), filename.split('.')[-1].lower())
             extracted_texts.append({
                 'filename': filename,
                 'text': text,  # Store full text for AI processing
                 'preview': text[:1000] + '...' if len(text) > 1000 else text  # Preview for display
             })
-            
-            # Clean up the uploaded file
-            os.remove(file_path)
     
     return jsonify({'extracted_texts': extracted_texts})
 
@@ -224,18 +218,13 @@ def upload_quotes():
     for file in files:
         if file and file.filename and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
             
-            # Extract text from the file
-            text = extract_text_from_file(file_path)
+            # Extract text straight from the upload stream
+            text = extract_text_from_file(io.BytesIO(file.read()), filename.split('.')[-1].lower())
             all_quote_texts.append({
                 'filename': filename,
                 'text': text
             })
-            
-            # Clean up the uploaded file
-            os.remove(file_path)
     
     # Combine all quote texts and extract quotes
     combined_text = '\n\n'.join([doc['text'] for doc in all_quote_texts])
@@ -355,13 +344,13 @@ def generate_document():
         # Render the template
         doc.render(context)
         
-        # Save to temporary file
-        temp_dir = tempfile.mkdtemp()
-        output_path = os.path.join(temp_dir, 'project_document.docx')
-        doc.save(output_path)
+        # Render into memory and send it back
+        output = io.BytesIO()
+        doc.save(output)
+        output.seek(0)
         
         return send_file(
-            output_path, 
+            output, 
             as_attachment=True, 
             download_name='MSMM_Engineering_Project.docx',
             mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
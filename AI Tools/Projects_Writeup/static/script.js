@@ -3,6 +3,8 @@ let extractedTexts = [];
 let selectedDescription = '';
 let extractedQuotes = [];
 let currentFormData = {};
+// Id of the server-side copy of extractedTexts, sent instead of the text
+let documentSetId = null;
 
 document.addEventListener('DOMContentLoaded', function() {
     // File upload functionality
@@ -136,6 +138,9 @@ document.addEventListener('DOMContentLoaded', function() {
     async function uploadFiles(formData) {
         try {
             showLoading(true);
+            if (documentSetId) {
+                formData.append('document_set_id', documentSetId);
+            }
 
             const response = await fetch('/project-writeup/upload_documents', {
                 method: 'POST',
@@ -146,6 +151,13 @@ document.addEventListener('DOMContentLoaded', function() {
             const result = await response.json();
 
             if (response.ok) {
+                // The returned set holds every file only if it is the one we
+                // sent, or nothing was uploaded before. Otherwise (our set
+                // expired, or we had none) it lacks the earlier files; forget
+                // it and store everything again when generating.
+                const holdsAllFiles = extractedTexts.length === 0
+                    || (documentSetId && result.document_set_id === documentSetId);
+                documentSetId = holdsAllFiles ? result.document_set_id || null : null;
                 extractedTexts = extractedTexts.concat(result.extracted_texts);
                 displayUploadedFiles(result.extracted_texts);
                 showAlert('Files uploaded and processed successfully!', 'success');
@@ -159,12 +171,26 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Which part of a file made it into the text sent for descriptions
+    function describeIncludedText(file) {
+        if (file.complete !== false) {
+            return '';
+        }
+        const pages = file.page_offsets ? file.page_offsets.length : 0;
+        if (!pages) {
+            return 'Not included: the text limit was reached by earlier files';
+        }
+        return `Pages 1-${pages} of ${file.total_pages} included (text limit reached)`;
+    }
+
     function displayUploadedFiles(files) {
         files.forEach(file => {
             const fileDiv = document.createElement('div');
             fileDiv.className = 'file-item';
+            const included = describeIncludedText(file);
             fileDiv.innerHTML = `
                 <div class="file-name"><i class="fas fa-file-alt"></i> ${file.filename}</div>
+                ${included ? `<div class="file-preview"><em>${included}</em></div>` : ''}
                 <div class="file-preview">${file.preview || file.text}</div>
             `;
             uploadedFilesDiv.appendChild(fileDiv);
@@ -251,7 +277,6 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        const documentsText = extractedTexts.map(doc => doc.text).join('\n\n');
         const maxWords = parseInt(document.getElementById('max_words').value);
         const numParagraphs = parseInt(document.getElementById('num_paragraphs').value);
         const paragraphTitles = document.getElementById('paragraph_titles').value
@@ -267,7 +292,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
         // Save current form data for regeneration
         currentFormData = {
-            documents_text: documentsText,
+            ...await documentsPayload(),
             max_words: maxWords,
             num_paragraphs: numParagraphs,
             paragraph_titles: paragraphTitles,
@@ -279,42 +304,14 @@ document.addEventListener('DOMContentLoaded', function() {
         };
 
         try {
-            showLoading(true, `Generating descriptions using AI (0/${numResponses})...`);
-            
-            // Generate descriptions one by one to avoid timeout
-            const descriptions = [];
-            
-            for (let i = 0; i < numResponses; i++) {
-                showLoading(true, `Generating description ${i + 1} of ${numResponses}...`);
-                
-                const requestData = {
-                    ...currentFormData,
-                    version_number: i + 1
-                };
-                
-                const response = await fetch('/project-writeup/generate_single_description', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify(requestData),
-                    credentials: 'include',
-                    signal: AbortSignal.timeout(55000) // 55 second timeout
-                });
-
-                const result = await response.json();
-                
-                if (response.ok && result.success) {
-                    descriptions.push(result.description);
-                } else {
-                    // Add error description but continue with others
-                    descriptions.push({
-                        version: i + 1,
-                        content: result.error || 'Error generating this version'
-                    });
-                }
+            // Documents too long for one prompt are summarized first
+            const summaryJobId = await summarizeDocuments(currentFormData);
+            if (summaryJobId) {
+                currentFormData.summary_job_id = summaryJobId;
             }
 
+            const descriptions = await requestDescriptions(currentFormData, numResponses, 'Generating');
+
             displayDescriptionVersions(descriptions);
             showAlert('AI descriptions generated successfully!', 'success');
             
@@ -329,6 +326,254 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Make sure the server still holds the uploaded text, storing it again if
+    // its set expired; returns the set id, or null if the store is unavailable
+    async function ensureDocumentSet() {
+        try {
+            if (documentSetId) {
+                const check = await fetch(`/project-writeup/document_sets/${documentSetId}`, {
+                    credentials: 'include'
+                });
+                if (check.ok) {
+                    return documentSetId;
+                }
+            }
+            const response = await fetch('/project-writeup/document_sets', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    documents: extractedTexts.map(doc => ({ filename: doc.filename, text: doc.text }))
+                }),
+                credentials: 'include'
+            });
+            const result = await response.json();
+            documentSetId = response.ok ? result.document_set_id : null;
+        } catch (error) {
+            console.warn('Document store unavailable; sending the text:', error);
+            documentSetId = null;
+        }
+        return documentSetId;
+    }
+
+    // The documents part of a request: the set id, or the text itself
+    async function documentsPayload() {
+        const setId = await ensureDocumentSet();
+        if (setId) {
+            return { document_set_id: setId };
+        }
+        return { documents_text: extractedTexts.map(doc => doc.text).join('\n\n') };
+    }
+
+    // POST formData (plus extra fields) as JSON. A 410 means the named
+    // document set is gone where the request landed (it expired, or another
+    // serverless instance answered): store the documents again, or fall back
+    // to the text, update formData, and retry once.
+    async function postWithDocuments(url, formData, extra = {}, timeoutMs = null) {
+        const send = () => fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ ...formData, ...extra }),
+            credentials: 'include',
+            signal: timeoutMs ? AbortSignal.timeout(timeoutMs) : undefined
+        });
+        const response = await send();
+        if (response.status !== 410 || !formData.document_set_id) {
+            return response;
+        }
+        documentSetId = null;
+        delete formData.document_set_id;
+        delete formData.documents_text;
+        Object.assign(formData, await documentsPayload());
+        return send();
+    }
+
+    // Start a summary of long documents and poll it until done; each poll
+    // runs the job's next step on the server. Returns the job id to send with
+    // generate requests, or null to send the documents as they are (short
+    // documents, summaries disabled, or the summary failed).
+    async function summarizeDocuments(documents) {
+        try {
+            showLoading(true, 'Summarizing documents...');
+            const response = await postWithDocuments('/project-writeup/summarize_documents', documents);
+            let job = await response.json();
+            if (!response.ok || !job.job_id) {
+                return null;
+            }
+
+            const deadline = Date.now() + 5 * 60 * 1000;
+            while (job.status === 'running' && Date.now() < deadline) {
+                showLoading(true, job.stage === 'map'
+                    ? `Summarizing documents (${job.done_chunks} of ${job.total_chunks} parts)...`
+                    : 'Combining document summaries...');
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                const poll = await fetch(`/project-writeup/summarize_documents/${job.job_id}`, {
+                    credentials: 'include'
+                });
+                if (!poll.ok) {
+                    return null;
+                }
+                job = await poll.json();
+            }
+            return job.status === 'completed' ? job.job_id : null;
+        } catch (error) {
+            console.warn('Document summary failed; sending the full text:', error);
+            return null;
+        }
+    }
+
+    // Stream every version as it is written (Server-Sent Events over a POST),
+    // showing the text in the version boxes as it arrives
+    async function streamDescriptions(formData, numResponses, progressLabel) {
+        showLoading(true, `${progressLabel} ${numResponses} descriptions using AI...`);
+        const response = await postWithDocuments(
+            '/project-writeup/generate_descriptions_stream', formData, { num_responses: numResponses }, 60000
+        );
+
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!response.ok || !response.body || !contentType.includes('text/event-stream')) {
+            throw new Error(`Streaming unavailable (HTTP ${response.status})`);
+        }
+
+        const descriptions = [];
+        for (let i = 0; i < numResponses; i++) {
+            descriptions.push({ version: i + 1, content: '' });
+        }
+        const finished = new Set();
+        let started = false;
+
+        const handleEvent = (event, payload) => {
+            if (event === 'start') {
+                started = true;
+                displayDescriptionVersions(descriptions);
+                showLoading(false);
+                return;
+            }
+            const index = payload.version - 1;
+            const textarea = document.getElementById(`version-${index}`);
+            if (!descriptions[index]) {
+                return;
+            }
+            if (event === 'delta') {
+                descriptions[index].content += payload.text;
+            } else if (event === 'done') {
+                descriptions[index].content = payload.content;
+                finished.add(payload.version);
+            } else if (event === 'error') {
+                descriptions[index].content = `Error: ${payload.error}`;
+                finished.add(payload.version);
+            }
+            if (textarea) {
+                textarea.value = descriptions[index].content;
+            }
+        };
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        try {
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, { stream: true });
+
+                // Events are separated by a blank line; lines starting with ':' are keep-alives
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const block = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let event = 'message';
+                    let data = '';
+                    block.split('\n').forEach(line => {
+                        if (line.startsWith('event:')) {
+                            event = line.slice(6).trim();
+                        } else if (line.startsWith('data:')) {
+                            data += line.slice(5).trim();
+                        }
+                    });
+                    if (data) {
+                        handleEvent(event, JSON.parse(data));
+                    }
+                }
+            }
+        } catch (error) {
+            // Nothing shown yet: let the caller fall back to the non-streaming endpoints
+            if (!started) {
+                throw error;
+            }
+            console.warn('Description stream interrupted:', error);
+        }
+
+        if (!started) {
+            throw new Error('Description stream ended before it started');
+        }
+        descriptions.forEach(desc => {
+            if (!finished.has(desc.version)) {
+                desc.content = desc.content || 'Error: Generation was interrupted';
+            }
+        });
+        return descriptions;
+    }
+
+    // Stream the versions if possible; otherwise ask for every version in one
+    // request (generated in parallel on the server), and failing that, one
+    // request per version
+    async function requestDescriptions(formData, numResponses, progressLabel) {
+        if (window.ReadableStream && window.TextDecoder) {
+            try {
+                return await streamDescriptions(formData, numResponses, progressLabel);
+            } catch (error) {
+                console.warn('Streaming description generation failed, retrying without streaming:', error);
+            }
+        }
+
+        try {
+            showLoading(true, `${progressLabel} ${numResponses} descriptions using AI...`);
+            const response = await postWithDocuments(
+                '/project-writeup/generate_descriptions', formData, { num_responses: numResponses },
+                58000 // just under the 60 second function limit
+            );
+
+            const result = await response.json();
+            if (response.ok && result.success) {
+                return result.descriptions;
+            }
+        } catch (error) {
+            console.warn('Parallel description generation failed, generating one at a time:', error);
+        }
+
+        // Generate descriptions one by one to avoid timeout
+        const descriptions = [];
+
+        for (let i = 0; i < numResponses; i++) {
+            showLoading(true, `${progressLabel} description ${i + 1} of ${numResponses}...`);
+
+            const response = await postWithDocuments(
+                '/project-writeup/generate_single_description', formData, { version_number: i + 1 },
+                55000 // 55 second timeout
+            );
+
+            const result = await response.json();
+
+            if (response.ok && result.success) {
+                descriptions.push(result.description);
+            } else {
+                // Add error description but continue with others
+                descriptions.push({
+                    version: i + 1,
+                    content: result.error || 'Error generating this version'
+                });
+            }
+        }
+
+        return descriptions;
+    }
+
     function displayDescriptionVersions(descriptions) {
         const versionsContainer = document.getElementById('versionsContainer');
         const descriptionVersions = document.getElementById('descriptionVersions');
@@ -398,7 +643,7 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
-        if (!currentFormData.documents_text) {
+        if (!currentFormData.documents_text && !currentFormData.document_set_id) {
             showAlert('No previous data found. Please generate descriptions first.', 'danger');
             return;
         }
@@ -407,51 +652,24 @@ document.addEventListener('DOMContentLoaded', function() {
         const selectedQuoteElements = document.querySelectorAll('input[name="selected-quotes"]:checked');
         const selectedQuotes = Array.from(selectedQuoteElements).map(el => el.value);
         
+        // The stored documents may have expired since the last generation
+        if (currentFormData.document_set_id) {
+            const { document_set_id, documents_text, ...formData } = currentFormData;
+            currentFormData = { ...formData, ...await documentsPayload() };
+        }
+
         // Add user prompt and selected quotes to the current form data
         const regenerateData = {
             ...currentFormData,
             user_prompt: userPrompt,
-            selected_quotes: selectedQuotes
+            selected_quotes: selectedQuotes,
+            fresh: true // always new text, never cached versions
         };
 
         const numResponses = currentFormData.num_responses || 3;
         
         try {
-            showLoading(true, `Regenerating descriptions with your requirements (0/${numResponses})...`);
-            
-            // Generate descriptions one by one to avoid timeout
-            const descriptions = [];
-            
-            for (let i = 0; i < numResponses; i++) {
-                showLoading(true, `Regenerating description ${i + 1} of ${numResponses}...`);
-                
-                const requestData = {
-                    ...regenerateData,
-                    version_number: i + 1
-                };
-                
-                const response = await fetch('/project-writeup/generate_single_description', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify(requestData),
-                    credentials: 'include',
-                    signal: AbortSignal.timeout(55000) // 55 second timeout
-                });
-
-                const result = await response.json();
-                
-                if (response.ok && result.success) {
-                    descriptions.push(result.description);
-                } else {
-                    // Add error description but continue with others
-                    descriptions.push({
-                        version: i + 1,
-                        content: result.error || 'Error generating this version'
-                    });
-                }
-            }
+            const descriptions = await requestDescriptions(regenerateData, numResponses, 'Regenerating');
 
             displayDescriptionVersions(descriptions);
             showAlert('New descriptions generated successfully with your requirements!', 'success');
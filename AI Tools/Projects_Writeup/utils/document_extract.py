@@ -0,0 +1,389 @@
+"""
+Text extraction for uploaded documents
+Extracts files, and page ranges of large PDFs, in a long-lived pool of
+worker processes with a time limit per file and a memory limit per worker,
+so a pathological PDF cannot stall or crash the process serving the request.
+Given a character budget, stops pulling pages once enough text is in hand.
+Falls back to extracting in-process where multiprocessing is unavailable
+(e.g. serverless hosts without /dev/shm).
+"""
+
+import io
+import os
+import time
+import logging
+import threading
+import multiprocessing
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', str(min(4, os.cpu_count() or 1))))
+EXTRACT_TIMEOUT = float(os.getenv('EXTRACT_TIMEOUT_SECONDS', '20'))
+EXTRACT_MEMORY_LIMIT_MB = int(os.getenv('EXTRACT_MEMORY_LIMIT_MB', '1024'))
+# PDFs longer than this are split into ranges of this many pages
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', '20'))
+
+
+def _as_stream(source):
+    """Bytes or a readable, seekable file object (e.g. a request.files upload)"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def extract_pdf_pages(source, start=0, stop=None, char_budget=None):
+    """
+    Return ([page text, ...] for pages start..stop-1, total page count)
+
+    With a char_budget, stops after the page that brings the text up to it.
+    """
+    import PyPDF2
+    reader = PyPDF2.PdfReader(_as_stream(source))
+    total = len(reader.pages)
+    stop = total if stop is None else min(stop, total)
+    pages = []
+    chars = 0
+    for i in range(start, stop):
+        if char_budget is not None and chars >= char_budget:
+            break
+        page = reader.pages[i].extract_text() or ''
+        pages.append(page)
+        chars += len(page) + 1
+    return pages, total
+
+
+def join_pages(pages):
+    """Pages joined one per line, and each page's (start, end) offsets in the text"""
+    parts = []
+    offsets = []
+    position = 0
+    for page in pages:
+        parts.append(page)
+        parts.append("\n")
+        offsets.append((position, position + len(page)))
+        position += len(page) + 1
+    return ''.join(parts), offsets
+
+
+def extraction(text, page_offsets=None, total_pages=None, complete=None):
+    """
+    One file's result: its text and, for PDFs, the offsets of the pages
+    included and the document's page count. `complete` is False when the
+    budget cut the file short or left it out.
+    """
+    if complete is None:
+        complete = page_offsets is None or len(page_offsets) == total_pages
+    return {
+        'text': text,
+        'page_offsets': page_offsets,
+        'total_pages': total_pages,
+        'complete': complete,
+    }
+
+
+def limit_extraction(result, char_budget):
+    """Cut a result back to whole pages within char_budget (at least one page)"""
+    offsets = result['page_offsets']
+    if char_budget is None or not offsets or len(result['text']) <= char_budget:
+        return result
+    keep = 1
+    while keep < len(offsets) and offsets[keep - 1][1] + 1 < char_budget:
+        keep += 1
+    return extraction(result['text'][:offsets[keep - 1][1] + 1], offsets[:keep], result['total_pages'])
+
+
+def extract_bytes(source, extension):
+    """
+    Extract text content from an uploaded file's bytes or file object
+
+    Everything is parsed in memory; nothing is written to disk.
+    """
+    return _extract_in_process(source, extension)['text']
+
+
+def _extract_in_process(source, extension, char_budget=None):
+    try:
+        stream = _as_stream(source)
+        if extension == 'pdf':
+            pages, total = extract_pdf_pages(stream, char_budget=char_budget)
+            text, offsets = join_pages(pages)
+            return extraction(text, offsets, total)
+
+        elif extension == 'docx':
+            import docx2txt
+            return extraction(docx2txt.process(stream))
+
+        elif extension == 'doc':
+            # For .doc files, we'll try to read as text (limited support)
+            try:
+                from docx import Document
+                doc = Document(stream)
+                return extraction(''.join(paragraph.text + "\n" for paragraph in doc.paragraphs))
+            except Exception:
+                return extraction("Could not extract text from .doc file. Please use .docx format.")
+
+        elif extension == 'txt':
+            return extraction(stream.read().decode('utf-8'))
+
+    except Exception as e:
+        return extraction(f"Error extracting text from file: {str(e)}")
+
+    return extraction("")
+
+
+def _address_space_bytes():
+    """This process's current virtual memory size, or 0 where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _limit_worker_memory():
+    """
+    Pool initializer: allow the worker EXTRACT_MEMORY_LIMIT_MB on top of
+    what it already maps, since RLIMIT_AS counts the whole address space
+    """
+    try:
+        import resource
+        limit = _address_space_bytes() + EXTRACT_MEMORY_LIMIT_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not limit extraction worker memory: {e}")
+
+
+def _extract_task(data, extension, start, stop, char_budget):
+    """Run in a worker: a PDF page range, or a whole file of another type"""
+    if extension == 'pdf':
+        return extract_pdf_pages(data, start, stop, char_budget)
+    return extract_bytes(data, extension), None
+
+
+def _pool_context():
+    """
+    forkserver where available, else spawn: forking the threaded server
+    directly could copy a lock another thread holds and deadlock the
+    worker. The pool is kept for the life of the process, so the slower
+    start is paid once rather than per request.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+class SharedPool:
+    """
+    One extraction pool per server process, shared by its request threads
+
+    A request whose file timed out leaves a worker stuck on it, so it
+    retires the pool: later requests get a fresh one, and the old pool is
+    terminated once the requests still using it are done.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._users = {}
+        self.unavailable = False
+
+    def acquire(self):
+        """Return the current pool, starting it if needed; None if pools are unavailable"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked since the pool started (e.g. a gunicorn worker); it is not ours
+                self._pool = None
+                self._users = {}
+                self._pid = os.getpid()
+            if self.unavailable:
+                return None
+            if self._pool is None:
+                try:
+                    self._pool = _pool_context().Pool(processes=self.workers, initializer=_limit_worker_memory)
+                except (OSError, ImportError, ValueError) as e:
+                    logger.warning(f"Extraction process pool unavailable ({e}); extracting in-process")
+                    self.unavailable = True
+                    return None
+                self._users[self._pool] = 0
+            self._users[self._pool] += 1
+            return self._pool
+
+    def release(self, pool, retire=False):
+        """Hand the pool back; retire=True when a worker may be stuck"""
+        with self._lock:
+            if pool not in self._users:
+                return
+            self._users[pool] -= 1
+            if retire and pool is self._pool:
+                self._pool = None
+            if pool is not self._pool and not self._users[pool]:
+                del self._users[pool]
+                # Also kills workers still stuck on a file that timed out
+                pool.terminate()
+
+
+_shared_pool = SharedPool(EXTRACT_WORKERS)
+
+
+def _failure(error, timeout=EXTRACT_TIMEOUT):
+    if isinstance(error, multiprocessing.TimeoutError):
+        return f"Error extracting text from file: timed out after {timeout:.0f} seconds"
+    if isinstance(error, MemoryError):
+        return f"Error extracting text from file: exceeded the {EXTRACT_MEMORY_LIMIT_MB} MB memory limit"
+    return f"Error extracting text from file: {str(error)}"
+
+
+def _text_length(pages):
+    return sum(len(page) + 1 for page in pages)
+
+
+def _extract_in_pool(pool, files, timeout, workers, char_budget, cached):
+    """Return (results, timed_out); timed_out means a worker may still be busy"""
+    budgeted = char_budget is not None
+    remaining = char_budget
+    timed_out = False
+
+    def wait(result, deadline):
+        nonlocal timed_out
+        try:
+            return result.get(timeout=max(0, deadline - time.monotonic()))
+        except multiprocessing.TimeoutError:
+            timed_out = True
+            raise
+
+    # Start whole non-PDF files and the first page range of each PDF. With a
+    # budget only a worker's worth run ahead, so files the budget never
+    # reaches are never parsed.
+    window = workers if budgeted else len(files)
+    first = {}
+
+    def start(index):
+        if index < len(files) and index not in first and cached[index] is None:
+            data, extension = files[index]
+            first[index] = pool.apply_async(_extract_task, (data, extension, 0, PDF_PAGES_PER_TASK, remaining))
+
+    for index in range(window):
+        start(index)
+
+    results = [None] * len(files)
+    pdf_pages = {}
+    for index, (data, extension) in enumerate(files):
+        if budgeted and remaining <= 0:
+            results[index] = extraction('', complete=False)
+            continue
+        start(index + window)
+
+        if cached[index] is not None:
+            results[index] = limit_extraction(cached[index], remaining)
+        else:
+            # Each file gets its own `timeout`, counted from when it is awaited
+            deadline = time.monotonic() + timeout
+            try:
+                result, total_pages = wait(first[index], deadline)
+            except Exception as e:
+                results[index] = extraction(_failure(e, timeout))
+                continue
+            if extension != 'pdf':
+                results[index] = extraction(result)
+            else:
+                later = [
+                    (page, min(page + PDF_PAGES_PER_TASK, total_pages))
+                    for page in range(PDF_PAGES_PER_TASK, total_pages, PDF_PAGES_PER_TASK)
+                ]
+                if not budgeted:
+                    # Fan the remaining pages out across the pool; reassembled below
+                    pdf_pages[index] = (list(result), total_pages, deadline, [
+                        pool.apply_async(_extract_task, (data, extension, page, stop, None))
+                        for page, stop in later
+                    ])
+                    continue
+                # Pull more pages a pool's worth at a time until the budget is met
+                pages = list(result)
+                try:
+                    while later and _text_length(pages) < remaining:
+                        batch, later = later[:workers], later[workers:]
+                        room = remaining - _text_length(pages)
+                        pending = [
+                            pool.apply_async(_extract_task, (data, extension, page, stop, room))
+                            for page, stop in batch
+                        ]
+                        for batch_result in pending:
+                            pages.extend(wait(batch_result, deadline)[0])
+                except Exception as e:
+                    results[index] = extraction(_failure(e, timeout))
+                    continue
+                text, offsets = join_pages(pages)
+                results[index] = limit_extraction(extraction(text, offsets, total_pages), remaining)
+
+        if budgeted:
+            remaining -= len(results[index]['text'])
+
+    # Reassemble each fanned-out PDF's ranges in page order
+    for index, (pages, total_pages, deadline, pending) in pdf_pages.items():
+        try:
+            for range_result in pending:
+                pages.extend(wait(range_result, deadline)[0])
+        except Exception as e:
+            results[index] = extraction(_failure(e, timeout))
+            continue
+        text, offsets = join_pages(pages)
+        results[index] = extraction(text, offsets, total_pages)
+
+    return results, timed_out
+
+
+def _extract_sequentially(files, char_budget, cached):
+    results = []
+    remaining = char_budget
+    for (data, extension), known in zip(files, cached):
+        if remaining is not None and remaining <= 0:
+            results.append(extraction('', complete=False))
+            continue
+        if known is not None:
+            result = limit_extraction(known, remaining)
+        else:
+            result = _extract_in_process(data, extension, remaining)
+        results.append(result)
+        if remaining is not None:
+            remaining -= len(result['text'])
+    return results
+
+
+def extract_files(files, workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT, char_budget=None, cached=None):
+    """
+    Extract [(bytes, extension), ...] and return their extraction() results
+    in the same order
+
+    With a char_budget (roughly 4 characters per token), files are taken in
+    order and PDFs stop pulling pages once the text so far reaches it; files
+    after that are left out (empty and not complete). `cached` holds a
+    complete earlier result, or None, for each file; those are not parsed
+    again but still count against the budget.
+
+    Each file must finish within `timeout` seconds of the request starting
+    to wait for it; one that does not, or that exhausts its worker's
+    memory, comes back as an error text like any other extraction failure.
+    `workers` only sizes the batches a budgeted PDF is pulled in; the
+    shared pool has EXTRACT_WORKERS processes.
+    """
+    if not files:
+        return []
+    cached = cached or [None] * len(files)
+    missing = [extension for (_, extension), known in zip(files, cached) if known is None]
+    # Plain text needs no parsing; EXTRACT_WORKERS=0 turns the pool off
+    if workers <= 0 or all(extension == 'txt' for extension in missing):
+        return _extract_sequentially(files, char_budget, cached)
+
+    pool = _shared_pool.acquire()
+    if pool is None:
+        return _extract_sequentially(files, char_budget, cached)
+
+    timed_out = True
+    try:
+        results, timed_out = _extract_in_pool(pool, files, timeout, workers, char_budget, cached)
+        return results
+    finally:
+        _shared_pool.release(pool, retire=timed_out)
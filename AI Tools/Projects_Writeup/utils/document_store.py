@@ -0,0 +1,120 @@
+"""
+Server-side store of uploaded document text
+Each upload adds its extracted text to a document set, and the browser
+sends the set's id with generate requests instead of the text itself.
+Sets live in SQLite, shared by every process on the host, and expire
+DOCUMENT_SET_TTL_SECONDS after they were last used. Serverless instances
+do not share /tmp, so the store is off on Vercel unless
+DOCUMENT_STORE_ENABLED says otherwise, and the browser sends the text.
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+
+DOCUMENT_STORE_DB_PATH = os.getenv('DOCUMENT_STORE_DB', '/tmp/document_store.sqlite3')
+DOCUMENT_SET_TTL = float(os.getenv('DOCUMENT_SET_TTL_SECONDS', str(24 * 3600)))
+DOCUMENT_STORE_ENABLED = os.getenv(
+    'DOCUMENT_STORE_ENABLED', 'false' if os.getenv('VERCEL') else 'true'
+).lower() in ('1', 'true', 'yes')
+
+
+class DocumentSetMissing(Exception):
+    """The document set does not exist or has expired"""
+
+
+class DocumentStore:
+    """
+    Document sets as (filename, text) rows in upload order
+
+    Expired sets are dropped whenever documents are added.
+    """
+
+    def __init__(self, path=DOCUMENT_STORE_DB_PATH, ttl=DOCUMENT_SET_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._ready:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS document_sets '
+                '(set_id TEXT PRIMARY KEY, last_used REAL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS documents '
+                '(set_id TEXT, position INTEGER, filename TEXT, text TEXT, PRIMARY KEY (set_id, position))'
+            )
+            self._ready = True
+        return conn
+
+    def add(self, documents, set_id=None):
+        """
+        Append [(filename, text), ...] to a set and return its id
+
+        A new set is started when set_id is None, unknown or expired.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            expired = now - self.ttl
+            conn.execute(
+                'DELETE FROM documents WHERE set_id IN (SELECT set_id FROM document_sets WHERE last_used < ?)',
+                (expired,)
+            )
+            conn.execute('DELETE FROM document_sets WHERE last_used < ?', (expired,))
+
+            exists = set_id and conn.execute(
+                'SELECT 1 FROM document_sets WHERE set_id = ?', (set_id,)
+            ).fetchone()
+            if not exists:
+                set_id = uuid.uuid4().hex
+                conn.execute('INSERT INTO document_sets (set_id, last_used) VALUES (?, ?)', (set_id, now))
+            else:
+                conn.execute('UPDATE document_sets SET last_used = ? WHERE set_id = ?', (now, set_id))
+
+            start = conn.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM documents WHERE set_id = ?', (set_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                'INSERT INTO documents (set_id, position, filename, text) VALUES (?, ?, ?, ?)',
+                [(set_id, start + offset, filename, text) for offset, (filename, text) in enumerate(documents)]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+        return set_id
+
+    def get(self, set_id):
+        """Return the set's [(filename, text), ...], or None if it does not exist or has expired"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            updated = conn.execute(
+                'UPDATE document_sets SET last_used = ? WHERE set_id = ? AND last_used >= ?',
+                (now, set_id, now - self.ttl)
+            ).rowcount
+            if not updated:
+                return None
+            return conn.execute(
+                'SELECT filename, text FROM documents WHERE set_id = ? ORDER BY position', (set_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def text(self, set_id):
+        """The set's documents joined as the browser joins them; raises DocumentSetMissing"""
+        documents = self.get(set_id)
+        if documents is None:
+            raise DocumentSetMissing(set_id)
+        return '\n\n'.join(text for _, text in documents)
+
+
+document_store = DocumentStore()
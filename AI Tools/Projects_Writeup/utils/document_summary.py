@@ -0,0 +1,317 @@
+"""
+Map-reduce summaries of project documents too long for one prompt
+The text is cut into chunks by token count, the chunks are summarized
+concurrently (up to SUMMARY_CONCURRENCY at once), and the chunk summaries
+are reduced to one summary that fits the description prompt. Each step
+(one batch of chunks, or one round of reduction) is saved in SQLite under
+a lease. On persistent hosts a background thread runs the steps as soon
+as the job is created; status polls run any step nobody holds, so a job
+whose worker died (e.g. a recycled gunicorn worker) still finishes.
+
+The SQLite file is shared by the processes of one host, not by serverless
+instances, so jobs are off on Vercel unless SUMMARY_JOBS_ENABLED says
+otherwise.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', '3000'))
+# Enough to map the default upload budget (about 40 chunks) in one round
+SUMMARY_CONCURRENCY = int(os.getenv('SUMMARY_CONCURRENCY', '40'))
+# Chunk summaries reduced in one call; more are reduced in groups first
+REDUCE_INPUT_TOKENS = int(os.getenv('SUMMARY_REDUCE_INPUT_TOKENS', '12000'))
+SUMMARY_JOBS_DB_PATH = os.getenv('SUMMARY_JOBS_DB', '/tmp/summary_jobs.sqlite3')
+SUMMARY_JOB_TTL = float(os.getenv('SUMMARY_JOB_TTL_SECONDS', str(24 * 3600)))
+# A step whose runner dies is retried after this long; it must outlast
+# one model call with all its retries, or a poll would redo a live step
+SUMMARY_STEP_LEASE = float(os.getenv('SUMMARY_STEP_LEASE_SECONDS', '240'))
+SUMMARY_JOBS_ENABLED = os.getenv(
+    'SUMMARY_JOBS_ENABLED', 'false' if os.getenv('VERCEL') else 'true'
+).lower() in ('1', 'true', 'yes')
+# Serverless instances freeze after the response, so no background thread there
+SUMMARY_BACKGROUND = os.getenv(
+    'SUMMARY_BACKGROUND', 'false' if os.getenv('VERCEL') else 'true'
+).lower() in ('1', 'true', 'yes')
+
+# Used when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+
+
+def count_tokens(text):
+    """Tokens in text for the OpenAI chat models, or an estimate without tiktoken"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _split_line(line, max_tokens):
+    """Cut a line over max_tokens at word boundaries"""
+    pieces = []
+    current = []
+    size = 0
+    for word in line.split():
+        tokens = count_tokens(word + ' ')
+        if current and size + tokens > max_tokens:
+            pieces.append(' '.join(current))
+            current = []
+            size = 0
+        current.append(word)
+        size += tokens
+    if current:
+        pieces.append(' '.join(current))
+    return pieces
+
+
+def chunk_by_tokens(text, max_tokens=SUMMARY_CHUNK_TOKENS):
+    """
+    Split text into chunks of whole lines of at most max_tokens each
+
+    Lines rather than paragraphs: extracted PDF text rarely has blank lines.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        tokens = count_tokens(line + '\n')
+        pieces = [(line, tokens)] if tokens <= max_tokens else [
+            (piece, count_tokens(piece + '\n')) for piece in _split_line(line, max_tokens)
+        ]
+        for piece, piece_tokens in pieces:
+            if current and size + piece_tokens > max_tokens:
+                chunks.append('\n'.join(current))
+                current = []
+                size = 0
+            current.append(piece)
+            size += piece_tokens
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+def reduce_groups(summaries, max_tokens=REDUCE_INPUT_TOKENS):
+    """Group summaries in order so each group fits one reduce call"""
+    groups = []
+    for summary in summaries:
+        tokens = count_tokens(summary)
+        if groups and groups[-1][1] + tokens <= max_tokens:
+            groups[-1][0].append(summary)
+            groups[-1][1] += tokens
+        else:
+            groups.append([[summary], tokens])
+    if len(groups) == len(summaries) and len(summaries) > 1:
+        # No two summaries fit together; keep what fits in one call
+        return [summaries]
+    return [group for group, _ in groups]
+
+
+class SummaryJobStore:
+    """
+    Summary jobs in a SQLite file shared by every process on the host
+
+    A job keeps its chunks and the summaries so far. Jobs older than the
+    TTL are dropped when a new one is created.
+    """
+
+    def __init__(self, path=SUMMARY_JOBS_DB_PATH, ttl=SUMMARY_JOB_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._ready:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS summary_jobs '
+                '(job_id TEXT PRIMARY KEY, status TEXT, stage TEXT, total_chunks INTEGER, '
+                'done_chunks INTEGER, summary TEXT, error TEXT, chunks TEXT, summaries TEXT, '
+                'lease_until REAL, created_at REAL, updated_at REAL)'
+            )
+            self._ready = True
+        return conn
+
+    def create(self, chunks):
+        """Record a new running job for the chunks and return its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM summary_jobs WHERE created_at < ?', (now - self.ttl,))
+            conn.execute(
+                'INSERT INTO summary_jobs (job_id, status, stage, total_chunks, done_chunks, chunks, summaries, '
+                "created_at, updated_at) VALUES (?, 'running', 'map', ?, 0, ?, ?, ?, ?)",
+                (job_id, len(chunks), json.dumps(chunks), json.dumps([None] * len(chunks)), now, now)
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def lease(self, job_id, seconds=SUMMARY_STEP_LEASE):
+        """
+        Claim the next step of a running job; returns (stage, chunks,
+        summaries), or None if the job is finished or another poll holds it
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            claimed = conn.execute(
+                "UPDATE summary_jobs SET lease_until = ? WHERE job_id = ? AND status = 'running' "
+                'AND created_at >= ? AND (lease_until IS NULL OR lease_until < ?)',
+                (now + seconds, job_id, now - self.ttl, now)
+            ).rowcount
+            if not claimed:
+                return None
+            stage, chunks, summaries = conn.execute(
+                'SELECT stage, chunks, summaries FROM summary_jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return stage, json.loads(chunks), json.loads(summaries)
+
+    def update(self, job_id, **fields):
+        """Set status, stage, done_chunks, summaries, summary or error, and release the lease"""
+        if 'summaries' in fields:
+            fields['summaries'] = json.dumps(fields['summaries'])
+        columns = ', '.join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        try:
+            conn.execute(
+                f'UPDATE summary_jobs SET {columns}, lease_until = NULL, updated_at = ? WHERE job_id = ?',
+                (*fields.values(), time.time(), job_id)
+            )
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        """Return the job's status as a dict, or None if it does not exist or has expired"""
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                'SELECT job_id, status, stage, total_chunks, done_chunks, summary, error '
+                'FROM summary_jobs WHERE job_id = ? AND created_at >= ?',
+                (job_id, time.time() - self.ttl)
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+
+summary_jobs = SummaryJobStore()
+
+
+def create_summary_job(text, summarize_chunk, reduce_summaries, background=SUMMARY_BACKGROUND,
+                       lease_seconds=SUMMARY_STEP_LEASE, store=summary_jobs):
+    """
+    Chunk text into a new summary job and return its id
+
+    With background=True a daemon thread runs the job to the end;
+    otherwise (and if that thread dies) status polls run it step by step.
+    """
+    job_id = store.create(chunk_by_tokens(text))
+    if background:
+        threading.Thread(
+            target=run_summary_job, args=(job_id, summarize_chunk, reduce_summaries),
+            kwargs={'lease_seconds': lease_seconds, 'store': store},
+            name=f'summary-{job_id[:8]}', daemon=True
+        ).start()
+    return job_id
+
+
+def run_summary_job(job_id, summarize_chunk, reduce_summaries,
+                    lease_seconds=SUMMARY_STEP_LEASE, store=summary_jobs):
+    """Advance a job until it completes or fails"""
+    started = time.time()
+    while True:
+        try:
+            job = advance_summary_job(job_id, summarize_chunk, reduce_summaries,
+                                      lease_seconds=lease_seconds, store=store)
+        except Exception as e:
+            # Leave the job to the status polls
+            logger.error(f"Summary job {job_id} worker stopped: {e}")
+            return
+        if job is None or job['status'] != 'running':
+            break
+        # A poll may hold the current step; look again shortly
+        time.sleep(1)
+    if job and job['status'] == 'completed':
+        logger.info(f"Summary job {job_id} finished in {time.time() - started:.1f}s")
+
+
+def advance_summary_job(job_id, summarize_chunk, reduce_summaries, concurrency=SUMMARY_CONCURRENCY,
+                        lease_seconds=SUMMARY_STEP_LEASE, store=summary_jobs):
+    """
+    Run the job's next step and return its status (None if it is unknown)
+
+    Map: summarize up to `concurrency` chunks not yet done; a chunk that
+    fails is left out, and the job fails only if all of them do. Reduce:
+    combine the summaries in groups that fit one call, until one is left.
+    summarize_chunk(chunk) and reduce_summaries([summary, ...]) return text.
+    Does nothing if the job is finished or another poll is running a step.
+    """
+    claimed = store.lease(job_id, lease_seconds)
+    if claimed is None:
+        return store.get(job_id)
+    stage, chunks, summaries = claimed
+
+    try:
+        if stage == 'map':
+            pending = [index for index, summary in enumerate(summaries) if summary is None][:concurrency]
+
+            def summarize(index):
+                try:
+                    return summarize_chunk(chunks[index]) or ''
+                except Exception as e:
+                    logger.warning(f"Summary of chunk {index + 1}/{len(chunks)} failed: {e}")
+                    # Empty marks the chunk as done and left out
+                    return ''
+
+            with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+                for index, summary in zip(pending, executor.map(summarize, pending)):
+                    summaries[index] = summary
+
+            done = sum(summary is not None for summary in summaries)
+            if done < len(summaries):
+                store.update(job_id, summaries=summaries, done_chunks=done)
+                return store.get(job_id)
+            summaries = [summary for summary in summaries if summary]
+            if not summaries:
+                raise RuntimeError('Every chunk summary failed')
+        else:
+            groups = reduce_groups(summaries)
+            with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(groups)))) as executor:
+                summaries = list(executor.map(reduce_summaries, groups))
+
+        if len(summaries) == 1:
+            store.update(job_id, status='completed', stage='done', done_chunks=len(chunks),
+                         summaries=[], summary=summaries[0])
+            logger.info(f"Summary job {job_id}: {len(chunks)} chunks summarized")
+        else:
+            store.update(job_id, stage='reduce', done_chunks=len(chunks), summaries=summaries)
+    except Exception as e:
+        logger.error(f"Summary job {job_id} failed: {e}")
+        try:
+            store.update(job_id, status='failed', error=str(e))
+        except Exception as store_error:
+            logger.error(f"Could not record summary job {job_id} failure: {store_error}")
+    return store.get(job_id)
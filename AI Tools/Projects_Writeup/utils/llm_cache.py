@@ -0,0 +1,138 @@
+"""
+LLM response cache for the Project Writeup tool
+OpenAI results keyed by a hash of everything that shapes the request, kept
+in SQLite so repeat requests are answered without a new call, even after a
+restart. Entries expire after a TTL and the least recently used ones are
+evicted once the cache grows past its size limit.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+LLM_CACHE_DB_PATH = os.getenv('LLM_CACHE_DB', '/tmp/llm_cache.sqlite3')
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(float(os.getenv('LLM_CACHE_MAX_MB', '64')) * 1024 * 1024)
+
+
+def cache_key(kind, **parts):
+    """SHA-256 of the request kind and every part that shapes the response"""
+    payload = json.dumps({'kind': kind, **parts}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    JSON values in a SQLite file shared by every process on the host
+
+    Errors are logged and treated as a miss: a broken cache must never
+    fail a request that OpenAI can still answer.
+    """
+
+    def __init__(self, path=LLM_CACHE_DB_PATH, ttl=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        conn = self._connect()
+        try:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS llm_cache '
+                '(key TEXT PRIMARY KEY, value TEXT, size INTEGER, created_at REAL, last_used REAL)'
+            )
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def get(self, key):
+        """Return the cached value, or None on a miss or expired entry"""
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                row = conn.execute(
+                    'SELECT value FROM llm_cache WHERE key = ? AND created_at >= ?',
+                    (key, now - self.ttl)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute('UPDATE llm_cache SET last_used = ? WHERE key = ?', (now, key))
+                return json.loads(row[0])
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"LLM cache read error: {e}")
+            return None
+
+    def put(self, key, value):
+        """Store a value, then drop expired entries and evict down to max_bytes"""
+        try:
+            data = json.dumps(value)
+            conn = self._connect()
+            try:
+                now = time.time()
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, last_used) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (key, data, len(data.encode('utf-8')), now, now)
+                )
+                conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl,))
+                # Keep the most recently used entries that fit in max_bytes
+                conn.execute(
+                    'DELETE FROM llm_cache WHERE key IN ('
+                    '  SELECT key FROM ('
+                    '    SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running'
+                    '    FROM llm_cache'
+                    '  ) WHERE running > ?'
+                    ')',
+                    (self.max_bytes,)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"LLM cache write error: {e}")
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM llm_cache')
+        finally:
+            conn.close()
+
+
+class DisabledCache:
+    """Stand-in when LLM_CACHE_ENABLED is off or SQLite is unavailable"""
+
+    def get(self, key):
+        return None
+
+    def put(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+
+def _create_cache():
+    if LLM_CACHE_ENABLED:
+        try:
+            return LLMCache()
+        except Exception as e:
+            logger.error(f"LLM cache unavailable ({e}); caching disabled")
+    return DisabledCache()
+
+
+llm_cache = _create_cache()
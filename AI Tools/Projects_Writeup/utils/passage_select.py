@@ -0,0 +1,135 @@
+"""
+Relevance-ranked passage selection for the description prompt
+Splits the uploaded text into chunks, scores them with BM25 against the
+keywords, paragraph titles and user prompt, and packs the best ones into
+the prompt's character budget. Runs locally; no network or extra packages.
+"""
+
+import re
+import math
+from collections import Counter
+
+CHUNK_CHARS = 1200
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOP_WORDS = frozenset("""
+a an and are as at be been but by for from has have in into is it its of on
+or our that the their there these this those to was were which will with
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens without stop words"""
+    return [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOP_WORDS and len(word) > 1]
+
+
+def _split_long(paragraph, chunk_chars):
+    """Break a paragraph longer than chunk_chars at sentence, then word, boundaries"""
+    pieces = []
+    current = ''
+    for sentence in re.split(r'(?<=[.!?])\s+', paragraph):
+        while len(sentence) > chunk_chars:
+            cut = sentence.rfind(' ', 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > chunk_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(text, chunk_chars=CHUNK_CHARS):
+    """Split text into chunks of whole paragraphs, each at most about chunk_chars"""
+    chunks = []
+    current = []
+    size = 0
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        for piece in _split_long(paragraph, chunk_chars) if len(paragraph) > chunk_chars else [paragraph]:
+            if current and size + 2 + len(piece) > chunk_chars:
+                chunks.append('\n\n'.join(current))
+                current = []
+                size = 0
+            current.append(piece)
+            size += len(piece) + (2 if size else 0)
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def bm25_scores(chunk_tokens, query_tokens, k1=BM25_K1, b=BM25_B):
+    """BM25 score of each tokenized chunk for the query tokens"""
+    count = len(chunk_tokens)
+    if not count or not query_tokens:
+        return [0.0] * count
+
+    average_length = sum(len(tokens) for tokens in chunk_tokens) / count or 1
+    document_frequency = Counter()
+    for tokens in chunk_tokens:
+        document_frequency.update(set(tokens))
+
+    query = set(query_tokens)
+    scores = []
+    for tokens in chunk_tokens:
+        frequencies = Counter(tokens)
+        length_norm = k1 * (1 - b + b * len(tokens) / average_length)
+        score = 0.0
+        for term in query:
+            frequency = frequencies.get(term)
+            if not frequency:
+                continue
+            idf = math.log(1 + (count - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            score += idf * frequency * (k1 + 1) / (frequency + length_norm)
+        scores.append(score)
+    return scores
+
+
+def select_passages(text, query, char_budget, min_chars=None, chunk_chars=CHUNK_CHARS):
+    """
+    Return the passages of text most relevant to query, within char_budget
+
+    Text that already fits is returned unchanged, and without any query
+    terms this falls back to the first char_budget characters. Otherwise
+    chunks are taken best score first; chunks that match no query term
+    are only used to bring the selection up to min_chars (default: a
+    quarter of the budget). The chosen chunks keep their document order.
+    """
+    if len(text) <= char_budget:
+        return text
+    query_tokens = tokenize(query)
+    if not query_tokens:
+        return text[:char_budget]
+
+    chunks = chunk_text(text, chunk_chars)
+    scores = bm25_scores([tokenize(chunk) for chunk in chunks], query_tokens)
+    if min_chars is None:
+        min_chars = char_budget // 4
+
+    selected = []
+    used = 0
+    # Best score first; earlier chunks win ties
+    for index in sorted(range(len(chunks)), key=lambda i: (-scores[i], i)):
+        cost = len(chunks[index]) + (2 if selected else 0)
+        if used + cost > char_budget:
+            continue
+        if scores[index] <= 0 and used >= min_chars:
+            break
+        selected.append(index)
+        used += cost
+
+    if not selected:
+        return text[:char_budget]
+    return '\n\n'.join(chunks[index] for index in sorted(selected))
@@ -0,0 +1,67 @@
+"""
+In-process cache of text extracted from uploaded documents
+Lets repeat uploads of the same file skip PDF/DOCX parsing entirely
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+TEXT_CACHE_MAX_BYTES = int(float(os.getenv('TEXT_CACHE_MAX_MB', '32')) * 1024 * 1024)
+
+
+def content_key(data, extension, extractor_version):
+    """Key by file bytes, not name, so a renamed copy still hits"""
+    return f"{hashlib.sha256(data).hexdigest()}.{extension}.v{extractor_version}"
+
+
+class TextCache:
+    """
+    LRU cache of content key -> extraction (text and page offsets),
+    bounded by total text size
+
+    The extractor version is part of the key, so changing how text is
+    extracted never serves text produced by the old code.
+    """
+
+    def __init__(self, max_bytes=TEXT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached extraction, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, result):
+        """Cache an extraction, evicting the least recently used entries to stay under max_bytes"""
+        size = len(result['text'].encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[0]
+            self._entries[key] = (size, result)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+# Shared by every request in the process
+text_cache = TextCache()
@@ -5,13 +5,26 @@ Uses database-backed sessions for serverless compatibility
 """
 
 from flask import Flask, request, jsonify, make_response
-import oracledb
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import hashlib
 import secrets
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from dotenv import load_dotenv
 import sys
+from pathlib import Path
+
+# Add the License Reminder Tool utils directory to path for the shared session cache
+sys.path.insert(0, str(Path(__file__).parent.parent / 'AI Tools' / 'LicenseReminderTool-main' / 'utils'))
+from session_cache import session_cache
+import oracle_pool
+from login_throttle import login_throttle, throttle_keys
+from session_expiry import SESSION_LIFETIME
+from signed_tokens import (
+    signed_tokens_enabled, is_signed_token, create_signed_token,
+    verify_signed_token, revoke_signed_token
+)
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +34,13 @@ print("[Auth] Initializing authentication API", file=sys.stderr)
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-change-this')
 
+# Proxies in front of the app that append to X-Forwarded-For (Vercel's edge, or
+# the reverse proxy on our own hosts). ProxyFix takes the client address from
+# that many hops from the right, so a client cannot pick its own throttle key.
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '1'))
+if TRUSTED_PROXY_COUNT > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+
 # Oracle connection configuration
 ORACLE_HOST = os.getenv('ORACLE_HOST')
 ORACLE_PORT = os.getenv('ORACLE_PORT')
@@ -29,29 +49,14 @@ ORACLE_USER = os.getenv('ORACLE_USER')
 ORACLE_PASSWORD = os.getenv('ORACLE_PASSWORD')
 ORACLE_SCHEMA = os.getenv('ORACLE_SCHEMA', 'MSMM DASHBOARD')
 
-# Flag to track if database is initialized
-_db_initialized = False
+# Expired sessions deleted per statement by the cleanup job
+CLEANUP_BATCH_SIZE = int(os.getenv('SESSION_CLEANUP_BATCH_SIZE', '1000'))
+CLEANUP_TIME_BUDGET = float(os.getenv('SESSION_CLEANUP_TIME_BUDGET_SECONDS', '20'))
 
 def get_db_connection():
-    """Create and return a database connection"""
+    """Acquire a pooled database connection (close() returns it to the pool)"""
     try:
-        dsn = oracledb.makedsn(ORACLE_HOST, ORACLE_PORT, service_name=ORACLE_SERVICE_NAME)
-
-        # When connecting as SYS, we need to specify SYSDBA mode
-        if ORACLE_USER.upper() == 'SYS':
-            connection = oracledb.connect(
-                user=ORACLE_USER,
-                password=ORACLE_PASSWORD,
-                dsn=dsn,
-                mode=oracledb.SYSDBA
-            )
-        else:
-            connection = oracledb.connect(
-                user=ORACLE_USER,
-                password=ORACLE_PASSWORD,
-                dsn=dsn
-            )
-        return connection
+        return oracle_pool.get_connection()
     except Exception as e:
         print(f"[Auth] Database connection error: {e}", file=sys.stderr)
         raise
@@ -65,12 +70,10 @@ def create_session_token():
     return secrets.token_urlsafe(32)
 
 def init_database():
-    """Initialize the database tables (users and sessions)"""
-    global _db_initialized
-
-    if _db_initialized:
-        return
-
+    """
+    Initialize the database tables (users and sessions)
+    One-time migration, run with `python auth_admin.py migrate`
+    """
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
@@ -118,6 +121,42 @@ def init_database():
         """
         cursor.execute(create_sessions_table_sql)
 
+        # Create revocation table for logged out signed tokens if it doesn't exist
+        create_revoked_table_sql = f"""
+        BEGIN
+            EXECUTE IMMEDIATE 'CREATE TABLE "{ORACLE_SCHEMA}".REVOKED_SESSIONS (
+                JTI VARCHAR2(64) PRIMARY KEY,
+                USERNAME VARCHAR2(50),
+                REVOKED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                EXPIRES_AT TIMESTAMP NOT NULL
+            )';
+        EXCEPTION
+            WHEN OTHERS THEN
+                IF SQLCODE = -955 THEN
+                    NULL;
+                ELSE
+                    RAISE;
+                END IF;
+        END;
+        """
+        cursor.execute(create_revoked_table_sql)
+
+        # Index EXPIRES_AT so the cleanup job does not scan the whole table
+        for table, index in [('USER_SESSIONS', 'IDX_USER_SESSIONS_EXPIRES_AT'),
+                             ('REVOKED_SESSIONS', 'IDX_REVOKED_SESSIONS_EXPIRES_AT')]:
+            cursor.execute(f"""
+            BEGIN
+                EXECUTE IMMEDIATE 'CREATE INDEX {index} ON "{ORACLE_SCHEMA}".{table}(EXPIRES_AT)';
+            EXCEPTION
+                WHEN OTHERS THEN
+                    IF SQLCODE IN (-955, -1408) THEN
+                        NULL;
+                    ELSE
+                        RAISE;
+                    END IF;
+            END;
+            """)
+
         # Insert default admin user (admin/Scott123$)
         admin_password_hash = hash_password('Scott123$')
         insert_user_sql = f"""
@@ -135,27 +174,41 @@ def init_database():
         cursor.close()
         conn.close()
 
-        _db_initialized = True
         print("[Auth] Database initialized successfully", file=sys.stderr)
+        return True
 
     except Exception as e:
         print(f"[Auth] Database initialization error: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc(file=sys.stderr)
-
-def cleanup_expired_sessions():
-    """Remove expired sessions from the database"""
+        return False
+
+def cleanup_expired_sessions(batch_size=CLEANUP_BATCH_SIZE, time_budget=CLEANUP_TIME_BUDGET):
+    """
+    Remove expired sessions and revocations in bounded chunks
+    Each chunk is its own short transaction; stops when done or out of time.
+    Returns the number of rows deleted per table.
+    """
+    deleted = {'USER_SESSIONS': 0, 'REVOKED_SESSIONS': 0}
+    deadline = time.monotonic() + time_budget
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        cursor.execute(
-            f'DELETE FROM "{ORACLE_SCHEMA}".USER_SESSIONS WHERE EXPIRES_AT < CURRENT_TIMESTAMP'
-        )
-        conn.commit()
+        for table in deleted:
+            while time.monotonic() < deadline:
+                cursor.execute(
+                    f'DELETE FROM "{ORACLE_SCHEMA}".{table} WHERE EXPIRES_AT < CURRENT_TIMESTAMP AND ROWNUM <= :batch_size',
+                    batch_size=batch_size
+                )
+                conn.commit()
+                deleted[table] += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    break
         cursor.close()
         conn.close()
     except Exception as e:
         print(f"[Auth] Session cleanup error: {e}", file=sys.stderr)
+    return deleted
 
 def get_session(session_token):
     """Retrieve session from database"""
@@ -181,57 +234,76 @@ def get_session(session_token):
         print(f"[Auth] Get session error: {e}", file=sys.stderr)
         return None
 
-def create_session(user_id, username):
-    """Create a new session in the database"""
+def delete_session(session_token):
+    """Delete a session from the database and return its username, or None"""
     try:
-        session_token = create_session_token()
-        expires_at = datetime.now() + timedelta(hours=24)
-
         conn = get_db_connection()
         cursor = conn.cursor()
+        username_var = cursor.var(str)
         cursor.execute(
-            f'INSERT INTO "{ORACLE_SCHEMA}".USER_SESSIONS (SESSION_ID, USER_ID, USERNAME, EXPIRES_AT) VALUES (:token, :user_id, :username, :expires_at)',
+            f'DELETE FROM "{ORACLE_SCHEMA}".USER_SESSIONS WHERE SESSION_ID = :token RETURNING USERNAME INTO :username',
             token=session_token,
-            user_id=user_id,
-            username=username,
-            expires_at=expires_at
+            username=username_var
         )
         conn.commit()
         cursor.close()
         conn.close()
 
-        return session_token
+        usernames = username_var.getvalue()
+        return usernames[0] if usernames else None
     except Exception as e:
-        print(f"[Auth] Create session error: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        print(f"[Auth] Delete session error: {e}", file=sys.stderr)
         return None
 
-def delete_session(session_token):
-    """Delete a session from the database"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            f'DELETE FROM "{ORACLE_SCHEMA}".USER_SESSIONS WHERE SESSION_ID = :token',
-            token=session_token
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-    except Exception as e:
-        print(f"[Auth] Delete session error: {e}", file=sys.stderr)
+def login_user(username, password, session_token=None, expires_at=None):
+    """
+    Verify credentials, update LAST_LOGIN and create the session in one round trip
+
+    Pass session_token=None to skip the USER_SESSIONS insert (signed tokens).
+    Returns (user_id, username) or None for invalid credentials.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    user_id_var = cursor.var(int)
+    username_var = cursor.var(str)
+    cursor.execute(f"""
+        DECLARE
+            v_user_id NUMBER;
+            v_username VARCHAR2(50);
+        BEGIN
+            UPDATE "{ORACLE_SCHEMA}".MSMMAI_USERS
+            SET LAST_LOGIN = CURRENT_TIMESTAMP
+            WHERE USERNAME = :username AND PASSWORD_HASH = :password_hash
+            RETURNING USER_ID, USERNAME INTO v_user_id, v_username;
+
+            IF SQL%ROWCOUNT = 1 AND :session_token IS NOT NULL THEN
+                INSERT INTO "{ORACLE_SCHEMA}".USER_SESSIONS (SESSION_ID, USER_ID, USERNAME, EXPIRES_AT)
+                VALUES (:session_token, v_user_id, v_username, :expires_at);
+            END IF;
+
+            :user_id := v_user_id;
+            :out_username := v_username;
+        END;
+    """,
+        username=username,
+        password_hash=hash_password(password),
+        user_id=user_id_var,
+        out_username=username_var,
+        session_token=session_token,
+        expires_at=expires_at
+    )
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    if user_id_var.getvalue() is None:
+        return None
+    return user_id_var.getvalue(), username_var.getvalue()
 
 @app.route('/api/auth', methods=['POST', 'GET', 'DELETE'])
 def auth_handler():
     """Handle authentication requests"""
 
-    # Initialize database on first request
-    init_database()
-
-    # Cleanup expired sessions periodically
-    cleanup_expired_sessions()
-
     if request.method == 'POST':
         # Login
         try:
@@ -245,31 +317,25 @@ def auth_handler():
             if not username or not password:
                 return jsonify({'success': False, 'message': 'Username and password required'}), 400
 
-            # Verify credentials
-            conn = get_db_connection()
-            cursor = conn.cursor()
-
-            password_hash = hash_password(password)
-            cursor.execute(
-                f'SELECT USER_ID, USERNAME FROM "{ORACLE_SCHEMA}".MSMMAI_USERS WHERE USERNAME = :username AND PASSWORD_HASH = :password_hash',
-                username=username,
-                password_hash=password_hash
-            )
-
-            user = cursor.fetchone()
+            # Throttle by client IP and username before touching the database
+            client_ip = request.remote_addr or ''
+            keys = throttle_keys(client_ip, username)
+            retry_after = login_throttle.check(keys)
+            if retry_after:
+                print(f"[Auth] Login throttled for user: {username} from {client_ip}", file=sys.stderr)
+                response = jsonify({'success': False, 'message': 'Too many login attempts, try again later'})
+                response.headers['Retry-After'] = str(retry_after)
+                return response, 429
+
+            # Verify credentials, update last login and create the session in one round trip.
+            # Signed tokens need no session row, so they are issued once the user is known.
+            session_token = None if signed_tokens_enabled() else create_session_token()
+            user = login_user(username, password, session_token, datetime.now() + SESSION_LIFETIME)
 
             if user:
-                # Update last login
-                cursor.execute(
-                    f'UPDATE "{ORACLE_SCHEMA}".MSMMAI_USERS SET LAST_LOGIN = CURRENT_TIMESTAMP WHERE USER_ID = :user_id',
-                    user_id=user[0]
-                )
-                conn.commit()
-                cursor.close()
-                conn.close()
-
-                # Create session in database
-                session_token = create_session(user[0], user[1])
+                login_throttle.record_success(keys)
+                if signed_tokens_enabled():
+                    session_token = create_signed_token(user[0], user[1], SESSION_LIFETIME)
 
                 if not session_token:
                     return jsonify({'success': False, 'message': 'Failed to create session'}), 500
@@ -283,7 +349,7 @@ def auth_handler():
                 response.set_cookie(
                     'session_token',
                     session_token,
-                    max_age=86400,
+                    max_age=int(SESSION_LIFETIME.total_seconds()),
                     httponly=True,
                     samesite='Lax',
                     secure=True
@@ -292,8 +358,7 @@ def auth_handler():
                 print(f"[Auth] Login successful for user: {user[1]}", file=sys.stderr)
                 return response, 200
             else:
-                cursor.close()
-                conn.close()
+                login_throttle.record_failure(keys)
                 print(f"[Auth] Login failed for user: {username}", file=sys.stderr)
                 return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
 
@@ -311,16 +376,28 @@ def auth_handler():
             if not session_token:
                 return jsonify({'authenticated': False}), 401
 
-            session = get_session(session_token)
+            if is_signed_token(session_token):
+                session = verify_signed_token(session_token, get_db_connection, ORACLE_SCHEMA)
+                if not session:
+                    return jsonify({'authenticated': False}), 401
+                return jsonify({
+                    'authenticated': True,
+                    'username': session['username']
+                }), 200
+
+            session = session_cache.get(session_token) or get_session(session_token)
 
             if not session:
                 return jsonify({'authenticated': False}), 401
 
             # Check if session expired
             if datetime.now() > session['expires_at']:
+                session_cache.evict(session_token)
                 delete_session(session_token)
                 return jsonify({'authenticated': False}), 401
 
+            session_cache.put(session_token, session)
+
             return jsonify({
                 'authenticated': True,
                 'username': session['username']
@@ -337,11 +414,14 @@ def auth_handler():
         try:
             session_token = request.cookies.get('session_token')
 
-            if session_token:
-                session = get_session(session_token)
-                if session:
-                    print(f"[Auth] Logout successful for user: {session['username']}", file=sys.stderr)
-                delete_session(session_token)
+            if is_signed_token(session_token):
+                if revoke_signed_token(session_token, get_db_connection, ORACLE_SCHEMA):
+                    print("[Auth] Logout successful (signed token revoked)", file=sys.stderr)
+            elif session_token:
+                session_cache.evict(session_token)
+                username = delete_session(session_token)
+                if username:
+                    print(f"[Auth] Logout successful for user: {username}", file=sys.stderr)
 
             response = make_response(jsonify({
                 'success': True,
@@ -359,6 +439,19 @@ def auth_handler():
 
     return jsonify({'success': False, 'message': 'Method not allowed'}), 405
 
+@app.route('/api/auth/cleanup-sessions')
+def cleanup_sessions_cron():
+    """Scheduled cleanup of expired sessions, called by Vercel Cron"""
+    cron_secret = os.getenv('CRON_SECRET')
+    if cron_secret:
+        request_secret = request.headers.get('Authorization')
+        if request_secret != f"Bearer {cron_secret}":
+            return jsonify({'error': 'Unauthorized'}), 401
+
+    deleted = cleanup_expired_sessions()
+    print(f"[Auth] Expired session cleanup: {deleted}", file=sys.stderr)
+    return jsonify({'success': True, 'deleted': deleted}), 200
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
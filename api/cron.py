@@ -4,7 +4,6 @@ Triggered daily by Vercel Cron
 """
 
 import sys
-import os
 from pathlib import Path
 
 # Add the LicenseReminderTool directory to Python path
@@ -15,12 +14,5 @@ sys.path.insert(0, str(lrt_path))
 from dotenv import load_dotenv
 load_dotenv()
 
-# Set template folder path for Flask to find
-os.environ['TEMPLATE_FOLDER'] = str(lrt_path / 'templates')
-os.environ['STATIC_FOLDER'] = str(lrt_path / 'static')
-
-# Import the cron handler
-from api.cron import handler
-
-# Export handler for Vercel
-handler = handler
+# Import the cron WSGI app (reminder engine only, not the dashboard)
+from api.cron import app
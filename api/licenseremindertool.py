@@ -8,42 +8,32 @@ import os
 from pathlib import Path
 import traceback
 
-print("[LRT Init] Starting licenseremindertool.py initialization", file=sys.stderr)
-print(f"[LRT Init] Current working directory: {os.getcwd()}", file=sys.stderr)
-print(f"[LRT Init] __file__: {__file__}", file=sys.stderr)
+# Set SERVERLESS_DEBUG=1 for verbose initialization logs (kept off the cold-start path by default)
+DEBUG = os.getenv('SERVERLESS_DEBUG', '').lower() in ('1', 'true', 'yes')
+
+
+def debug_log(message):
+    if DEBUG:
+        print(f"[LRT Init] {message}", file=sys.stderr)
+
 
 # Add the LicenseReminderTool directory to Python path
 lrt_path = Path(__file__).parent.parent / 'AI Tools' / 'LicenseReminderTool-main'
-print(f"[LRT Init] LRT path: {lrt_path}", file=sys.stderr)
-print(f"[LRT Init] LRT path exists: {lrt_path.exists()}", file=sys.stderr)
-print(f"[LRT Init] LRT path absolute: {lrt_path.absolute()}", file=sys.stderr)
+debug_log(f"LRT path: {lrt_path}, exists: {lrt_path.exists()}")
 
 sys.path.insert(0, str(lrt_path))
-print(f"[LRT Init] Python path after insert: {sys.path[:3]}", file=sys.stderr)
 
 try:
-    print("[LRT Init] Importing dotenv...", file=sys.stderr)
     from dotenv import load_dotenv
-    print("[LRT Init] Loading .env...", file=sys.stderr)
     load_dotenv()
 
     # Set template folder path for Flask to find
-    template_path = lrt_path / 'templates'
-    static_path = lrt_path / 'static'
-    print(f"[LRT Init] Template path: {template_path}, exists: {template_path.exists()}", file=sys.stderr)
-    print(f"[LRT Init] Static path: {static_path}, exists: {static_path.exists()}", file=sys.stderr)
-
-    os.environ['TEMPLATE_FOLDER'] = str(template_path)
-    os.environ['STATIC_FOLDER'] = str(static_path)
-
-    # Check if api/index.py exists
-    api_index_path = lrt_path / 'api' / 'index.py'
-    print(f"[LRT Init] api/index.py path: {api_index_path}, exists: {api_index_path.exists()}", file=sys.stderr)
+    os.environ['TEMPLATE_FOLDER'] = str(lrt_path / 'templates')
+    os.environ['STATIC_FOLDER'] = str(lrt_path / 'static')
 
     # Import the Flask app
-    print("[LRT Init] Attempting to import api.index...", file=sys.stderr)
     from api.index import app as flask_app
-    print("[LRT Init] Successfully imported Flask app", file=sys.stderr)
+    debug_log("Successfully imported Flask app")
 
     # Wrap Flask app to handle /licenseremindertool prefix
     from werkzeug.middleware.dispatcher import DispatcherMiddleware
@@ -54,7 +44,6 @@ try:
         NotFound(),  # Default app (404)
         {'/licenseremindertool': flask_app}  # Mount Flask app at /licenseremindertool
     )
-    print("[LRT Init] App wrapped with DispatcherMiddleware for path handling", file=sys.stderr)
 
 except Exception as e:
     print(f"[LRT ERROR] ERROR IMPORTING FLASK APP: {type(e).__name__}: {str(e)}", file=sys.stderr)
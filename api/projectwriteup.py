@@ -8,79 +8,31 @@ import os
 from pathlib import Path
 import traceback
 
-print("[ProjectWriteup Init] Starting projectwriteup.py initialization", file=sys.stderr)
-print(f"[ProjectWriteup Init] Current working directory: {os.getcwd()}", file=sys.stderr)
-print(f"[ProjectWriteup Init] __file__: {__file__}", file=sys.stderr)
+# Set SERVERLESS_DEBUG=1 for verbose initialization logs (kept off the cold-start path by default)
+DEBUG = os.getenv('SERVERLESS_DEBUG', '').lower() in ('1', 'true', 'yes')
 
-# List contents to debug
-try:
-    base_path = Path(__file__).parent.parent
-    print(f"[ProjectWriteup Init] Base path: {base_path}", file=sys.stderr)
-    if base_path.exists():
-        items = list(base_path.iterdir())
-        print(f"[ProjectWriteup Init] Base path contents: {[str(x.name) for x in items[:10]]}", file=sys.stderr)
-
-        # Check for AI Tools directory
-        ai_tools_candidates = [
-            base_path / 'AI Tools',
-            base_path / 'AI_Tools',
-            base_path / 'AITools',
-        ]
-        for candidate in ai_tools_candidates:
-            if candidate.exists():
-                print(f"[ProjectWriteup Init] Found AI Tools at: {candidate}", file=sys.stderr)
-                items = list(candidate.iterdir())
-                print(f"[ProjectWriteup Init] AI Tools contents: {[str(x.name) for x in items[:10]]}", file=sys.stderr)
-                break
-except Exception as e:
-    print(f"[ProjectWriteup Init] Error listing directories: {e}", file=sys.stderr)
 
-# Try multiple possible paths for Projects_Writeup
-possible_paths = [
-    Path(__file__).parent.parent / 'AI Tools' / 'Projects_Writeup',
-    Path(__file__).parent.parent / 'AI_Tools' / 'Projects_Writeup',
-    Path(__file__).parent.parent / 'Projects_Writeup',
-]
+def debug_log(message):
+    if DEBUG:
+        print(f"[ProjectWriteup Init] {message}", file=sys.stderr)
 
-project_path = None
-for path_candidate in possible_paths:
-    print(f"[ProjectWriteup Init] Trying path: {path_candidate}", file=sys.stderr)
-    if path_candidate.exists():
-        project_path = path_candidate
-        print(f"[ProjectWriteup Init] Found project at: {project_path}", file=sys.stderr)
-        break
 
-if not project_path:
-    print(f"[ProjectWriteup Init] ERROR: Could not find Projects_Writeup directory", file=sys.stderr)
-    print(f"[ProjectWriteup Init] Tried paths: {[str(p) for p in possible_paths]}", file=sys.stderr)
-    raise FileNotFoundError("Projects_Writeup directory not found")
+project_path = Path(__file__).parent.parent / 'AI Tools' / 'Projects_Writeup'
+debug_log(f"Project path: {project_path}, exists: {project_path.exists()}")
 
 sys.path.insert(0, str(project_path))
-print(f"[ProjectWriteup Init] Python path after insert: {sys.path[:3]}", file=sys.stderr)
 
 try:
-    print("[ProjectWriteup Init] Importing dotenv...", file=sys.stderr)
     from dotenv import load_dotenv
-    print("[ProjectWriteup Init] Loading .env...", file=sys.stderr)
     load_dotenv()
 
     # Set template and static folder paths for Flask to find
-    template_path = project_path / 'templates'
-    static_path = project_path / 'static'
-    print(f"[ProjectWriteup Init] Template path: {template_path}, exists: {template_path.exists()}", file=sys.stderr)
-    print(f"[ProjectWriteup Init] Static path: {static_path}, exists: {static_path.exists()}", file=sys.stderr)
-
-    os.environ['TEMPLATE_FOLDER'] = str(template_path)
-    os.environ['STATIC_FOLDER'] = str(static_path)
-
-    # Check if api/index.py exists
-    api_index_path = project_path / 'api' / 'index.py'
-    print(f"[ProjectWriteup Init] api/index.py path: {api_index_path}, exists: {api_index_path.exists()}", file=sys.stderr)
+    os.environ['TEMPLATE_FOLDER'] = str(project_path / 'templates')
+    os.environ['STATIC_FOLDER'] = str(project_path / 'static')
 
     # Import the Flask app
-    print("[ProjectWriteup Init] Attempting to import api.index...", file=sys.stderr)
     from api.index import app as flask_app
-    print("[ProjectWriteup Init] Successfully imported Flask app", file=sys.stderr)
+    debug_log("Successfully imported Flask app")
 
     # Wrap Flask app to handle /project-writeup prefix
     from werkzeug.middleware.dispatcher import DispatcherMiddleware
@@ -91,7 +43,6 @@ try:
         NotFound(),  # Default app (404)
         {'/project-writeup': flask_app}  # Mount Flask app at /project-writeup
     )
-    print("[ProjectWriteup Init] App wrapped with DispatcherMiddleware for path handling", file=sys.stderr)
 
 except Exception as e:
     print(f"[ProjectWriteup ERROR] ERROR IMPORTING FLASK APP: {type(e).__name__}: {str(e)}", file=sys.stderr)
@@ -100,6 +51,8 @@ except Exception as e:
     print(f"[ProjectWriteup ERROR] Python path: {sys.path}", file=sys.stderr)
     print(f"[ProjectWriteup ERROR] Project path: {project_path}", file=sys.stderr)
     print(f"[ProjectWriteup ERROR] Project path exists: {project_path.exists()}", file=sys.stderr)
+    if project_path.parent.exists():
+        print(f"[ProjectWriteup ERROR] AI Tools contents: {[x.name for x in project_path.parent.iterdir()]}", file=sys.stderr)
     print(f"[ProjectWriteup ERROR] Environment variables:", file=sys.stderr)
     for key in ['OPENAI_API_KEY', 'FLASK_SECRET_KEY']:
         value = os.getenv(key)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Authentication database administration for MSMM AI Tools
+Runs schema setup and expired-session cleanup outside the request path
+
+Usage:
+  python auth_admin.py migrate             # create auth tables, indexes and the admin user
+  python auth_admin.py cleanup-sessions    # delete expired sessions in chunks
+"""
+
+import sys
+import argparse
+
+from api.auth import init_database, cleanup_expired_sessions, CLEANUP_BATCH_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MSMM AI Tools authentication database administration')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('migrate', help='Create auth tables, indexes and the default admin user')
+
+    cleanup = subparsers.add_parser('cleanup-sessions', help='Delete expired sessions and revocations')
+    cleanup.add_argument('--batch-size', type=int, default=CLEANUP_BATCH_SIZE,
+                         help='Rows deleted per statement')
+    cleanup.add_argument('--time-budget', type=float, default=300,
+                         help='Stop after this many seconds')
+
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        if not init_database():
+            print("✗ Migration failed")
+            sys.exit(1)
+        print("✓ Auth tables and indexes are up to date")
+    elif args.command == 'cleanup-sessions':
+        deleted = cleanup_expired_sessions(args.batch_size, args.time_budget)
+        for table, count in deleted.items():
+            print(f"✓ {table}: {count} expired rows deleted")
+
+
+if __name__ == '__main__':
+    main()
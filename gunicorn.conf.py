@@ -0,0 +1,67 @@
+"""
+Gunicorn configuration for self-hosting MSMM AI Tools
+Preforked gthread workers serving wsgi:app, configured from the environment
+
+Usage:
+  gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker holds its own Oracle pool, so keep ORACLE_POOL_MAX at or above
+GUNICORN_THREADS; the database sees up to WEB_CONCURRENCY * ORACLE_POOL_MAX
+connections.
+"""
+
+import os
+import sys
+import multiprocessing
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Generating descriptions calls OpenAI for up to a minute
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+# Import the apps once in the master and fork the workers from it
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """Warm templates and URL maps in the master so every worker inherits them"""
+    if preload_app:
+        import wsgi
+        wsgi.warm_up()
+        server.log.info("Warm-up complete")
+
+
+def post_fork(server, worker):
+    """Give each worker its own Oracle pool instead of the master's sockets"""
+    oracle_pool = sys.modules.get('oracle_pool')  # only loaded yet with preload_app
+    if oracle_pool is not None:
+        oracle_pool.reset_pool(close=False)
+
+
+def post_worker_init(worker):
+    """Open the worker's pool (and warm up, without preload) before taking traffic"""
+    import wsgi
+    if not preload_app:
+        wsgi.warm_up()
+
+    import oracle_pool
+    try:
+        # With ORACLE_POOL_MIN=0 the pool opens nothing by itself; taking and
+        # returning one connection leaves it warm for the first request
+        oracle_pool.get_pool().acquire().close()
+    except Exception as e:
+        # The pool is created on first use instead; do not keep the worker down
+        worker.log.warning(f"Oracle pool not ready: {e}")
@@ -20,6 +20,18 @@ CREATE TABLE "MSMM DASHBOARD".USER_SESSIONS (
     FOREIGN KEY (USER_ID) REFERENCES "MSMM DASHBOARD".MSMMAI_USERS(USER_ID)
 );
 
+-- Create the REVOKED_SESSIONS table for logged out signed tokens (SESSION_TOKEN_FORMAT=signed)
+CREATE TABLE "MSMM DASHBOARD".REVOKED_SESSIONS (
+    JTI VARCHAR2(64) PRIMARY KEY,
+    USERNAME VARCHAR2(50),
+    REVOKED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    EXPIRES_AT TIMESTAMP NOT NULL
+);
+
+-- Index EXPIRES_AT for the scheduled expired-session cleanup
+CREATE INDEX IDX_USER_SESSIONS_EXPIRES_AT ON "MSMM DASHBOARD".USER_SESSIONS(EXPIRES_AT);
+CREATE INDEX IDX_REVOKED_SESSIONS_EXPIRES_AT ON "MSMM DASHBOARD".REVOKED_SESSIONS(EXPIRES_AT);
+
 -- Insert default admin user
 -- Username: admin
 -- Password: Scott123$
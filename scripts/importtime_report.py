@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Import-time report for the serverless entry points
+Imports each entry point in a fresh interpreter with `python -X importtime`
+and reports total import time and the slowest top-level packages
+
+Usage:
+  python scripts/importtime_report.py                      # all entry points
+  python scripts/importtime_report.py api/projectwriteup.py --top 15
+  python scripts/importtime_report.py --budget-ms 1500     # exit 1 if any entry point exceeds the budget
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = [
+    'api/auth.py',
+    'api/cron.py',
+    'api/licenseremindertool.py',
+    'api/projectwriteup.py',
+]
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$')
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into (module, self_us, cumulative_us, depth) tuples"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            depth = (len(indent) - 1) // 2
+            rows.append((module.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(entry_point=None):
+    """
+    Import one entry point in a fresh interpreter; return (wall seconds, parsed rows, error)
+    Without an entry point this measures the interpreter and runpy baseline.
+    """
+    code = "import runpy, pkgutil"  # run_path imports pkgutil; keep it in the baseline
+    if entry_point:
+        code += f"; runpy.run_path({str(ROOT / entry_point)!r}, run_name='importtime')"
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    )
+    wall = time.perf_counter() - started
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'
+    return wall, parse_importtime(result.stderr), error
+
+
+def top_level_totals(rows):
+    """Sum cumulative time of depth-0 imports by top-level package"""
+    totals = defaultdict(int)
+    for module, _, cumulative_us, depth in rows:
+        if depth == 0:
+            totals[module.split('.')[0]] += cumulative_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report import time of the serverless entry points')
+    parser.add_argument('entry_points', nargs='*', default=ENTRY_POINTS, help='Entry point files (relative to the repo root)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest packages to list per entry point')
+    parser.add_argument('--budget-ms', type=float,
+                        help='Fail if an entry point imports for longer than this, or fails to import')
+    args = parser.parse_args()
+
+    # Modules the interpreter and runpy load anyway are not charged to the entry point
+    baseline_wall, baseline_rows, _ = measure()
+    baseline = {module for module, _, _, _ in baseline_rows}
+
+    over_budget = []
+    failed = []
+    for entry_point in args.entry_points:
+        wall, rows, error = measure(entry_point)
+        rows = [row for row in rows if row[0] not in baseline]
+        import_ms = sum(cumulative_us for _, _, cumulative_us, depth in rows if depth == 0) / 1000
+
+        print(f"\n{entry_point}")
+        print(f"  imports: {import_ms:8.1f} ms   wall (minus interpreter start): {(wall - baseline_wall) * 1000:8.1f} ms")
+        if error:
+            print(f"  ⚠ import failed: {error}")
+        for package, cumulative_us in top_level_totals(rows)[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {package}")
+
+        if args.budget_ms is not None:
+            # A failed import stops early and would pass any budget
+            if error:
+                failed.append(entry_point)
+            elif import_ms > args.budget_ms:
+                over_budget.append(entry_point)
+
+    if failed:
+        print(f"\n✗ Failed to import: {', '.join(failed)}")
+    if over_budget:
+        print(f"\n✗ Over the {args.budget_ms:.0f} ms import budget: {', '.join(over_budget)}")
+    if failed or over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Unified WSGI host for MSMM AI Tools
+Mounts the auth API, the License Reminder Tool and the Project Writeup tool
+in one process, so they share the Oracle pool, session cache, login
+throttle and OpenAI client instead of each starting its own.
+
+Vercel still deploys api/*.py as separate functions; this entry point is
+for running everything on our own hosts:
+  gunicorn -c gunicorn.conf.py wsgi:app
+  python wsgi.py            # development server on http://localhost:8000
+"""
+
+import os
+import sys
+import importlib.util
+from pathlib import Path
+
+from dotenv import load_dotenv
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from werkzeug.middleware.shared_data import SharedDataMiddleware
+
+ROOT = Path(__file__).resolve().parent
+AI_TOOLS = ROOT / 'AI Tools'
+
+load_dotenv(ROOT / '.env')
+
+
+def load_app(module_name, path):
+    """
+    Import a Flask app module from a file under a unique module name
+
+    Both tools ship an `api/index.py`, so they cannot be imported as
+    `api.index` side by side.
+    """
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered before exec so Flask can find the module's root path
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def serve_index(app):
+    """Serve index.html for the site root, as Vercel does"""
+    def wrapper(environ, start_response):
+        if environ.get('PATH_INFO') in ('', '/'):
+            environ['PATH_INFO'] = '/index.html'
+        return app(environ, start_response)
+    return wrapper
+
+
+auth_app = load_app('auth_api', ROOT / 'api' / 'auth.py')
+licenseremindertool_app = load_app('licenseremindertool_index', AI_TOOLS / 'LicenseReminderTool-main' / 'api' / 'index.py')
+projectwriteup_app = load_app('projectwriteup_index', AI_TOOLS / 'Projects_Writeup' / 'api' / 'index.py')
+
+# The auth app owns /api/auth and /health; the home and login pages are static
+site = SharedDataMiddleware(auth_app, {
+    '/index.html': str(ROOT / 'index.html'),
+    '/login.html': str(ROOT / 'login.html'),
+    '/businessdev/assets': str(AI_TOOLS / 'BusinessDev_NewUI' / 'assets'),
+})
+
+app = DispatcherMiddleware(serve_index(site), {
+    '/licenseremindertool': licenseremindertool_app,
+    '/project-writeup': projectwriteup_app,
+})
+
+
+def warm_up():
+    """
+    Compile every HTML template and each URL map before taking traffic
+
+    Under gunicorn with preload_app this runs once in the master, and the
+    workers inherit the compiled templates.
+    """
+    for flask_app in (auth_app, licenseremindertool_app, projectwriteup_app):
+        for name in flask_app.jinja_env.list_templates(extensions=['html']):
+            flask_app.jinja_env.get_template(name)
+        flask_app.url_map.update()
+
+
+if __name__ == '__main__':
+    from werkzeug.serving import run_simple
+    run_simple('0.0.0.0', int(os.getenv('PORT', 8000)), app, use_reloader=True, threaded=True)